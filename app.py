@@ -7,9 +7,29 @@ import plotly.express as px
 from datetime import datetime, date, timedelta
 import gspread
 from google.oauth2.service_account import Credentials
+from google.auth.exceptions import TransportError
 from dateutil.relativedelta import relativedelta
 import warnings
-from tenacity import retry, stop_after_attempt, wait_exponential
+import os
+import sys
+import json
+import csv
+import time
+import shutil
+import hashlib
+import threading
+import re
+import bisect
+import io
+import gzip
+from gspread.exceptions import APIError
+from gspread.utils import absolute_range_name, extract_id_from_url, fill_gaps
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from functools import lru_cache
+import pyarrow as pa
+import pyarrow.compute as pc
 import math
 warnings.filterwarnings('ignore')
 
@@ -122,6 +142,10 @@ st.markdown("""
             break-after: page !important;
         }
 
+        .print-section-break {
+            break-before: page !important;
+        }
+
         /* Ensure all content fits page width */
         .row {
             display: block !important;
@@ -374,216 +398,691 @@ def init_gsheet_connection():
         st.error(f"❌ Koneksi Gagal: {str(e)}")
         return None
 
-def validate_month_format(month_str):
-    """Validate and standardize month formats"""
-    if pd.isna(month_str):
-        return datetime.now()
-    
-    month_str = str(month_str).strip().upper()
-    
-    # Mapping bulan
-    month_map = {
-        'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'MAY': 5, 'JUN': 6,
-        'JUL': 7, 'AUG': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12
-    }
-    
-    formats_to_try = ['%b-%Y', '%b-%y', '%B %Y', '%m/%Y', '%Y-%m']
-    
-    for fmt in formats_to_try:
+# --- MONTH LABEL REGISTRY (dipakai semua loader & tab) ---
+
+# Nama bulan EN + ID (3 huruf pertama)
+MONTH_NAME_MAP = {
+    'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'MAY': 5, 'MEI': 5, 'JUN': 6,
+    'JUL': 7, 'AUG': 8, 'AGU': 8, 'AGT': 8, 'SEP': 9, 'OCT': 10, 'OKT': 10,
+    'NOV': 11, 'DEC': 12, 'DES': 12
+}
+
+MONTH_LABEL_FORMATS = ['%b-%Y', '%b-%y', '%B %Y', '%m/%Y', '%Y-%m']
+
+@lru_cache(maxsize=4096)
+def parse_month_label(label, strict=False):
+    """
+    Label bulan (Jan-25 / Jan 2025 / Jan_25 / January 2025 / 01/2025 / 2025-01 / Mei 26) -> datetime tanggal 1.
+    strict=False: fallback cari nama bulan di dalam string (tahun kosong -> tahun berjalan), seperti loader lama.
+    strict=True: hanya format bulan + tahun yang jelas (untuk deteksi kolom bulan). Gagal -> None
+    """
+    if label is None or (isinstance(label, float) and np.isnan(label)):
+        return None
+
+    label_str = str(label).strip().upper()
+    if not label_str:
+        return None
+
+    for fmt in MONTH_LABEL_FORMATS:
         try:
-            return datetime.strptime(month_str, fmt)
-        except:
+            return datetime.strptime(label_str, fmt)
+        except ValueError:
             continue
-    
+
+    # "<bulan><pemisah><tahun>" dengan pemisah spasi / strip / underscore
+    parts = [p for p in label_str.replace('_', ' ').replace('-', ' ').split(' ') if p]
+    if len(parts) >= 2 and parts[0][:3] in MONTH_NAME_MAP:
+        year_str = ''.join(filter(str.isdigit, parts[1]))
+        if len(year_str) in (2, 4):
+            year = 2000 + int(year_str) if len(year_str) == 2 else int(year_str)
+            return datetime(year, MONTH_NAME_MAP[parts[0][:3]], 1)
+
+    if strict:
+        return None
+
     # Fallback: cari bulan dalam string
-    for month_name, month_num in month_map.items():
-        if month_name in month_str:
-            # Cari tahun
-            year_part = month_str.replace(month_name, '').replace('-', '').replace(' ', '').strip()
+    for month_name, month_num in MONTH_NAME_MAP.items():
+        if month_name in label_str:
+            year_part = label_str.replace(month_name, '').replace('-', '').replace(' ', '').strip()
             if year_part and year_part.isdigit():
                 year = int('20' + year_part) if len(year_part) == 2 else int(year_part)
             else:
                 year = datetime.now().year
-            
             return datetime(year, month_num, 1)
+
+    return None
+
+def parse_month_labels(labels, strict=False):
+    """Vectorized: Series label -> Series datetime64 (setiap label unik di-parse sekali, lalu di-map ke baris)"""
+    labels = pd.Series(labels)
+    codes, uniques = pd.factorize(labels)
+    parsed = pd.DatetimeIndex([parse_month_label(u, strict) for u in uniques], dtype='datetime64[ns]')
+    values = parsed.values.take(np.where(codes < 0, 0, codes)) if len(parsed) else np.full(len(codes), np.datetime64('NaT'), dtype='datetime64[ns]')
+    values[codes < 0] = np.datetime64('NaT')
+    return pd.Series(values, index=labels.index, name=labels.name)
+
+def sort_month_labels(labels, strict=False):
+    """Urutkan label bulan secara kronologis (label yang tidak bisa di-parse di akhir)"""
+    return sorted(labels, key=lambda c: (parse_month_label(c, strict) is None, parse_month_label(c, strict) or datetime.min))
+
+# --- PRODUCT DIMENSION ---
+# Kolom info produk yang ditempel ke fact table (Sales / Rofo / PO / Stock / hasil analytics)
+PRODUCT_INFO_COLUMNS = ['Product_Name', 'Brand', 'SKU_Tier', 'Status', 'Floor_Price', 'Net_Order_Price']
+
+def column_values(series):
+    """Array di balik Series tanpa copy (ndarray untuk dtype numpy, ExtensionArray untuk categorical dll)"""
+    return series.array if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) else series.to_numpy()
+
+def build_product_dimension(df_product):
+    """
+    Product_Master -> product dimension: index SKU_ID (1 baris per SKU, baris pertama dipakai),
+    kolom PRODUCT_INFO_COLUMNS (harga hanya jika Floor_Price & Net_Order_Price ada)
+    """
+    if df_product.empty or 'SKU_ID' not in df_product.columns:
+        return pd.DataFrame()
     
-    return datetime.now()
+    price_cols = ['Floor_Price', 'Net_Order_Price'] if 'Floor_Price' in df_product.columns and 'Net_Order_Price' in df_product.columns else []
+    info_cols = [col for col in ['Product_Name', 'Brand', 'SKU_Tier', 'Status'] + price_cols if col in df_product.columns]
+    
+    product_dim = df_product.drop_duplicates(subset=['SKU_ID'])[['SKU_ID'] + info_cols]
+    return product_dim.set_index('SKU_ID')
 
-def add_product_info_to_data(df, df_product):
-    """Add Product_Name, Brand, SKU_Tier, Prices from Product_Master to any dataframe"""
+def add_product_info_to_data(df, df_product, columns=None):
+    """
+    Add Product_Name, Brand, SKU_Tier, Prices from Product_Master to any dataframe.
+    df_product: product dimension (data['product_dim']) atau Product_Master (dimension dibangun dulu).
+    Posisi SKU di dimension dicari sekali (per kategori jika SKU_ID categorical), lalu tiap atribut di-take;
+    kolom df tidak di-copy. columns: atribut yang ditambahkan (default semua), kolom lama dengan nama sama diganti
+    """
     if df.empty or df_product.empty or 'SKU_ID' not in df.columns:
         return df
     
-    # Get product info from Product_Master (including prices)
-    price_cols = ['Floor_Price', 'Net_Order_Price'] if 'Floor_Price' in df_product.columns and 'Net_Order_Price' in df_product.columns else []
+    product_dim = df_product if df_product.index.name == 'SKU_ID' else build_product_dimension(df_product)
+    replaced = PRODUCT_INFO_COLUMNS if columns is None else columns
+    columns = [col for col in replaced if col in product_dim.columns]
     
-    product_info_cols = ['SKU_ID', 'Product_Name', 'Brand', 'SKU_Tier', 'Status'] + price_cols
-    product_info_cols = [col for col in product_info_cols if col in df_product.columns]
+    sku = df['SKU_ID']
+    if isinstance(sku.dtype, pd.CategoricalDtype):
+        category_pos = product_dim.index.get_indexer(sku.cat.categories)
+        codes = sku.cat.codes.to_numpy()
+        indexer = np.where(codes >= 0, category_pos.take(codes), -1) if len(category_pos) else np.full(len(codes), -1)
+    else:
+        indexer = product_dim.index.get_indexer(sku)
     
-    product_info = df_product[product_info_cols].copy()
-    product_info = product_info.drop_duplicates(subset=['SKU_ID'])
+    # SKU yang tidak ada di Product_Master -> NaN (sama seperti left merge)
+    enriched = {col: column_values(df[col]) for col in df.columns if col not in replaced}
+    enriched.update({col: pd.api.extensions.take(column_values(product_dim[col]), indexer, allow_fill=True) for col in columns})
+    return pd.DataFrame(enriched, columns=list(enriched), copy=False)
+
+# Semua worksheet yang dibaca dashboard (urutan = urutan proses)
+SHEET_NAMES = [
+    "Product_Master", "Sales", "Rofo", "PO", "Stock_Onhand",
+    "Forecast_2026_Ecomm", "Forecast_2026_Reseller", "BS_Fullfilment_Cost"
+]
+
+MONTH_KEYS = ['JAN','FEB','MAR','APR','MAY','JUN','JUL','AUG','SEP','OCT','NOV','DEC']
+# Nomor bulan -> singkatan ('Jan'), sama dengan strftime('%b')
+MONTH_ABBREVIATIONS = {i: key.title() for i, key in enumerate(MONTH_KEYS, start=1)}
+
+# Batas request ke Sheets API untuk seluruh proses (quota read Google: 60 / menit / user)
+SHEETS_CALLS_PER_MINUTE = 60
+
+@st.cache_resource(show_spinner=False)
+def get_sheets_rate_limiter():
+    """Sliding window 60 detik, shared antar session & thread"""
+    return {'lock': threading.Lock(), 'calls': deque()}
+
+def acquire_sheets_quota(limiter, n_calls=1):
+    """
+    Blok sampai ada slot quota untuk n_calls request Sheets API.
+    limiter diambil di thread session (get_sheets_rate_limiter) lalu diteruskan, karena fetch juga jalan di thread refresher
+    """
+    while True:
+        with limiter['lock']:
+            now = time.monotonic()
+            while limiter['calls'] and now - limiter['calls'][0] >= 60:
+                limiter['calls'].popleft()
+            if len(limiter['calls']) + n_calls <= SHEETS_CALLS_PER_MINUTE:
+                limiter['calls'].extend([now] * n_calls)
+                return
+            wait = 60 - (now - limiter['calls'][0])
+        time.sleep(max(wait, 0.05))
+
+def is_missing_range_error(e):
+    """Range tidak valid / sheet tidak ada (400 / 404) -> sheet dianggap tidak ada"""
+    return isinstance(e, APIError) and getattr(e, 'code', None) in (400, 404)
+
+def is_retryable_error(e):
+    """
+    Hanya error sementara yang di-retry: quota (429), 5xx, koneksi / timeout (OSError termasuk requests, TransportError auth).
+    403 (tanpa akses), URL salah, range tidak valid & worksheet tidak ada langsung gagal
+    """
+    if isinstance(e, APIError):
+        code = getattr(e, 'code', None)
+        return code == 429 or (isinstance(code, int) and code >= 500)
+    return isinstance(e, (OSError, TransportError))
+
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10), retry=retry_if_exception(is_retryable_error))
+def open_spreadsheet(_client, gsheet_url, limiter):
+    acquire_sheets_quota(limiter)
+    return _client.open_by_url(gsheet_url)
+
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10), retry=retry_if_exception(is_retryable_error))
+def fetch_single_grid(spreadsheet, sheet_name, limiter):
+    """values_get satu worksheet (retry per sheet)"""
+    acquire_sheets_quota(limiter)
+    return spreadsheet.values_get(absolute_range_name(sheet_name)).get('values', [])
+
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10), retry=retry_if_exception(is_retryable_error))
+def fetch_batch_values(spreadsheet, ranges, limiter):
+    """values_batch_get semua range (retry hanya untuk batch ini, tanpa buka ulang spreadsheet)"""
+    acquire_sheets_quota(limiter)
+    return spreadsheet.values_batch_get(ranges)
+
+def fetch_sheet_grids(_client, gsheet_url, sheet_names, limiter):
+    """Buka spreadsheet sekali, ambil semua worksheet dengan satu values_batch_get (2 HTTP call)"""
+    spreadsheet = open_spreadsheet(_client, gsheet_url, limiter)
+    ranges = [absolute_range_name(name) for name in sheet_names]
     
-    # Remove existing columns if they exist (except SKU_ID)
-    cols_to_remove = []
-    for col in ['Product_Name', 'Brand', 'SKU_Tier', 'Status', 'Floor_Price', 'Net_Order_Price']:
-        if col in df.columns and col != 'SKU_ID':
-            cols_to_remove.append(col)
+    try:
+        response = fetch_batch_values(spreadsheet, ranges, limiter)
+    except APIError as e:
+        # Range tidak valid (sheet tidak ada) membuat seluruh batch gagal -> ambil per sheet
+        if getattr(e, 'code', None) != 400:
+            raise
+        grids = {}
+        for name in sheet_names:
+            try:
+                # Retry per range: 429 di satu range tidak mengulang batch / metadata
+                grids[name] = fetch_single_grid(spreadsheet, name, limiter)
+            except APIError as range_error:
+                # Hanya range tidak valid = sheet tidak ada; quota / 5xx (setelah retry) di-raise -> fallback snapshot
+                if not is_missing_range_error(range_error):
+                    raise
+                grids[name] = None
+        return grids
+    
+    value_ranges = response.get('valueRanges', [])
+    return {name: vr.get('values', []) for name, vr in zip(sheet_names, value_ranges)}
+
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10), retry=retry_if_exception(is_retryable_error))
+def fetch_worksheet_values(_client, gsheet_url, sheet_name, limiter):
+    """open_by_url + worksheet (metadata) + get_all_values satu worksheet (retry per sheet)"""
+    acquire_sheets_quota(limiter, 3)
+    return _client.open_by_url(gsheet_url).worksheet(sheet_name).get_all_values()
+
+def fetch_sheet_grids_per_sheet(_client, gsheet_url, sheet_names, limiter):
+    """Mode lama: open_by_url + get_all_values untuk setiap worksheet"""
+    grids = {}
+    for name in sheet_names:
+        try:
+            grids[name] = fetch_worksheet_values(_client, gsheet_url, name, limiter)
+        except gspread.exceptions.WorksheetNotFound:
+            grids[name] = None
+    return grids
+
+# Maksimal request paralel ke Sheets API (jaga quota per user)
+SHEET_FETCH_WORKERS = 4
+
+def fetch_sheet_grids_parallel(_client, gsheet_url, sheet_names, limiter, max_workers=SHEET_FETCH_WORKERS):
+    """
+    Buka spreadsheet sekali lalu ambil setiap worksheet secara paralel (thread pool terbatas).
+    Kegagalan satu sheet disimpan sebagai exception di grids -> diproses per sheet oleh process_sheet_grids
+    """
+    spreadsheet = open_spreadsheet(_client, gsheet_url, limiter)
     
-    if cols_to_remove:
-        df_temp = df.drop(columns=cols_to_remove)
-    else:
-        df_temp = df.copy()
+    def fetch_one(sheet_name):
+        try:
+            return fetch_single_grid(spreadsheet, sheet_name, limiter)
+        except APIError as e:
+            if is_missing_range_error(e):
+                return None
+            return e
+        except Exception as e:
+            return e
     
-    # Merge with product info
-    df_result = pd.merge(df_temp, product_info, on='SKU_ID', how='left')
-    return df_result
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sheet_names)))) as pool:
+        return dict(zip(sheet_names, pool.map(fetch_one, sheet_names)))
+
+def sheet_grid(grids, sheet_name):
+    """Ambil raw grid sebuah sheet, raise jika sheet tidak ditemukan / gagal diambil"""
+    grid = grids.get(sheet_name)
+    if grid is None:
+        raise gspread.exceptions.WorksheetNotFound(sheet_name)
+    if isinstance(grid, Exception):
+        raise grid
+    return grid
+
+# --- SHEET SCHEMA (typed parsing langsung dari raw grid) ---
+# Nama kolom dicocokkan setelah normalisasi (strip + spasi -> underscore)
+# - string: ID / teks, tidak pernah diubah ke angka (SKU_ID "00123" tetap string)
+# - numeric: angka, pemisah ribuan (koma), % dan spasi dibuang
+# - month_columns: semua kolom bulan (JAN..DEC) numeric
+# - infer_other: kolom lain jadi numeric jika semua isinya angka (seperti get_all_records), selain itu string
+SHEET_SCHEMAS = {
+    "Product_Master": {
+        'string': ['SKU_ID', 'Product_Name', 'Brand', 'SKU_Tier', 'Status'],
+        'numeric': ['Floor_Price', 'Net_Order_Price'],
+        'infer_other': True
+    },
+    "Sales": {
+        'string': ['SKU_ID', 'SKU_Name', 'Product_Name', 'Brand', 'SKU_Tier'],
+        'month_columns': True,
+        'infer_other': True
+    },
+    "Rofo": {
+        'string': ['SKU_ID', 'Product_Name', 'Brand', 'SKU_Tier'],
+        'month_columns': True,
+        'infer_other': True
+    },
+    "PO": {
+        'string': ['SKU_ID', 'Product_Name', 'Brand', 'SKU_Tier'],
+        'month_columns': True,
+        'infer_other': True
+    },
+    "Stock_Onhand": {
+        'string': ['SKU_ID', 'Product_Code', 'Product_Name', 'Stock_Category', 'Expiry_Date'],
+        'numeric': ['Qty_Available'],
+        'strip_headers': True,
+        'drop_blank_headers': True,
+        'infer_other': False
+    },
+    "Forecast_2026_Ecomm": {
+        'string': ['SKU_ID', 'Product_Name', 'Brand', 'SKU_Tier', 'SKU_Focus_Notes'],
+        'month_columns': True,
+        'infer_other': True
+    },
+    "Forecast_2026_Reseller": {
+        'string': ['SKU_ID', 'Product_Name', 'Brand', 'SKU_Tier', 'SKU_Focus_Notes'],
+        'month_columns': True,
+        'infer_other': True
+    },
+    "BS_Fullfilment_Cost": {
+        'string': ['Month'],
+        'numeric': ['Total_Order(BS)', 'GMV_(Fullfil_By_BS)', 'GMV_Total_(MP)', 'Total_Cost', 'BSA', '%Cost'],
+        'infer_other': True
+    }
+}
 
-@st.cache_data(ttl=300, max_entries=3, show_spinner=False)
-def load_and_process_data(_client):
+def normalize_column_name(col):
+    return str(col).strip().replace(' ', '_')
+
+NUMERIC_PATTERN = r'^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$'
+INTEGER_PATTERN = r'^[-+]?\d+$'
+LONG_INTEGER_PATTERN = r'^\s*[-+]?\d{19,}\s*$'
+
+def parse_numeric_column(values, strip_pattern=r'[,%\s]'):
     """
-    Load semua data termasuk sheet baru: BS_Fullfilment_Cost
+    Kolom string -> numeric pakai kernel pyarrow (tanpa loop Python per sel).
+    Semua sel integer -> int64 (float64 jika melebihi int64), selain itu float64; sel kosong / bukan angka -> NaN
+    """
+    arr = pc.replace_substring_regex(pa.array(values, type=pa.string()), strip_pattern, '')
+    if len(arr) and pc.all(pc.match_substring_regex(arr, INTEGER_PATTERN)).as_py():
+        try:
+            return pd.Series(pc.cast(arr, pa.int64()).to_numpy())
+        except pa.ArrowInvalid:
+            # Integer > 19 digit (barcode / ID panjang) tidak muat di int64
+            pass
+    arr = pc.if_else(pc.match_substring_regex(arr, NUMERIC_PATTERN), arr, pa.scalar(None, pa.string()))
+    return pd.Series(pc.cast(arr, pa.float64()).to_numpy(zero_copy_only=False))
+
+def infer_column(values):
+    """
+    Numeric jika semua sel yang terisi adalah angka, selain itu tetap string (seperti numericise get_all_records:
+    hanya spasi di awal / akhir yang diabaikan, "1,2" tetap teks). Integer panjang (>= 19 digit, mis. barcode) tetap string
+    """
+    series = pd.Series(values, dtype=object)
+    filled = series != ''
+    if not filled.any():
+        return series
+    if pc.any(pc.match_substring_regex(pa.array(series, type=pa.string()), LONG_INTEGER_PATTERN)).as_py():
+        return series
+    numeric = parse_numeric_column(series, strip_pattern=r'^\s+|\s+$')
+    if numeric[filled].notna().all():
+        return numeric if filled.all() else numeric.astype(object).where(filled, '')
+    return series
+
+def grid_to_frame(grid, schema, include=None):
     """
+    Raw value grid (list of rows string dari Sheets API / file) -> DataFrame dengan tipe kolom sesuai schema.
+    Satu pass per kolom, tanpa dict per baris seperti get_all_records.
+    include: set header (sesudah strip) yang di-parse, default semua kolom
+    """
+    if not grid or len(grid) < 2 or not any(grid):
+        return pd.DataFrame()
+
+    rows = fill_gaps(grid)
+    headers = [str(h).strip() for h in rows[0]] if schema.get('strip_headers') else rows[0]
+
+    if not schema.get('drop_blank_headers'):
+        duplicates = [k for k in dict.fromkeys(headers) if headers.count(k) > 1]
+        if duplicates:
+            raise gspread.exceptions.GSpreadException(f"the header row in the worksheet contains duplicates: {duplicates}")
+
+    columns = list(zip(*rows[1:]))
+    string_cols = set(schema.get('string', []))
+    numeric_cols = set(schema.get('numeric', []))
+
+    frame = {}
+    for header, values in zip(headers, columns):
+        if schema.get('drop_blank_headers') and header == '':
+            continue
+        if include is not None and str(header).strip() not in include:
+            continue
+        name = normalize_column_name(header)
+        if name in string_cols:
+            frame[header] = pd.Series(values, dtype=object)
+        elif name in numeric_cols or (schema.get('month_columns') and any(m in name.upper() for m in MONTH_KEYS)):
+            frame[header] = parse_numeric_column(values)
+        elif schema.get('infer_other'):
+            frame[header] = infer_column(values)
+        else:
+            frame[header] = pd.Series(values, dtype=object)
+
+    return pd.DataFrame(frame)
+
+def sheet_frame(grids, sheet_name):
+    """Raw grid sebuah sheet -> DataFrame typed (raise jika sheet tidak ditemukan)"""
+    return grid_to_frame(sheet_grid(grids, sheet_name), SHEET_SCHEMAS[sheet_name])
+
+def get_month_columns(columns):
+    """Kolom yang namanya mengandung nama bulan (JAN..DEC)"""
+    return [c for c in columns if any(m in c.upper() for m in MONTH_KEYS)]
+
+# --- TRANSFORM PER SHEET (input: DataFrame mentah dari grid) ---
+
+def transform_product_master(df_product):
+    """Product_Master: normalisasi kolom, harga numerik, split active SKUs"""
+    df_product.columns = [col.strip().replace(' ', '_') for col in df_product.columns]
     
-    gsheet_url = st.secrets["gsheet_url"]
-    data = {}
+    for col in ['Floor_Price', 'Net_Order_Price']:
+        if col in df_product.columns:
+            df_product[col] = pd.to_numeric(df_product[col], errors='coerce').fillna(0)
+    
+    if 'Status' not in df_product.columns: df_product['Status'] = 'Active'
+    df_product_active = df_product[df_product['Status'].str.upper() == 'ACTIVE'].copy()
+    
+    return {'product': df_product, 'product_active': df_product_active, 'product_dim': build_product_dimension(df_product)}
 
-    # --- HELPER: Baca Sheet Manual ---
-    def safe_read_stock_sheet(sheet_name):
-        try:
-            ws = _client.open_by_url(gsheet_url).worksheet(sheet_name)
-            raw_data = ws.get_all_values()
-            if len(raw_data) < 2: return pd.DataFrame()
-            headers = [str(h).strip() for h in raw_data[0]]
-            df = pd.DataFrame(raw_data[1:], columns=headers)
-            df = df.loc[:, df.columns != '']
-            return df
-        except: return pd.DataFrame()
+def transform_sales(df_sales_raw, product_dim, active_skus):
+    """Sales: wide (kolom bulan) -> long, hanya active SKUs"""
+    df_sales_raw.columns = [col.strip() for col in df_sales_raw.columns]
+    month_cols = get_month_columns(df_sales_raw.columns)
+    if month_cols and 'SKU_ID' in df_sales_raw.columns:
+        id_cols = ['SKU_ID']
+        for col in ['SKU_Name', 'Product_Name', 'Brand', 'SKU_Tier']:
+            if col in df_sales_raw.columns: id_cols.append(col)
+        df_sales_long = df_sales_raw.melt(id_vars=id_cols, value_vars=month_cols, var_name='Month_Label', value_name='Sales_Qty')
+        df_sales_long['Sales_Qty'] = pd.to_numeric(df_sales_long['Sales_Qty'], errors='coerce').fillna(0)
+        df_sales_long['Month'] = parse_month_labels(df_sales_long['Month_Label'])
+        df_sales_long = df_sales_long[df_sales_long['SKU_ID'].isin(active_skus)]
+        df_sales_long = add_product_info_to_data(df_sales_long, product_dim)
+        return {'sales': df_sales_long.sort_values('Month', kind='stable', ignore_index=True)}
+    return {}
+
+def transform_rofo(df_rofo_raw, product_dim, active_skus):
+    """Rofo: wide (kolom bulan) -> long Forecast_Qty, hanya active SKUs"""
+    df_rofo_raw.columns = [col.strip() for col in df_rofo_raw.columns]
+    month_cols_rofo = get_month_columns(df_rofo_raw.columns)
+    if month_cols_rofo:
+        id_cols_rofo = ['SKU_ID']
+        for col in ['Product_Name', 'Brand']:
+            if col in df_rofo_raw.columns: id_cols_rofo.append(col)
+        df_rofo_long = df_rofo_raw.melt(id_vars=id_cols_rofo, value_vars=month_cols_rofo, var_name='Month_Label', value_name='Forecast_Qty')
+        df_rofo_long['Forecast_Qty'] = pd.to_numeric(df_rofo_long['Forecast_Qty'], errors='coerce').fillna(0)
+        df_rofo_long['Month'] = parse_month_labels(df_rofo_long['Month_Label'])
+        df_rofo_long = df_rofo_long[df_rofo_long['SKU_ID'].isin(active_skus)]
+        df_rofo_long = add_product_info_to_data(df_rofo_long, product_dim)
+        return {'forecast': df_rofo_long}
+    return {}
+
+def transform_po(df_po_raw, product_dim, active_skus):
+    """PO: wide (kolom bulan) -> long PO_Qty, hanya active SKUs"""
+    df_po_raw.columns = [col.strip() for col in df_po_raw.columns]
+    month_cols_po = get_month_columns(df_po_raw.columns)
+    if month_cols_po and 'SKU_ID' in df_po_raw.columns:
+        df_po_long = df_po_raw.melt(id_vars=['SKU_ID'], value_vars=month_cols_po, var_name='Month_Label', value_name='PO_Qty')
+        df_po_long['PO_Qty'] = pd.to_numeric(df_po_long['PO_Qty'], errors='coerce').fillna(0)
+        df_po_long['Month'] = parse_month_labels(df_po_long['Month_Label'])
+        df_po_long = df_po_long[df_po_long['SKU_ID'].isin(active_skus)]
+        df_po_long = add_product_info_to_data(df_po_long, product_dim)
+        return {'po': df_po_long}
+    return {}
+
+def transform_stock(df_stock_raw, product_dim):
+    """Stock_Onhand: rename kolom, Stock_Qty numerik, tambah harga"""
+    if not df_stock_raw.empty:
+        col_mapping = {
+            'SKU_ID': 'SKU_ID', 'Qty_Available': 'Stock_Qty', 'Product_Code': 'Anchanto_Code',
+            'Stock_Category': 'Stock_Category', 'Expiry_Date': 'Expiry_Date', 'Product_Name': 'Product_Name'
+        }
+        if 'SKU_ID' in df_stock_raw.columns and 'Qty_Available' in df_stock_raw.columns:
+            cols_to_use = [c for c in col_mapping.keys() if c in df_stock_raw.columns]
+            df_stock = df_stock_raw[cols_to_use].copy()
+            df_stock = df_stock.rename(columns=col_mapping)
+            df_stock['Stock_Qty'] = pd.to_numeric(df_stock['Stock_Qty'], errors='coerce').fillna(0)
+            df_stock['SKU_ID'] = df_stock['SKU_ID'].astype(str).str.strip()
+            if 'Floor_Price' in product_dim.columns:
+                df_stock = add_product_info_to_data(df_stock, product_dim, columns=['Floor_Price', 'Net_Order_Price'])
+            return {'stock': df_stock}
+    return {'stock': pd.DataFrame(columns=['SKU_ID', 'Stock_Qty'])}
+
+def transform_ecomm_forecast(df_ecomm_raw):
+    """Forecast_2026_Ecomm: kolom bulan numerik (format wide dipertahankan)"""
+    df_ecomm_raw.columns = [col.strip().replace(' ', '_') for col in df_ecomm_raw.columns]
+    month_cols_ecomm = get_month_columns(df_ecomm_raw.columns)
+    for col in month_cols_ecomm:
+        df_ecomm_raw[col] = pd.to_numeric(df_ecomm_raw[col], errors='coerce').fillna(0)
+    return {'ecomm_forecast': df_ecomm_raw, 'ecomm_forecast_month_cols': month_cols_ecomm}
+
+def transform_reseller_forecast(df_reseller_raw):
+    """Forecast_2026_Reseller: kolom bulan numerik + split historical vs forecast 2026"""
+    df_reseller_raw.columns = [col.strip().replace(' ', '_') for col in df_reseller_raw.columns]
+    all_month_cols_res = get_month_columns(df_reseller_raw.columns)
+    for col in all_month_cols_res:
+        df_reseller_raw[col] = pd.to_numeric(df_reseller_raw[col], errors='coerce').fillna(0)
+    
+    forecast_start_date = datetime(2026, 1, 1)
+    def is_forecast_month(month_str):
+        month_date = parse_month_label(month_str, strict=True)
+        return month_date is not None and month_date >= forecast_start_date
+    
+    hist_cols = [c for c in all_month_cols_res if not is_forecast_month(c)]
+    fcst_cols = [c for c in all_month_cols_res if is_forecast_month(c)]
+    return {
+        'reseller_forecast': df_reseller_raw,
+        'reseller_all_month_cols': all_month_cols_res,
+        'reseller_historical_cols': hist_cols,
+        'reseller_forecast_cols': fcst_cols
+    }
+
+def transform_fulfillment_cost(df_bs):
+    """BS_Fullfilment_Cost: bersihkan angka (koma & persen), parse bulan"""
+    # Cleaning Headers & Data
+    # Hapus spasi di nama kolom
+    df_bs.columns = [c.strip() for c in df_bs.columns]
+    
+    # List kolom angka yang perlu dibersihkan
+    numeric_cols = ['Total Order(BS)', 'GMV (Fullfil By BS)', 'GMV Total (MP)', 'Total Cost', 'BSA', '%Cost']
+    
+    for col in numeric_cols:
+        if col in df_bs.columns:
+            # Kolom sudah numeric dari SHEET_SCHEMAS; hanya kolom yang masih object (hapus koma & persen) di-convert
+            if df_bs[col].dtype == object:
+                df_bs[col] = pd.to_numeric(df_bs[col].astype(str).str.replace(r'[,%]', '', regex=True), errors='coerce')
+            df_bs[col] = df_bs[col].fillna(0)
+    
+    # Convert Percentages (karena 3.14% jadi 3.14, mungkin perlu dibagi 100 utk kalkulasi, tapi utk display biar saja)
+    # Kita tandai kolom ini
+    
+    # Parse Date (Apr-25)
+    df_bs['Month_Date'] = pd.to_datetime(df_bs['Month'], format='%b-%y', errors='coerce')
+    df_bs = df_bs.sort_values('Month_Date')
+    
+    return {'fulfillment': df_bs}
+
+# --- INCREMENTAL PER BULAN (SALES / ROFO / PO) ---
+# Tiap bulan planner menambah 1 kolom bulan. Kolom bulan yang isinya sama dengan load sebelumnya tidak di-parse
+# dan di-melt ulang: baris long frame bulan tsb diambil dari hasil lama, hanya bulan baru / berubah yang di-build
+MONTHLY_SHEETS = {
+    "Sales": ('sales', transform_sales),
+    "Rofo": ('forecast', transform_rofo),
+    "PO": ('po', transform_po)
+}
+
+def grid_column_fingerprints(grid):
+    """SHA-1 isi tiap kolom raw grid -> {header (strip): fingerprint}"""
+    if not grid or len(grid) < 2:
+        return {}
+    rows = fill_gaps(grid)
+    return {
+        str(header).strip(): hashlib.sha1('\x1f'.join(values).encode('utf-8')).hexdigest()
+        for header, values in zip(rows[0], zip(*rows[1:]))
+    }
+
+def transform_monthly_sheet(sheet_name, grids, product_dim, active_skus, previous=None):
+    """
+    Sales / Rofo / PO dengan reuse per bulan. previous: data load sebelumnya ({} jika Product_Master berubah).
+    Bulan di-reuse hanya jika semua kolom non-bulan (SKU_ID, nama, dll -> urutan baris sama) tidak berubah;
+    hasil sama persis dengan full build (urut per kolom bulan, dalam bulan urutan baris sheet)
+    """
+    output_key, transform = MONTHLY_SHEETS[sheet_name]
+    fingerprint_key = f"{output_key}_column_fingerprints"
+    grid = sheet_grid(grids, sheet_name)
+    fingerprints = grid_column_fingerprints(grid)
+    
+    previous = previous or {}
+    previous_fingerprints = previous.get(fingerprint_key) or {}
+    previous_frame = previous.get(output_key)
+    month_cols = get_month_columns(fingerprints)
+    month_set = set(month_cols)
+    id_cols = [c for c in fingerprints if c not in month_set]
+    
+    reuse_months = []
+    if isinstance(previous_frame, pd.DataFrame) and 'Month_Label' in previous_frame.columns:
+        previous_month_cols = set(get_month_columns(previous_fingerprints))
+        previous_id_cols = [c for c in previous_fingerprints if c not in previous_month_cols]
+        if id_cols == previous_id_cols and all(fingerprints[c] == previous_fingerprints[c] for c in id_cols):
+            reuse_months = [c for c in month_cols if fingerprints[c] == previous_fingerprints.get(c)]
+    
+    if not reuse_months:
+        result = transform(sheet_frame(grids, sheet_name), product_dim, active_skus)
+    else:
+        reuse_set = set(reuse_months)
+        build_months = [c for c in month_cols if c not in reuse_set]
+        reused = previous_frame['Month_Label'].isin(reuse_months).to_numpy()
+        frames = [previous_frame if reused.all() else previous_frame[reused]]
+        if build_months:
+            df_raw = grid_to_frame(grid, SHEET_SCHEMAS[sheet_name], include=set(id_cols + build_months))
+            frames.append(transform(df_raw, product_dim, active_skus).get(output_key))
+        combined = pd.concat([f for f in frames if f is not None], ignore_index=True)
+        
+        # Urutan sama dengan melt: per kolom bulan (stable -> dalam bulan tetap urutan baris sheet).
+        # Kasus umum (bulan baru di kolom paling kanan) sudah urut -> tanpa reorder
+        month_order = pd.Categorical(combined['Month_Label'].astype(object), categories=month_cols).codes
+        if (np.diff(month_order) < 0).any():
+            combined = combined.take(np.argsort(month_order, kind='stable'))
+            combined.index = pd.RangeIndex(len(combined))
+        if output_key == 'sales' and not combined['Month'].is_monotonic_increasing:
+            combined = combined.sort_values('Month', kind='stable', ignore_index=True)
+        result = {output_key: combined}
+    
+    if output_key in result:
+        result[fingerprint_key] = fingerprints
+    return result
+
+# Key di data dict yang dihasilkan tiap sheet (untuk reuse saat sheet tidak berubah)
+SHEET_OUTPUT_KEYS = {
+    "Product_Master": ['product', 'product_active', 'product_dim'],
+    "Sales": ['sales', 'sales_column_fingerprints'],
+    "Rofo": ['forecast', 'forecast_column_fingerprints'],
+    "PO": ['po', 'po_column_fingerprints'],
+    "Stock_Onhand": ['stock'],
+    "Forecast_2026_Ecomm": ['ecomm_forecast', 'ecomm_forecast_month_cols'],
+    "Forecast_2026_Reseller": ['reseller_forecast', 'reseller_all_month_cols', 'reseller_historical_cols', 'reseller_forecast_cols'],
+    "BS_Fullfilment_Cost": ['fulfillment']
+}
+
+# Transform sheet ini memakai Product_Master (active SKUs / harga)
+PRODUCT_DEPENDENT_SHEETS = {"Sales", "Rofo", "PO", "Stock_Onhand"}
+
+def grid_fingerprint(grid):
+    """SHA-1 dari raw value grid; None jika sheet tidak ada / gagal diambil"""
+    if not isinstance(grid, list):
+        return None
+    return hashlib.sha1(json.dumps(grid, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+def sheet_fingerprints(grids):
+    return {name: grid_fingerprint(grid) for name, grid in grids.items()}
+
+def fingerprints_content_hash(fingerprints):
+    """Hash gabungan semua fingerprint sheet -> kunci snapshot"""
+    return hashlib.sha1(json.dumps(sorted(fingerprints.items()), default=str).encode('utf-8')).hexdigest()
 
+def process_sheet_grids(grids, fingerprints=None, previous=None):
+    """
+    Jalankan transform per sheet atas raw grids hasil fetch.
+    Sheet yang fingerprint-nya sama dengan load sebelumnya (previous) tidak di-parse ulang, hasilnya dipakai lagi.
+    Pesan warning/error dikumpulkan di data['load_messages'] (bisa jalan di background thread)
+    """
+    fingerprints = fingerprints if fingerprints is not None else sheet_fingerprints(grids)
+    previous = previous or {}
+    previous_fingerprints = previous.get('sheet_fingerprints', {})
+    data = {'load_messages': [], 'sheet_fingerprints': {}}
+    
+    def run_step(sheet_name, build):
+        """Reuse hasil lama jika sheet (dan Product_Master untuk sheet turunan) tidak berubah, selain itu build()"""
+        fingerprint = fingerprints.get(sheet_name)
+        unchanged = fingerprint is not None and previous_fingerprints.get(sheet_name) == fingerprint
+        if unchanged and sheet_name in PRODUCT_DEPENDENT_SHEETS:
+            unchanged = data['sheet_fingerprints'].get("Product_Master") == previous_fingerprints.get("Product_Master")
+        
+        if unchanged:
+            data.update({k: previous[k] for k in SHEET_OUTPUT_KEYS[sheet_name] if k in previous})
+        else:
+            data.update(build())
+        
+        # Fingerprint hanya dicatat jika step sukses -> sheet yang gagal selalu diproses ulang
+        if fingerprint is not None:
+            data['sheet_fingerprints'][sheet_name] = fingerprint
+    
     try:
         # 1. PRODUCT MASTER
-        ws_prod = _client.open_by_url(gsheet_url).worksheet("Product_Master")
-        df_product = pd.DataFrame(ws_prod.get_all_records())
-        df_product.columns = [col.strip().replace(' ', '_') for col in df_product.columns]
-        
-        for col in ['Floor_Price', 'Net_Order_Price']:
-            if col in df_product.columns:
-                df_product[col] = pd.to_numeric(df_product[col], errors='coerce').fillna(0)
-        
-        if 'Status' not in df_product.columns: df_product['Status'] = 'Active'
-        df_product_active = df_product[df_product['Status'].str.upper() == 'ACTIVE'].copy()
-        active_skus = df_product_active['SKU_ID'].tolist()
-        
-        data['product'] = df_product
-        data['product_active'] = df_product_active
+        run_step("Product_Master", lambda: transform_product_master(sheet_frame(grids, "Product_Master")))
+        product_dim = data.setdefault('product_dim', build_product_dimension(data['product']))
+        active_skus = data['product_active']['SKU_ID'].tolist()
+
+        # Bulan lama Sales / Rofo / PO hanya di-reuse jika Product_Master sama (product info & active SKUs)
+        product_unchanged = data['sheet_fingerprints'].get("Product_Master") == previous_fingerprints.get("Product_Master")
+        monthly_previous = previous if product_unchanged else {}
 
         # 2. SALES DATA
-        ws_sales = _client.open_by_url(gsheet_url).worksheet("Sales")
-        df_sales_raw = pd.DataFrame(ws_sales.get_all_records())
-        df_sales_raw.columns = [col.strip() for col in df_sales_raw.columns]
-        month_cols = [c for c in df_sales_raw.columns if any(m in c.upper() for m in ['JAN','FEB','MAR','APR','MAY','JUN','JUL','AUG','SEP','OCT','NOV','DEC'])]
-        if month_cols and 'SKU_ID' in df_sales_raw.columns:
-            id_cols = ['SKU_ID']
-            for col in ['SKU_Name', 'Product_Name', 'Brand', 'SKU_Tier']:
-                if col in df_sales_raw.columns: id_cols.append(col)
-            df_sales_long = df_sales_raw.melt(id_vars=id_cols, value_vars=month_cols, var_name='Month_Label', value_name='Sales_Qty')
-            df_sales_long['Sales_Qty'] = pd.to_numeric(df_sales_long['Sales_Qty'], errors='coerce').fillna(0)
-            df_sales_long['Month'] = df_sales_long['Month_Label'].apply(validate_month_format)
-            df_sales_long = df_sales_long[df_sales_long['SKU_ID'].isin(active_skus)]
-            df_sales_long = add_product_info_to_data(df_sales_long, df_product)
-            data['sales'] = df_sales_long.sort_values('Month')
+        run_step("Sales", lambda: transform_monthly_sheet("Sales", grids, product_dim, active_skus, monthly_previous))
 
         # 3. ROFO DATA
-        ws_rofo = _client.open_by_url(gsheet_url).worksheet("Rofo")
-        df_rofo_raw = pd.DataFrame(ws_rofo.get_all_records())
-        df_rofo_raw.columns = [col.strip() for col in df_rofo_raw.columns]
-        month_cols_rofo = [c for c in df_rofo_raw.columns if any(m in c.upper() for m in ['JAN','FEB','MAR','APR','MAY','JUN','JUL','AUG','SEP','OCT','NOV','DEC'])]
-        if month_cols_rofo:
-            id_cols_rofo = ['SKU_ID']
-            for col in ['Product_Name', 'Brand']:
-                if col in df_rofo_raw.columns: id_cols_rofo.append(col)
-            df_rofo_long = df_rofo_raw.melt(id_vars=id_cols_rofo, value_vars=month_cols_rofo, var_name='Month_Label', value_name='Forecast_Qty')
-            df_rofo_long['Forecast_Qty'] = pd.to_numeric(df_rofo_long['Forecast_Qty'], errors='coerce').fillna(0)
-            df_rofo_long['Month'] = df_rofo_long['Month_Label'].apply(validate_month_format)
-            df_rofo_long = df_rofo_long[df_rofo_long['SKU_ID'].isin(active_skus)]
-            df_rofo_long = add_product_info_to_data(df_rofo_long, df_product)
-            data['forecast'] = df_rofo_long
+        run_step("Rofo", lambda: transform_monthly_sheet("Rofo", grids, product_dim, active_skus, monthly_previous))
 
         # 4. PO DATA
-        ws_po = _client.open_by_url(gsheet_url).worksheet("PO")
-        df_po_raw = pd.DataFrame(ws_po.get_all_records())
-        df_po_raw.columns = [col.strip() for col in df_po_raw.columns]
-        month_cols_po = [c for c in df_po_raw.columns if any(m in c.upper() for m in ['JAN','FEB','MAR','APR','MAY','JUN','JUL','AUG','SEP','OCT','NOV','DEC'])]
-        if month_cols_po and 'SKU_ID' in df_po_raw.columns:
-            df_po_long = df_po_raw.melt(id_vars=['SKU_ID'], value_vars=month_cols_po, var_name='Month_Label', value_name='PO_Qty')
-            df_po_long['PO_Qty'] = pd.to_numeric(df_po_long['PO_Qty'], errors='coerce').fillna(0)
-            df_po_long['Month'] = df_po_long['Month_Label'].apply(validate_month_format)
-            df_po_long = df_po_long[df_po_long['SKU_ID'].isin(active_skus)]
-            df_po_long = add_product_info_to_data(df_po_long, df_product)
-            data['po'] = df_po_long
-
-        # 5. STOCK DATA
-        df_stock_raw = safe_read_stock_sheet("Stock_Onhand")
-        if not df_stock_raw.empty:
-            col_mapping = {
-                'SKU_ID': 'SKU_ID', 'Qty_Available': 'Stock_Qty', 'Product_Code': 'Anchanto_Code',
-                'Stock_Category': 'Stock_Category', 'Expiry_Date': 'Expiry_Date', 'Product_Name': 'Product_Name'
-            }
-            if 'SKU_ID' in df_stock_raw.columns and 'Qty_Available' in df_stock_raw.columns:
-                cols_to_use = [c for c in col_mapping.keys() if c in df_stock_raw.columns]
-                df_stock = df_stock_raw[cols_to_use].copy()
-                df_stock = df_stock.rename(columns=col_mapping)
-                df_stock['Stock_Qty'] = pd.to_numeric(df_stock['Stock_Qty'], errors='coerce').fillna(0)
-                df_stock['SKU_ID'] = df_stock['SKU_ID'].astype(str).str.strip()
-                if 'Floor_Price' in df_product.columns:
-                    df_stock = pd.merge(df_stock, df_product[['SKU_ID', 'Floor_Price', 'Net_Order_Price']], on='SKU_ID', how='left')
-                data['stock'] = df_stock
-            else:
-                data['stock'] = pd.DataFrame(columns=['SKU_ID', 'Stock_Qty'])
-        else:
-            data['stock'] = pd.DataFrame(columns=['SKU_ID', 'Stock_Qty'])
+        run_step("PO", lambda: transform_monthly_sheet("PO", grids, product_dim, active_skus, monthly_previous))
+
+        # 5. STOCK DATA (sheet tidak ada / gagal dibaca -> stock kosong)
+        def build_stock():
+            try:
+                df_stock_raw = sheet_frame(grids, "Stock_Onhand")
+            except: df_stock_raw = pd.DataFrame()
+            return transform_stock(df_stock_raw, product_dim)
+        run_step("Stock_Onhand", build_stock)
 
         # 6. FORECAST 2026 ECOMM
         try:
-            ws_ecomm = _client.open_by_url(gsheet_url).worksheet("Forecast_2026_Ecomm")
-            df_ecomm_raw = pd.DataFrame(ws_ecomm.get_all_records())
-            df_ecomm_raw.columns = [col.strip().replace(' ', '_') for col in df_ecomm_raw.columns]
-            month_cols_ecomm = [c for c in df_ecomm_raw.columns if any(m in c.upper() for m in ['JAN','FEB','MAR','APR','MAY','JUN','JUL','AUG','SEP','OCT','NOV','DEC'])]
-            for col in month_cols_ecomm:
-                df_ecomm_raw[col] = pd.to_numeric(df_ecomm_raw[col], errors='coerce').fillna(0)
-            data['ecomm_forecast'] = df_ecomm_raw
-            data['ecomm_forecast_month_cols'] = month_cols_ecomm
+            run_step("Forecast_2026_Ecomm", lambda: transform_ecomm_forecast(sheet_frame(grids, "Forecast_2026_Ecomm")))
         except:
             data['ecomm_forecast'] = pd.DataFrame()
             data['ecomm_forecast_month_cols'] = []
         
         # 7. FORECAST 2026 RESELLER
         try:
-            ws_reseller = _client.open_by_url(gsheet_url).worksheet("Forecast_2026_Reseller")
-            df_reseller_raw = pd.DataFrame(ws_reseller.get_all_records())
-            df_reseller_raw.columns = [col.strip().replace(' ', '_') for col in df_reseller_raw.columns]
-            all_month_cols_res = [c for c in df_reseller_raw.columns if any(m in c.upper() for m in ['JAN','FEB','MAR','APR','MAY','JUN','JUL','AUG','SEP','OCT','NOV','DEC'])]
-            for col in all_month_cols_res:
-                df_reseller_raw[col] = pd.to_numeric(df_reseller_raw[col], errors='coerce').fillna(0)
-            
-            forecast_start_date = datetime(2026, 1, 1)
-            def is_forecast_month(month_str):
-                try:
-                    month_str = str(month_str).upper().replace('_', ' ').replace('-', ' ')
-                    if ' ' in month_str:
-                        month_part, year_part = month_str.split(' ')
-                        month_num = datetime.strptime(month_part[:3], '%b').month
-                        year_clean = ''.join(filter(str.isdigit, year_part))
-                        year = 2000 + int(year_clean) if len(year_clean) == 2 else int(year_clean)
-                        return datetime(year, month_num, 1) >= forecast_start_date
-                except: return False
-                return False
-            
-            hist_cols = [c for c in all_month_cols_res if not is_forecast_month(c)]
-            fcst_cols = [c for c in all_month_cols_res if is_forecast_month(c)]
-            data['reseller_forecast'] = df_reseller_raw
-            data['reseller_all_month_cols'] = all_month_cols_res
-            data['reseller_historical_cols'] = hist_cols
-            data['reseller_forecast_cols'] = fcst_cols
+            run_step("Forecast_2026_Reseller", lambda: transform_reseller_forecast(sheet_frame(grids, "Forecast_2026_Reseller")))
         except:
             data['reseller_forecast'] = pd.DataFrame()
             data['reseller_all_month_cols'] = []
@@ -594,50 +1093,796 @@ def load_and_process_data(_client):
         # 8. BS FULLFILMENT COST (NEW SHEET)
         # ==============================================================================
         try:
-            ws_bs = _client.open_by_url(gsheet_url).worksheet("BS_Fullfilment_Cost")
-            df_bs = pd.DataFrame(ws_bs.get_all_records())
-            
-            # Cleaning Headers & Data
-            # Hapus spasi di nama kolom
-            df_bs.columns = [c.strip() for c in df_bs.columns]
-            
-            # Helper untuk bersihkan angka (hapus koma dan persen)
-            def clean_currency(x):
-                if isinstance(x, str):
-                    return pd.to_numeric(x.replace(',', '').replace('%', ''), errors='coerce')
-                return x
-
-            # List kolom angka yang perlu dibersihkan
-            numeric_cols = ['Total Order(BS)', 'GMV (Fullfil By BS)', 'GMV Total (MP)', 'Total Cost', 'BSA', '%Cost']
-            
-            for col in numeric_cols:
-                if col in df_bs.columns:
-                    df_bs[col] = df_bs[col].apply(clean_currency).fillna(0)
-            
-            # Convert Percentages (karena 3.14% jadi 3.14, mungkin perlu dibagi 100 utk kalkulasi, tapi utk display biar saja)
-            # Kita tandai kolom ini
-            
-            # Parse Date (Apr-25)
-            df_bs['Month_Date'] = pd.to_datetime(df_bs['Month'], format='%b-%y', errors='coerce')
-            df_bs = df_bs.sort_values('Month_Date')
-            
-            data['fulfillment'] = df_bs
-            
+            run_step("BS_Fullfilment_Cost", lambda: transform_fulfillment_cost(sheet_frame(grids, "BS_Fullfilment_Cost")))
         except Exception as e:
-            st.warning(f"Gagal load BS_Fullfilment_Cost: {e}")
+            data['load_messages'].append(('warning', f"Gagal load BS_Fullfilment_Cost: {e}"))
             data['fulfillment'] = pd.DataFrame()
 
         return data
         
     except Exception as e:
-        st.error(f"❌ Error loading data: {str(e)}")
-        return {}
+        return {'load_messages': [('error', f"❌ Error loading data: {str(e)}")]}
+
+# --- COMPACTION (CATEGORICAL + DOWNCAST) ---
+# Kolom teks yang berulang di setiap baris long format -> categorical.
+# Satu dictionary per kolom dipakai bersama semua frame (merge / concat antar frame tetap categorical)
+CATEGORICAL_COLUMNS = ['SKU_ID', 'Brand', 'SKU_Tier', 'Status', 'Product_Name', 'Stock_Category', 'Month_Label']
+QUANTITY_COLUMNS = ['Sales_Qty', 'Forecast_Qty', 'PO_Qty', 'Stock_Qty']
+# Frame wide: kolom bulan juga qty
+WIDE_QUANTITY_COLUMNS = {'ecomm_forecast': 'ecomm_forecast_month_cols', 'reseller_forecast': 'reseller_all_month_cols'}
+
+def frame_memory_bytes(df, categoricals=None):
+    """
+    Bytes frame: deep scan hanya kolom object / string. Kolom numeric, int32 & categorical cukup ukuran buffer
+    (categorical: codes + array categories; isi dictionary dipakai bersama semua frame).
+    categoricals: {kolom object: Categorical hasil konversinya} -> ukuran string = jumlah per code x ukuran category,
+    tanpa scan objek per baris
+    """
+    categoricals = categoricals or {}
+    usage = df.memory_usage(index=True, deep=False)
+    if df.index.dtype == object:
+        usage['Index'] = df.index.memory_usage(deep=True)
+    text_cols = [col for col, dtype in df.dtypes.items()
+                 if (dtype == object or isinstance(dtype, pd.StringDtype)) and col not in categoricals]
+    if text_cols:
+        usage[text_cols] = df[text_cols].memory_usage(index=False, deep=True)
+    for col, categorical in categoricals.items():
+        sizes = np.fromiter(map(sys.getsizeof, categorical.categories), dtype=np.int64, count=len(categorical.categories))
+        codes = categorical.codes
+        valid = codes >= 0
+        usage[col] += int(np.bincount(codes[valid], minlength=len(sizes)) @ sizes) + int((~valid).sum()) * sys.getsizeof(np.nan)
+    return int(usage.sum())
+
+def downcast_quantity(series):
+    """
+    Qty bulat tanpa NaN -> int32, selain itu tidak diubah.
+    Sengaja tidak sampai int8/int16: qty dijumlah / dikali di banyak tempat dan numpy tidak cek overflow
+    """
+    if series.dtype == np.int32 or not pd.api.types.is_numeric_dtype(series) or series.empty or series.isna().any():
+        return series
+    values = series.to_numpy()
+    if np.issubdtype(values.dtype, np.floating) and not np.all(np.mod(values, 1) == 0):
+        return series
+    if values.min() < np.iinfo(np.int32).min or values.max() > np.iinfo(np.int32).max:
+        return series
+    return series.astype(np.int32)
+
+def build_category_dictionaries(frames):
+    """Union nilai per kolom categorical dari semua frame (urut alfabet, sama dengan urutan sort kolom string)"""
+    dictionaries = {}
+    for col in CATEGORICAL_COLUMNS:
+        values = [np.asarray(pd.Series(df[col].unique()).dropna(), dtype=object) for df in frames.values() if col in df.columns]
+        if not values:
+            continue
+        categories = pd.Index(pd.unique(np.concatenate(values)))
+        try:
+            categories = categories.sort_values()
+        except TypeError:
+            pass
+        dictionaries[col] = categories
+    return dictionaries
+
+def compact_dataset(data, previous=None):
+    """
+    Compaction di akhir load: kolom teks -> categorical (dictionary bersama), qty bulat -> int32.
+    Kolom yang berubah dipasang ke salinan baru (frame hasil load sebelumnya bisa sedang dibaca session lain);
+    frame yang sudah compact (di-reuse dari previous, dictionary sama) dipakai apa adanya.
+    Return laporan memory per dataset: [{'Dataset', 'Rows', 'Before_Bytes', 'After_Bytes'}];
+    entry frame yang di-reuse diteruskan dari previous['memory_report'], hanya frame yang dibangun ulang diukur
+    """
+    frames = {k: v for k, v in data.items() if isinstance(v, pd.DataFrame) and not v.empty}
+    dictionaries = build_category_dictionaries(frames)
+    previous = previous or {}
+    previous_report = {entry['Dataset']: entry for entry in previous.get('memory_report', [])}
+    report = []
+    
+    for key, df in frames.items():
+        converted = {}
+        for col, categories in dictionaries.items():
+            if col in df.columns and not (isinstance(df[col].dtype, pd.CategoricalDtype) and df[col].cat.categories.equals(categories)):
+                converted[col] = pd.Categorical(df[col], categories=categories)
+        quantity_cols = [c for c in QUANTITY_COLUMNS if c in df.columns]
+        quantity_cols += [c for c in data.get(WIDE_QUANTITY_COLUMNS.get(key), []) if c in df.columns]
+        for col in quantity_cols:
+            column = df[col]
+            downcast = downcast_quantity(column)
+            if downcast is not column:
+                converted[col] = downcast
+        
+        compacted = df.assign(**converted) if converted else df
+        reused = previous.get(key) is df and key in previous_report
+        object_categoricals = {col: values for col, values in converted.items()
+                               if df[col].dtype == object and isinstance(values, pd.Categorical)}
+        report.append({
+            'Dataset': key,
+            'Rows': len(df),
+            'Before_Bytes': previous_report[key]['Before_Bytes'] if reused else frame_memory_bytes(df, object_categoricals),
+            'After_Bytes': previous_report[key]['After_Bytes'] if reused and compacted is df else frame_memory_bytes(compacted)
+        })
+        data[key] = compacted
+    
+    return report
+
+# --- SKU x MONTH CUBE (SALES / FORECAST / PO) ---
+# Dibangun sekali per dataset (lihat store_dataset). Analytics slice per bulan / per SKU dengan posisi integer,
+# tanpa scan ulang long frame pakai boolean mask df[df['Month'] == month]
+CUBE_MEASURES = {'sales': 'Sales_Qty', 'forecast': 'Forecast_Qty', 'po': 'PO_Qty'}
+
+def build_sku_month_cube(data):
+    """
+    SKU x Month dense cube dari long frame sales / forecast / PO. Return dict:
+    - 'skus': Index SKU_ID (baris), 'months': DatetimeIndex urut (kolom)
+    - 'Sales_Qty' / 'Forecast_Qty' / 'PO_Qty': ndarray float64 [sku, month]; baris duplikat dijumlah, sel tanpa data = 0
+    - 'present': {measure: ndarray bool}, True jika SKU-bulan ada di frame asal (pengganti inner merge per bulan)
+    Array dibuat read-only karena cube dipakai bersama semua session
+    """
+    frames = {}
+    for key, measure in CUBE_MEASURES.items():
+        df = data.get(key)
+        if isinstance(df, pd.DataFrame) and not df.empty and {'SKU_ID', 'Month', measure} <= set(df.columns):
+            frames[measure] = df
+    
+    sku_values = [np.asarray(pd.Series(df['SKU_ID'].unique()).dropna(), dtype=object) for df in frames.values()]
+    skus = pd.Index(pd.unique(np.concatenate(sku_values)) if sku_values else [], dtype=object)
+    month_values = [pd.Series(df['Month'].unique()).dropna() for df in frames.values()]
+    months = pd.DatetimeIndex(sorted(set(pd.concat(month_values))) if month_values else [], dtype='datetime64[ns]')
+    
+    cube = {'skus': skus, 'months': months, 'present': {}}
+    n_cells = len(skus) * len(months)
+    for measure in CUBE_MEASURES.values():
+        values = np.zeros(n_cells)
+        counts = np.zeros(n_cells, dtype=np.int64)
+        df = frames.get(measure)
+        if df is not None and n_cells:
+            rows = skus.get_indexer(df['SKU_ID'])
+            cols = months.get_indexer(df['Month'])
+            valid = (rows >= 0) & (cols >= 0)
+            flat = rows[valid] * len(months) + cols[valid]
+            values = np.bincount(flat, weights=df[measure].to_numpy(dtype=float)[valid], minlength=n_cells)
+            counts = np.bincount(flat, minlength=n_cells)
+        cube[measure] = values.reshape(len(skus), len(months))
+        cube['present'][measure] = (counts > 0).reshape(len(skus), len(months))
+        cube[measure].flags.writeable = False
+        cube['present'][measure].flags.writeable = False
+    return cube
+
+def cube_months(cube, measures=None):
+    """Bulan yang punya data untuk salah satu measure (default: semua measure)"""
+    measures = measures or list(CUBE_MEASURES.values())
+    has_data = np.zeros(len(cube['months']), dtype=bool)
+    for measure in measures:
+        has_data |= cube['present'][measure].any(axis=0)
+    return cube['months'][has_data]
+
+def cube_last_common_month(cube, measures, sku_mask=None):
+    """Bulan terakhir yang punya data untuk SEMUA measure (sku_mask: hanya baris SKU tsb) -> Timestamp atau None"""
+    common = np.ones(len(cube['months']), dtype=bool)
+    for measure in measures:
+        present = cube['present'][measure]
+        common &= (present if sku_mask is None else present[sku_mask]).any(axis=0)
+    months = cube['months'][common]
+    return months[-1] if len(months) else None
+
+def cube_status_mask(cube, product_dim, status='ACTIVE'):
+    """Mask baris SKU cube dengan Status Product_Master tertentu (SKU di luar master -> False); None jika tanpa kolom Status"""
+    if product_dim.empty or 'Status' not in product_dim.columns:
+        return None
+    product_pos = product_dim.index.get_indexer(cube['skus'])
+    statuses = np.asarray(product_dim['Status'], dtype=object).take(np.maximum(product_pos, 0)) if len(product_dim) else np.array([], dtype=object)
+    return (product_pos >= 0) & pd.Series(statuses, dtype=object).str.upper().eq(status).to_numpy()
+
+def cube_month_totals(cube, measure, months=None):
+    """Total qty per bulan -> Series (index = bulan)"""
+    totals = pd.Series(cube[measure].sum(axis=0), index=cube['months'])
+    return totals if months is None else totals.reindex(months, fill_value=0)
+
+def cube_sku_history(cube, sku_id, months):
+    """Qty sales / forecast / PO satu SKU untuk bulan-bulan tertentu -> DataFrame; SKU / bulan tanpa data = 0"""
+    months = pd.DatetimeIndex(months)
+    history = pd.DataFrame({'Month': months})
+    row = cube['skus'].get_indexer([sku_id])[0]
+    cols = cube['months'].get_indexer(months)
+    for measure in CUBE_MEASURES.values():
+        values = np.zeros(len(months))
+        if row >= 0:
+            found = cols >= 0
+            values[found] = cube[measure][row, cols[found]]
+        history[measure] = values
+    return history
+
+# --- SKU x MONTH FACT TABLE ---
+# Satu tabel long (1 baris per SKU-bulan) untuk analytics & tab: qty dari cube, atribut produk,
+# financial per bulan, stock cover per SKU. Dibangun sekali per versi dataset (lihat get_sku_month_facts)
+FACT_PRESENCE_COLUMNS = {'Sales_Qty': 'Has_Sales', 'Forecast_Qty': 'Has_Forecast', 'PO_Qty': 'Has_PO'}
+FACT_STOCK_COLUMNS = ['Stock_Qty', 'Avg_Monthly_Sales_3M', 'Cover_Months']
+
+def build_sku_month_facts(data, cube):
+    """
+    Fact table SKU x Month -> DataFrame urut per bulan (dalam bulan: urutan SKU di cube). Kolom:
+    - SKU_ID, Month, Sales_Qty / Forecast_Qty / PO_Qty (0 jika tidak ada), Has_Sales / Has_Forecast / Has_PO
+      (True jika SKU-bulan ada di sheet asal, pengganti inner / left merge)
+    - atribut produk dari product dimension
+    - Revenue / Cost / Gross_Margin / Margin_Percentage: rumus calculate_financial_metrics_all, NaN jika tidak ada sales
+    - Stock_Qty / Avg_Monthly_Sales_3M / Cover_Months per SKU: rumus calculate_inventory_metrics_with_3month_avg,
+      NaN jika SKU tidak ada di Stock_Onhand (kolom tidak dibuat jika stock kosong)
+    """
+    skus = cube['skus']
+    present = np.logical_or.reduce([cube['present'][m] for m in CUBE_MEASURES.values()])
+    month_pos, sku_pos = np.nonzero(present.T)
+    
+    # SKU_ID pakai dictionary categorical yang sama dengan frame hasil load
+    sales_sku = data.get('sales', pd.DataFrame()).get('SKU_ID')
+    if sales_sku is not None and isinstance(sales_sku.dtype, pd.CategoricalDtype):
+        sku_ids = pd.Categorical.from_codes(sales_sku.cat.categories.get_indexer(skus).take(sku_pos), dtype=sales_sku.dtype)
+    else:
+        sku_ids = skus.take(sku_pos)
+    
+    facts = pd.DataFrame({'SKU_ID': sku_ids, 'Month': cube['months'].take(month_pos)})
+    for measure in FACT_PRESENCE_COLUMNS:
+        facts[measure] = cube[measure][sku_pos, month_pos]
+    for measure, flag in FACT_PRESENCE_COLUMNS.items():
+        facts[flag] = cube['present'][measure][sku_pos, month_pos]
+    facts = add_product_info_to_data(facts, data.get('product_dim', pd.DataFrame()))
+    
+    # Financial per SKU-bulan (hanya baris yang ada sales)
+    if 'Floor_Price' in facts.columns and 'Net_Order_Price' in facts.columns:
+        sales_qty = facts['Sales_Qty'].where(facts['Has_Sales'])
+        facts['Revenue'] = sales_qty * facts['Floor_Price'].fillna(0)
+        facts['Cost'] = sales_qty * facts['Net_Order_Price'].fillna(0)
+        facts['Gross_Margin'] = facts['Revenue'] - facts['Cost']
+        margin_pct = np.where(facts['Revenue'] > 0, facts['Gross_Margin'] / facts['Revenue'] * 100, 0)
+        facts['Margin_Percentage'] = np.where(facts['Has_Sales'], margin_pct, np.nan)
+    
+    # Stock & cover per SKU (avg sales 3 bulan sales terakhir, rata-rata baris yang ada)
+    df_stock = data.get('stock', pd.DataFrame())
+    if not df_stock.empty and 'SKU_ID' in df_stock.columns:
+        stock_by_sku = df_stock.groupby('SKU_ID', observed=True)['Stock_Qty'].sum()
+        stock_pos = pd.Index(np.asarray(stock_by_sku.index, dtype=object)).get_indexer(skus)
+        in_stock = stock_pos >= 0
+        stock_qty = np.where(in_stock, stock_by_sku.to_numpy(dtype=float).take(np.maximum(stock_pos, 0)), np.nan) if len(stock_by_sku) else np.full(len(skus), np.nan)
+        
+        recent = cube['months'].get_indexer(cube_months(cube, ['Sales_Qty'])[-3:])
+        sales_count = cube['present']['Sales_Qty'][:, recent].sum(axis=1)
+        avg_sales = np.divide(cube['Sales_Qty'][:, recent].sum(axis=1), sales_count, out=np.zeros(len(skus)), where=sales_count > 0)
+        cover = np.divide(stock_qty, avg_sales, out=np.full(len(skus), 999.0), where=avg_sales > 0)
+        
+        per_sku = {
+            'Stock_Qty': stock_qty,
+            'Avg_Monthly_Sales_3M': np.where(in_stock, avg_sales, np.nan),
+            'Cover_Months': np.where(in_stock, cover, np.nan)
+        }
+        for col, values in per_sku.items():
+            facts[col] = values.take(sku_pos)
+    
+    return facts
+
+def month_facts(sku_month_facts, month):
+    """Baris fact table untuk satu bulan (slice posisi karena fact table urut per bulan) -> salinan, index 0..n-1"""
+    start = sku_month_facts['Month'].searchsorted(month, side='left')
+    end = sku_month_facts['Month'].searchsorted(month, side='right')
+    return sku_month_facts.iloc[start:end].reset_index(drop=True)
+
+def sku_evaluation_data(sku_month_facts, cube, month, financial=False, recent_months=3):
+    """
+    Kolom evaluasi per SKU untuk satu bulan (cukup 1x merge ke tabel evaluasi):
+    - Stock_Qty / Avg_Monthly_Sales_3M / Cover_Months jika ada data stock
+    - Revenue / Gross_Margin / Margin_Percentage bulan tsb jika financial=True dan ada sales di bulan tsb
+    - sales per bulan untuk recent_months bulan sales terakhir (kolom 'Mon-YYYY'), hanya jika ada >= recent_months
+      bulan sales; SKU tanpa sales di bulan-bulan tsb -> NaN, bulan kosong -> 0 (seperti pivot_table fill_value=0)
+    Return (DataFrame, list kolom sales urut kronologis)
+    """
+    rows = month_facts(sku_month_facts, month)
+    columns = ['SKU_ID'] + [col for col in FACT_STOCK_COLUMNS if col in rows.columns]
+    if financial and 'Revenue' in rows.columns and rows['Has_Sales'].any():
+        columns += ['Revenue', 'Gross_Margin', 'Margin_Percentage']
+    evaluation = rows[columns].copy()
+    
+    sales_cols = []
+    sales_months = cube_months(cube, ['Sales_Qty'])
+    if len(sales_months) >= recent_months and not evaluation.empty:
+        months = sales_months[-recent_months:]
+        sku_rows = cube['skus'].get_indexer(evaluation['SKU_ID'])
+        month_cols = cube['months'].get_indexer(months)
+        has_sales = cube['present']['Sales_Qty'][np.ix_(sku_rows, month_cols)].any(axis=1)
+        for month_date, col in zip(months, month_cols):
+            name = month_date.strftime('%b-%Y')
+            evaluation[name] = np.where(has_sales, cube['Sales_Qty'][sku_rows, col], np.nan)
+            sales_cols.append(name)
+    
+    return evaluation, sales_cols
+
+# --- SKU SEARCH INDEX ---
+# Index in-memory SKU_ID + Product_Name (dibangun sekali per Product_Master & daftar SKU, lihat get_sku_search_index):
+# teks dinormalisasi (lowercase, spasi tunggal) + posting list trigram -> cari substring / prefix / fuzzy tanpa scan frame
+SEARCH_NGRAM = 3
+# Query < SEARCH_NGRAM karakter tidak punya trigram -> pakai prefix (SKU_ID / kata di nama) via key terurut + bisect
+SEARCH_PREFIX_LEN = SEARCH_NGRAM - 1
+# Fuzzy: minimal porsi trigram query yang ada di SKU (dipakai jika tidak ada yang cocok persis)
+FUZZY_MIN_SCORE = 0.5
+# ... dan minimal jumlah trigram yang sama (query pendek: 1 trigram umum seperti "sku" tidak cukup)
+FUZZY_MIN_SHARED = 2
+
+def normalize_search_text(text):
+    return ' '.join(str(text).lower().split())
+
+def text_ngrams(text, n=SEARCH_NGRAM):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+def build_sku_search_index(skus, product_dim):
+    """
+    Index pencarian untuk semua SKU di Product_Master + SKU di cube (yang tidak ada di master tanpa nama).
+    Return dict: 'skus' (array SKU_ID string), 'sku_text' / 'name_text' (teks normal), 'postings' {trigram: posisi SKU},
+    'prefix_keys' / 'prefix_pos' (awalan SKU_ID & tiap kata nama, dipotong SEARCH_PREFIX_LEN, terurut)
+    """
+    master_skus = np.asarray(product_dim.index, dtype=object) if not product_dim.empty else np.array([], dtype=object)
+    sku_ids = pd.Index(master_skus).append(pd.Index(np.asarray(skus, dtype=object))).dropna().unique()
+    
+    names = np.full(len(sku_ids), '', dtype=object)
+    if 'Product_Name' in product_dim.columns:
+        product_pos = product_dim.index.get_indexer(sku_ids)
+        found = product_pos >= 0
+        names[found] = np.asarray(product_dim['Product_Name'], dtype=object)[product_pos[found]]
+    
+    sku_text = [normalize_search_text(sku) for sku in sku_ids]
+    name_text = ['' if pd.isna(name) else normalize_search_text(name) for name in names]
+    
+    postings = {}
+    prefixes = set()
+    for pos, (sku, name) in enumerate(zip(sku_text, name_text)):
+        for gram in text_ngrams(sku) | text_ngrams(name):
+            postings.setdefault(gram, []).append(pos)
+        prefixes.add((sku[:SEARCH_PREFIX_LEN], pos))
+        for word in name.split():
+            prefixes.add((word[:SEARCH_PREFIX_LEN], pos))
+    prefixes = sorted(prefixes)
+    
+    return {
+        'skus': np.asarray([str(sku) for sku in sku_ids], dtype=object),
+        'sku_text': sku_text,
+        'name_text': name_text,
+        'postings': {gram: np.asarray(positions, dtype=np.int32) for gram, positions in postings.items()},
+        'prefix_keys': [key for key, _ in prefixes],
+        'prefix_pos': np.asarray([pos for _, pos in prefixes], dtype=np.int32)
+    }
+
+def search_skus(search_index, query, fuzzy=True):
+    """
+    Cari SKU_ID / Product_Name (case-insensitive). Return (list SKU_ID urut relevansi, fuzzy):
+    - cocok persis: SKU_ID sama > prefix SKU_ID > prefix kata di nama > substring SKU_ID / nama
+      (kandidat = irisan posting list trigram query, lalu diverifikasi)
+    - query < SEARCH_NGRAM karakter: hanya prefix SKU_ID / kata di nama (range bisect di prefix_keys, tanpa scan semua SKU)
+    - tidak ada yang cocok & fuzzy=True: SKU dengan >= FUZZY_MIN_SCORE trigram query dan >= FUZZY_MIN_SHARED trigram
+      yang sama (typo), urut skor -> fuzzy=True
+    """
+    text = normalize_search_text(query)
+    n_skus = len(search_index['skus'])
+    if not text or not n_skus:
+        return [], False
+    
+    grams = text_ngrams(text)
+    gram_postings = [search_index['postings'].get(gram) for gram in grams]
+    if not grams:
+        keys = search_index['prefix_keys']
+        start = bisect.bisect_left(keys, text)
+        end = bisect.bisect_right(keys, text + '\U0010ffff', lo=start)
+        candidates = np.unique(search_index['prefix_pos'][start:end])
+    elif any(positions is None for positions in gram_postings):
+        candidates = []
+    else:
+        gram_postings.sort(key=len)
+        candidates = gram_postings[0]
+        for positions in gram_postings[1:]:
+            candidates = np.intersect1d(candidates, positions, assume_unique=True)
+    
+    ranked = []
+    for pos in candidates:
+        sku, name = search_index['sku_text'][pos], search_index['name_text'][pos]
+        if sku == text:
+            rank = 0
+        elif sku.startswith(text):
+            rank = 1
+        elif name.startswith(text) or f" {text}" in name:
+            rank = 2
+        elif text in sku or text in name:
+            rank = 3
+        else:
+            continue
+        ranked.append((rank, pos))
+    
+    if ranked or not fuzzy or not grams:
+        return [search_index['skus'][pos] for _, pos in sorted(ranked)], False
+    
+    hits = [positions for positions in gram_postings if positions is not None]
+    if not hits:
+        return [], True
+    shared = np.bincount(np.concatenate(hits), minlength=n_skus)
+    score = shared / len(grams)
+    matched = np.flatnonzero((score >= FUZZY_MIN_SCORE) & (shared >= FUZZY_MIN_SHARED))
+    matched = matched[np.lexsort((matched, -score[matched]))]
+    return search_index['skus'][matched].tolist(), True
+
+def load_and_process_data(source, previous=None):
+    """
+    Load semua data termasuk sheet baru: BS_Fullfilment_Cost
+    Return (data, content_hash). Caching ditangani data store + snapshot di disk (lihat get_dashboard_data)
+    source: backend data (lihat get_data_source)
+    previous: data hasil load sebelumnya -> hanya sheet yang berubah yang di-parse ulang
+    """
+    try:
+        grids = source['fetch']()
+    except Exception as e:
+        return {'load_messages': [('error', f"❌ Error loading data: {str(e)}")]}, None
+
+    fingerprints = sheet_fingerprints(grids)
+    data = process_sheet_grids(grids, fingerprints, previous)
+    data['memory_report'] = compact_dataset(data, previous)
+    return data, fingerprints_content_hash(fingerprints)
+
+# --- DATA SOURCE (GOOGLE SHEETS / FILE LOKAL) ---
+# Source = dict {'kind', 'key', 'label', 'fetch'}; fetch() -> {sheet_name: raw value grid (list of rows)}
+
+# Urutan prioritas jika ada beberapa file untuk sheet yang sama
+LOCAL_FILE_EXTENSIONS = ['.parquet', '.csv', '.xlsx']
+
+def get_secret(name, default=None):
+    """st.secrets.get yang aman jika secrets.toml tidak ada (mode file lokal)"""
+    try:
+        return st.secrets.get(name, default)
+    except Exception:
+        return default
+
+def fetch_gsheet_grids(_client, gsheet_url, limiter, load_mode="batch"):
+    """
+    Ambil raw grid semua sheet dari Google Sheets. Mode (secrets `gsheet_load_mode`):
+    - "batch" (default): 1x open_by_url + 1x values_batch_get untuk semua sheet
+    - "parallel": 1x open_by_url + values_get per worksheet di thread pool (SHEET_FETCH_WORKERS)
+    - "per_sheet": open_by_url + get_all_values per worksheet (16 HTTP call)
+    """
+    if load_mode == "parallel":
+        return fetch_sheet_grids_parallel(_client, gsheet_url, SHEET_NAMES, limiter)
+    elif load_mode == "per_sheet":
+        return fetch_sheet_grids_per_sheet(_client, gsheet_url, SHEET_NAMES, limiter)
+    return fetch_sheet_grids(_client, gsheet_url, SHEET_NAMES, limiter)
+
+def read_local_grid(path):
+    """Baca file CSV / XLSX / Parquet menjadi raw grid string (baris pertama = header), sama seperti hasil Sheets API"""
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == '.csv':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            return [row for row in csv.reader(f)]
+
+    if ext == '.xlsx':
+        df = pd.read_excel(path, header=None, dtype=str)
+        return df.fillna('').values.tolist()
+
+    df = pd.read_parquet(path)
+    rows = [[str(c) for c in df.columns]]
+    rows.extend([['' if pd.isna(v) else str(v) for v in row] for row in df.itertuples(index=False, name=None)])
+    return rows
+
+def fetch_local_grids(data_dir, sheet_names):
+    """
+    Ambil raw grid dari folder export: <data_dir>/<Sheet_Name>.parquet|.csv|.xlsx
+    File tidak ada -> None (sama seperti worksheet tidak ditemukan), gagal dibaca -> exception per sheet
+    """
+    grids = {}
+    for name in sheet_names:
+        paths = [os.path.join(data_dir, f"{name}{ext}") for ext in LOCAL_FILE_EXTENSIONS]
+        path = next((p for p in paths if os.path.isfile(p)), None)
+        if path is None:
+            grids[name] = None
+            continue
+        try:
+            grids[name] = read_local_grid(path)
+        except Exception as e:
+            grids[name] = e
+    return grids
+
+def get_data_source():
+    """
+    Pilih backend data:
+    - "local": folder file export (secrets `local_data_dir` atau env DASHBOARD_DATA_DIR), tanpa koneksi network
+    - "gsheet" (default): Google Sheets dari secrets `gsheet_url`
+    Return None jika koneksi Google Sheets gagal
+    """
+    local_dir = get_secret("local_data_dir") or os.environ.get("DASHBOARD_DATA_DIR")
+    kind = get_secret("data_source", "local" if local_dir else "gsheet")
+
+    if kind == "local":
+        data_dir = os.path.abspath(local_dir or ".")
+        return {
+            'kind': 'local',
+            'key': f"local-{hashlib.sha1(data_dir.encode('utf-8')).hexdigest()[:16]}",
+            'label': 'Local files',
+            'fetch': lambda: fetch_local_grids(data_dir, SHEET_NAMES)
+        }
+
+    client = init_gsheet_connection()
+    if client is None:
+        return None
+
+    gsheet_url = st.secrets["gsheet_url"]
+    load_mode = get_secret("gsheet_load_mode", "batch")
+    # Client & rate limiter (cache_resource) diambil di thread session lalu dibawa fetch();
+    # thread refresher tidak memanggil getter Streamlit sendiri (tanpa ScriptRunContext)
+    limiter = get_sheets_rate_limiter()
+    return {
+        'kind': 'gsheet',
+        'key': get_spreadsheet_key(gsheet_url),
+        'label': 'Google Sheets',
+        'fetch': lambda: fetch_gsheet_grids(client, gsheet_url, limiter, load_mode)
+    }
+
+# --- SNAPSHOT DATA DI DISK (PARQUET) ---
+
+# Lokasi snapshot: <SNAPSHOT_DIR>/<source key>/<content_hash>/
+SNAPSHOT_DIR = os.environ.get("DASHBOARD_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".snapshot_cache"))
+DATA_TTL_SECONDS = 300
+
+def get_spreadsheet_key(gsheet_url):
+    try:
+        return extract_id_from_url(gsheet_url)
+    except Exception:
+        return hashlib.sha1(gsheet_url.encode('utf-8')).hexdigest()[:16]
+
+def is_data_loaded(data):
+    return bool(data) and 'product' in data
+
+def save_snapshot(source_key, content_hash, data):
+    """Simpan semua DataFrame di data sebagai Parquet (fallback pickle untuk kolom campuran) + manifest"""
+    base_dir = os.path.join(SNAPSHOT_DIR, source_key)
+    target_dir = os.path.join(base_dir, content_hash)
+    tmp_dir = f"{target_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+    
+    try:
+        os.makedirs(tmp_dir, exist_ok=True)
+        manifest = {'content_hash': content_hash, 'saved_at': time.time(), 'frames': {}, 'values': {}}
+        
+        for key, value in data.items():
+            if isinstance(value, pd.DataFrame):
+                try:
+                    value.to_parquet(os.path.join(tmp_dir, f"{key}.parquet"))
+                    manifest['frames'][key] = 'parquet'
+                except Exception:
+                    # Kolom object dengan tipe campuran (int + str) tidak bisa ke Arrow
+                    value.to_pickle(os.path.join(tmp_dir, f"{key}.pkl"))
+                    manifest['frames'][key] = 'pickle'
+            else:
+                manifest['values'][key] = value
+        
+        with open(os.path.join(tmp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        
+        if os.path.exists(target_dir):
+            shutil.rmtree(target_dir)
+        os.replace(tmp_dir, target_dir)
+        
+        latest_tmp = os.path.join(base_dir, f"latest.json.tmp-{os.getpid()}-{threading.get_ident()}")
+        with open(latest_tmp, 'w', encoding='utf-8') as f:
+            json.dump({'content_hash': content_hash, 'saved_at': manifest['saved_at']}, f)
+        os.replace(latest_tmp, os.path.join(base_dir, 'latest.json'))
+        
+        # Hapus snapshot lama
+        for name in os.listdir(base_dir):
+            path = os.path.join(base_dir, name)
+            if os.path.isdir(path) and name != content_hash and '.tmp-' not in name:
+                shutil.rmtree(path, ignore_errors=True)
+        return True
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+
+def load_snapshot(source_key):
+    """Baca snapshot terakhir -> (data, content_hash, saved_at) atau None"""
+    base_dir = os.path.join(SNAPSHOT_DIR, source_key)
+
+    try:
+        with open(os.path.join(base_dir, 'latest.json'), encoding='utf-8') as f:
+            content_hash = json.load(f)['content_hash']
+        
+        snapshot_dir = os.path.join(base_dir, content_hash)
+        with open(os.path.join(snapshot_dir, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        
+        data = {}
+        for key, fmt in manifest['frames'].items():
+            if fmt == 'parquet':
+                data[key] = pd.read_parquet(os.path.join(snapshot_dir, f"{key}.parquet"))
+            else:
+                data[key] = pd.read_pickle(os.path.join(snapshot_dir, f"{key}.pkl"))
+        for key, value in manifest['values'].items():
+            data[key] = [tuple(v) for v in value] if key == 'load_messages' else value
+        
+        return data, content_hash, manifest['saved_at']
+    except Exception:
+        return None
+
+# --- DATA STORE (SHARED ANTAR SESSION) ---
+
+# Stale-while-revalidate: data lama tetap disajikan, reload berjalan di background
+REFRESH_AHEAD_SECONDS = 30        # mulai reload sebelum TTL habis
+REFRESH_RETRY_SECONDS = 60        # jeda retry setelah refresh gagal
+REFRESHER_IDLE_SECONDS = 30 * 60  # refresher berhenti jika tidak ada session yang akses
+
+@st.cache_resource(show_spinner=False)
+def get_data_store(source_key):
+    """State data per source (spreadsheet / folder lokal) untuk seluruh proses"""
+    return {
+        'lock': threading.RLock(),
+        'data': None,
+        'content_hash': None,
+        'loaded_at': None,
+        'source': None,
+        'revalidating': False,
+        'inflight': None,
+        'last_error': None,
+        'last_attempt': None,
+        'last_access': time.time(),
+        'refresher': None
+    }
+
+def prepare_dataset(source_key, data, content_hash, origin, previous_hash=None):
+    """
+    Kerja berat sebelum swap: snapshot Parquet ke disk + SKU x Month cube.
+    Dipanggil TANPA store['lock'] supaya session lain tetap dilayani data lama selama refresh
+    """
+    if origin != 'snapshot' and is_data_loaded(data) and content_hash and content_hash != previous_hash:
+        save_snapshot(source_key, content_hash, data)
+    if is_data_loaded(data):
+        data['sku_month_cube'] = build_sku_month_cube(data)
+        data['dataset_version'] = content_hash
+    return data
+
+def store_dataset(store, data, content_hash, origin, loaded_at=None):
+    """Swap pointer data + versi ke store (dipanggil dengan store['lock'] dipegang; data sudah lewat prepare_dataset)"""
+    store['data'] = data
+    store['content_hash'] = content_hash
+    store['loaded_at'] = loaded_at or time.time()
+    store['source'] = origin
+
+def refresh_dataset(source, store):
+    """
+    Load ulang dari source lalu swap ke store (single-flight).
+    Jika refresh lain sedang berjalan, tunggu dan pakai hasilnya - tidak ada fetch kedua.
+    Jangan dipanggil dengan store['lock'] dipegang.
+    """
+    with store['lock']:
+        flight = store['inflight']
+        is_leader = flight is None
+        if is_leader:
+            flight = store['inflight'] = {'done': threading.Event(), 'ok': False}
+            store['revalidating'] = True
+    
+    if not is_leader:
+        flight['done'].wait()
+        return flight['ok']
+    
+    try:
+        flight['ok'] = load_and_swap_dataset(source, store)
+        return flight['ok']
+    finally:
+        with store['lock']:
+            store['inflight'] = None
+            store['revalidating'] = False
+        flight['done'].set()
+
+def load_and_swap_dataset(source, store):
+    """
+    Load dari source lalu swap ke store.
+    Jika gagal, data terakhir yang valid tetap dipakai dan error dicatat di store['last_error']
+    """
+    store['last_attempt'] = time.time()
+    try:
+        data, content_hash = load_and_process_data(source, store['data'])
+        # Snapshot + cube di luar lock; lock hanya untuk swap di bawah
+        data = prepare_dataset(source['key'], data, content_hash, source['kind'], store['content_hash'])
+    except Exception as e:
+        data, content_hash = {'load_messages': [('error', f"❌ Error loading data: {str(e)}")]}, None
+    
+    with store['lock']:
+        if is_data_loaded(data):
+            store_dataset(store, data, content_hash, source['kind'])
+            store['last_error'] = None
+            return True
+        
+        errors = [msg for level, msg in data.get('load_messages', []) if level == 'error']
+        store['last_error'] = errors[0] if errors else "Data tidak lengkap"
+        if not is_data_loaded(store['data']):
+            # Belum ada data valid sama sekali -> tampilkan hasil gagal (berisi pesan error)
+            store_dataset(store, data, content_hash, source['kind'])
+        return False
+
+def background_refresher(source, store):
+    """Thread: reload sesaat sebelum TTL habis (atau retry setelah gagal) selama masih ada session aktif"""
+    while True:
+        with store['lock']:
+            if time.time() - store['last_access'] > REFRESHER_IDLE_SECONDS:
+                store['refresher'] = None
+                return
+            due_at = (store['loaded_at'] or 0) + DATA_TTL_SECONDS - REFRESH_AHEAD_SECONDS
+            if store['source'] == 'snapshot':
+                # Data dari snapshot disk selalu di-revalidate sekali ke source
+                due_at = 0
+            if store['last_error'] and store['last_attempt']:
+                due_at = store['last_attempt'] + REFRESH_RETRY_SECONDS
+        
+        wait = due_at - time.time()
+        if wait > 0:
+            time.sleep(min(wait, 5))
+            continue
+
+        refresh_dataset(source, store)
+
+def ensure_background_refresher(source, store):
+    """Start thread refresher sekali per store (dipanggil dengan store['lock'] dipegang)"""
+    thread = store['refresher']
+    if thread is not None and thread.is_alive():
+        return
+    store['refresher'] = threading.Thread(
+        target=background_refresher, args=(source, store),
+        name=f"data-refresher-{source['key']}", daemon=True
+    )
+    store['refresher'].start()
+
+def get_dashboard_data(source):
+    """
+    Data dashboard dari store (stale-while-revalidate):
+    - Proses baru (store kosong): pakai snapshot di disk langsung, refresher langsung revalidate ke source
+    - Tidak ada snapshot: load dari source (blocking, hanya saat cold start)
+    - Selain itu data terakhir langsung disajikan; refresher di background reload sebelum DATA_TTL_SECONDS habis
+    """
+    store = get_data_store(source['key'])
+
+    with store['lock']:
+        store['last_access'] = time.time()
+
+    if store['data'] is None:
+        # Baca snapshot + cube di luar lock, swap hanya jika store masih kosong
+        snapshot = load_snapshot(source['key'])
+        if snapshot is not None:
+            data, content_hash, saved_at = snapshot
+            data = prepare_dataset(source['key'], data, content_hash, 'snapshot')
+            with store['lock']:
+                if store['data'] is None:
+                    store_dataset(store, data, content_hash, 'snapshot', loaded_at=saved_at)
+
+    # Cold start: session lain yang datang bersamaan menunggu fetch yang sama (single-flight)
+    if store['data'] is None:
+        refresh_dataset(source, store)
+
+    with store['lock']:
+        ensure_background_refresher(source, store)
+        # DataFrame di-share antar session (read-only, tanpa copy per rerun): copy dulu sebelum di-mutate
+        return dict(store['data'])
+
+def refresh_dashboard_data(source):
+    """Reload (incremental per sheet) dari source sekarang; data lama tetap dipakai jika gagal"""
+    return refresh_dataset(source, get_data_store(source['key']))
+
+def get_data_status(source):
+    """Umur data + status refresh untuk ditampilkan di UI"""
+    store = get_data_store(source['key'])
+    with store['lock']:
+        return {
+            'age_seconds': time.time() - store['loaded_at'] if store['loaded_at'] else None,
+            'source': store['source'],
+            'revalidating': store['revalidating'],
+            'last_error': store['last_error']
+        }
+
+def format_data_age(seconds):
+    if seconds is None: return "-"
+    seconds = int(seconds)
+    if seconds < 60: return f"{seconds}s"
+    if seconds < 3600: return f"{seconds // 60}m {seconds % 60}s"
+    if seconds < 86400: return f"{seconds // 3600}h {(seconds % 3600) // 60}m"
+    return f"{seconds // 86400}d {(seconds % 86400) // 3600}h"
 
 # --- ====================================================== ---
 # ---                FINANCIAL FUNCTIONS                    ---
 # --- ====================================================== ---
 
-@st.cache_data(ttl=300)
 def calculate_financial_metrics_all(df_sales, df_product):
     """Calculate all financial metrics from sales data"""
     
@@ -653,9 +1898,11 @@ def calculate_financial_metrics_all(df_sales, df_product):
             st.warning("⚠️ Price columns missing in Product Master")
             return pd.DataFrame()
         
-        # Ensure sales data has product info with prices
+        # Ensure sales data has product info with prices (selalu salinan, df_sales asli tidak diubah)
         if 'Floor_Price' not in df_sales.columns or 'Net_Order_Price' not in df_sales.columns:
             df_sales = add_product_info_to_data(df_sales, df_product)
+        else:
+            df_sales = df_sales.copy()
         
         # Fill missing prices
         df_sales['Floor_Price'] = df_sales['Floor_Price'].fillna(0)
@@ -678,13 +1925,17 @@ def calculate_financial_metrics_all(df_sales, df_product):
             0
         )
         
+        # Kolom kalender (nama bulan lewat map nomor bulan, strftime per baris mahal di ribuan SKU x puluhan bulan)
+        df_sales['Year'] = df_sales['Month'].dt.year
+        df_sales['Month_Num'] = df_sales['Month'].dt.month
+        df_sales['Month_Name'] = df_sales['Month_Num'].map(MONTH_ABBREVIATIONS)
+        
         return df_sales
         
     except Exception as e:
         st.error(f"Financial metrics calculation error: {str(e)}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=300)
 def calculate_inventory_financial(df_stock, df_product):
     """Calculate inventory financial value"""
     
@@ -696,9 +1947,11 @@ def calculate_inventory_financial(df_stock, df_product):
         if 'Floor_Price' not in df_product.columns or 'Net_Order_Price' not in df_product.columns:
             return pd.DataFrame()
         
-        # Ensure stock data has prices
+        # Ensure stock data has prices (selalu salinan, df_stock asli tidak diubah)
         if 'Floor_Price' not in df_stock.columns or 'Net_Order_Price' not in df_stock.columns:
             df_stock = add_product_info_to_data(df_stock, df_product)
+        else:
+            df_stock = df_stock.copy()
         
         # Fill missing prices
         df_stock['Floor_Price'] = df_stock['Floor_Price'].fillna(0)
@@ -720,25 +1973,71 @@ def calculate_inventory_financial(df_stock, df_product):
         st.error(f"Inventory financial calculation error: {str(e)}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=300)
-def calculate_seasonality(df_financial):
-    """Calculate seasonal patterns from financial data"""
+# Kolom yang dirata-rata seasonality (mean per bulan kalender = total sum / total baris dari semua tahun)
+SEASONAL_COLUMNS = ['Revenue', 'Gross_Margin', 'Sales_Qty']
+
+def financial_month_totals(df_financial, month_cache=None, month_keys=None):
+    """
+    Sum & jumlah baris non-NaN SEASONAL_COLUMNS per bulan -> DataFrame (index Month urut, kolom '<col>' & '<col>_Count').
+    df_financial urut per bulan (seperti data['sales']) -> tiap bulan = slice posisi, tanpa groupby seluruh histori.
+    month_cache / month_keys: store hasil per bulan (lihat get_month_results_store) -> bulan tutup yang key-nya
+    sudah ada tidak dijumlah ulang
+    """
+    cached = {}
+    if month_cache is not None and month_keys:
+        with month_cache['lock']:
+            cached = {month: month_cache['entries'][key] for month, key in month_keys.items() if key in month_cache['entries']}
+    
+    if not df_financial['Month'].is_monotonic_increasing:
+        df_financial = df_financial.sort_values('Month', kind='stable', ignore_index=True)
+    months = df_financial['Month'].to_numpy()
+    values = {col: df_financial[col].to_numpy(dtype=float) for col in SEASONAL_COLUMNS}
+    month_starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]]) if len(months) else np.array([], dtype=int)
+    month_ends = np.r_[month_starts[1:], len(months)]
+    
+    totals, computed = {}, {}
+    for start, end in zip(month_starts, month_ends):
+        month = pd.Timestamp(months[start])
+        if pd.isna(month):
+            continue
+        if month in cached:
+            totals[month] = cached[month]
+            continue
+        month_totals = {}
+        for col, col_values in values.items():
+            block = col_values[start:end]
+            valid = ~np.isnan(block)
+            month_totals[col] = block[valid].sum()
+            month_totals[f"{col}_Count"] = int(valid.sum())
+        totals[month] = computed[month] = month_totals
+    
+    if month_cache is not None and month_keys and computed:
+        store_month_results(month_cache, {month_keys[m]: result for m, result in computed.items() if m in month_keys})
+    
+    return pd.DataFrame.from_dict(totals, orient='index')
+
+def calculate_seasonality(df_financial, month_cache=None, month_keys=None):
+    """
+    Calculate seasonal patterns from financial data.
+    Dari total per bulan (financial_month_totals) -> hanya bulan baru / berubah yang dijumlah; df_financial tidak diubah
+    """
     
     if df_financial.empty:
         return pd.DataFrame()
     
     try:
-        # Add month and year columns
-        df_financial['Year'] = df_financial['Month'].dt.year
-        df_financial['Month_Num'] = df_financial['Month'].dt.month
-        df_financial['Month_Name'] = df_financial['Month'].dt.strftime('%b')
-        
-        # Group by month across years
-        seasonal_pattern = df_financial.groupby(['Month_Num', 'Month_Name']).agg({
-            'Revenue': 'mean',
-            'Gross_Margin': 'mean',
-            'Sales_Qty': 'mean'
-        }).reset_index()
+        month_totals = financial_month_totals(df_financial, month_cache, month_keys)
+        if month_totals.empty:
+            return pd.DataFrame()
+        
+        # Group by month across years (mean baris = total sum / total baris)
+        by_month_num = month_totals.groupby(month_totals.index.month).sum()
+        seasonal_pattern = pd.DataFrame({
+            'Month_Num': by_month_num.index.to_numpy(),
+            'Month_Name': by_month_num.index.map(MONTH_ABBREVIATIONS).to_numpy(dtype=object)
+        })
+        for col in SEASONAL_COLUMNS:
+            seasonal_pattern[col] = (by_month_num[col] / by_month_num[f"{col}_Count"]).to_numpy()
         
         # Calculate seasonal indices
         overall_avg_revenue = seasonal_pattern['Revenue'].mean()
@@ -757,80 +2056,201 @@ def calculate_seasonality(df_financial):
         
         seasonal_pattern['Season_Type'] = np.select(conditions, choices, default='Normal Season')
         
-        return seasonal_pattern.sort_values('Month_Num')
+        return seasonal_pattern
+        
+    except Exception as e:
+        st.error(f"Seasonality calculation error: {str(e)}")
+        return pd.DataFrame()
+
+def calculate_eoq(demand, order_cost, holding_cost_per_unit):
+    """Calculate Economic Order Quantity"""
+    if demand <= 0 or order_cost <= 0 or holding_cost_per_unit <= 0:
+        return 0
+    
+    eoq = math.sqrt((2 * demand * order_cost) / holding_cost_per_unit)
+    return round(eoq)
+
+def calculate_forecast_bias(cube):
+    """Calculate forecast bias (systematic over/under forecasting) per bulan dari SKU x Month cube"""
+    
+    forecast_present = cube['present']['Forecast_Qty']
+    po_present = cube['present']['PO_Qty']
+    if not forecast_present.any() or not po_present.any():
+        return pd.DataFrame()
+    
+    try:
+        # Get common months (bulan yang ada di forecast dan PO)
+        common = forecast_present.any(axis=0) & po_present.any(axis=0)
+        if not common.any():
+            return pd.DataFrame()
+        
+        # SKU yang ada di forecast dan PO pada bulan yang sama (= inner merge per bulan)
+        matched = forecast_present[:, common] & po_present[:, common]
+        forecast_qty = cube['Forecast_Qty'][:, common]
+        bias = cube['PO_Qty'][:, common] - forecast_qty
+        bias_pct = np.divide(bias * 100, forecast_qty, out=np.zeros_like(bias), where=forecast_qty > 0)
+        
+        n_matched = matched.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_bias = np.where(matched, bias, 0).sum(axis=0) / n_matched
+            avg_bias_pct = np.where(matched, bias_pct, 0).sum(axis=0) / n_matched
+        
+        return pd.DataFrame({
+            'Month': cube['months'][common],
+            'Avg_Bias': avg_bias,
+            'Avg_Bias_Percentage': avg_bias_pct,
+            'Over_Forecast_SKUs': (matched & (bias > 0)).sum(axis=0),
+            'Under_Forecast_SKUs': (matched & (bias < 0)).sum(axis=0)
+        })
         
     except Exception as e:
-        st.error(f"Seasonality calculation error: {str(e)}")
+        st.error(f"Forecast bias calculation error: {str(e)}")
         return pd.DataFrame()
 
-def calculate_eoq(demand, order_cost, holding_cost_per_unit):
-    """Calculate Economic Order Quantity"""
-    if demand <= 0 or order_cost <= 0 or holding_cost_per_unit <= 0:
-        return 0
-    
-    eoq = math.sqrt((2 * demand * order_cost) / holding_cost_per_unit)
-    return round(eoq)
+# |Tracking signal| di atas batas ini = forecast drifting (bias sistematis, bukan noise)
+TRACKING_SIGNAL_LIMIT = 4
+
+def bias_tracking_frame(errors, matched, index):
+    """
+    Error per [baris, bulan] (PO - Forecast, hanya sel matched) -> cumulative bias, MAD, tracking signal per baris.
+    Tracking signal = cumulative error / MAD; MAD = rata-rata |error| bulan matched
+    """
+    n_months = matched.sum(axis=1)
+    errors = np.where(matched, errors, 0)
+    cumulative_bias = errors.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_bias = cumulative_bias / n_months
+        mad = np.abs(errors).sum(axis=1) / n_months
+        tracking_signal = np.where(mad > 0, cumulative_bias / mad, 0.0)
+    
+    frame = pd.DataFrame({
+        'Months': n_months,
+        'Cumulative_Bias': cumulative_bias,
+        'Avg_Bias': avg_bias,
+        'MAD': mad,
+        'Tracking_Signal': tracking_signal
+    }, index=index)
+    frame = frame[n_months > 0]
+    frame['Drift'] = np.select(
+        [frame['Tracking_Signal'] > TRACKING_SIGNAL_LIMIT, frame['Tracking_Signal'] < -TRACKING_SIGNAL_LIMIT],
+        ['Over (PO > Rofo)', 'Under (PO < Rofo)'], default='In Control'
+    )
+    return frame
 
-def calculate_forecast_bias(df_forecast, df_po):
-    """Calculate forecast bias (systematic over/under forecasting)"""
+def calculate_bias_tracking(cube, product_dim):
+    """
+    Cumulative bias, MAD & tracking signal per SKU dan per brand, satu pass atas semua SKU-bulan di cube.
+    Sel dihitung jika SKU ada di forecast dan PO pada bulan yang sama (sama seperti calculate_forecast_bias);
+    error brand = total PO - total forecast SKU matched brand tsb per bulan. Return {'sku': df, 'brand': df}
+    """
+    tracking = {'sku': pd.DataFrame(), 'brand': pd.DataFrame()}
     
-    if df_forecast.empty or df_po.empty:
-        return {}
+    matched = cube['present']['Forecast_Qty'] & cube['present']['PO_Qty']
+    if not matched.any():
+        return tracking
     
     try:
-        # Get common months
-        forecast_months = sorted(df_forecast['Month'].unique())
-        po_months = sorted(df_po['Month'].unique())
-        common_months = sorted(set(forecast_months) & set(po_months))
-        
-        if not common_months:
-            return {}
-        
-        bias_results = []
-        
-        for month in common_months:
-            df_f_month = df_forecast[df_forecast['Month'] == month]
-            df_p_month = df_po[df_po['Month'] == month]
-            
-            # Merge forecast and PO
-            df_merged = pd.merge(
-                df_f_month[['SKU_ID', 'Forecast_Qty']],
-                df_p_month[['SKU_ID', 'PO_Qty']],
-                on='SKU_ID',
-                how='inner'
-            )
-            
-            # Calculate bias
-            df_merged['Bias'] = df_merged['PO_Qty'] - df_merged['Forecast_Qty']
-            df_merged['Bias_Percentage'] = np.where(
-                df_merged['Forecast_Qty'] > 0,
-                (df_merged['Bias'] / df_merged['Forecast_Qty'] * 100),
-                0
-            )
-            
-            avg_bias = df_merged['Bias'].mean()
-            avg_bias_pct = df_merged['Bias_Percentage'].mean()
+        errors = cube['PO_Qty'] - cube['Forecast_Qty']
+        
+        sku_tracking = bias_tracking_frame(errors, matched, pd.Index(cube['skus'], name='SKU_ID'))
+        sku_tracking = add_product_info_to_data(sku_tracking.reset_index(), product_dim, columns=['Product_Name', 'Brand', 'SKU_Tier'])
+        info_cols = [col for col in ['Product_Name', 'Brand', 'SKU_Tier'] if col in sku_tracking.columns]
+        tracking['sku'] = sku_tracking[['SKU_ID'] + info_cols + [col for col in sku_tracking.columns if col not in info_cols and col != 'SKU_ID']]
+        
+        if not product_dim.empty and 'Brand' in product_dim.columns:
+            # SKU -> kode brand, lalu error & matched dijumlah per brand (groupby atas baris cube)
+            brand_pos = product_dim.index.get_indexer(cube['skus'])
+            brands = np.asarray(pd.api.extensions.take(column_values(product_dim['Brand']), brand_pos, allow_fill=True), dtype=object)
+            has_brand = pd.notna(brands)
+            brand_codes, brand_names = pd.factorize(brands[has_brand], sort=True)
             
-            bias_results.append({
-                'Month': month,
-                'Avg_Bias': avg_bias,
-                'Avg_Bias_Percentage': avg_bias_pct,
-                'Over_Forecast_SKUs': len(df_merged[df_merged['Bias'] > 0]),
-                'Under_Forecast_SKUs': len(df_merged[df_merged['Bias'] < 0])
-            })
+            brand_errors = pd.DataFrame(np.where(matched, errors, 0)[has_brand]).groupby(brand_codes).sum().to_numpy()
+            brand_matched = pd.DataFrame(matched[has_brand]).groupby(brand_codes).any().to_numpy()
+            tracking['brand'] = bias_tracking_frame(brand_errors, brand_matched, pd.Index(brand_names, name='Brand')).reset_index()
         
-        return pd.DataFrame(bias_results)
+        return tracking
         
     except Exception as e:
-        st.error(f"Forecast bias calculation error: {str(e)}")
-        return pd.DataFrame()
+        st.error(f"Bias tracking calculation error: {str(e)}")
+        return tracking
 
 # --- ====================================================== ---
 # ---                ANALYTICS FUNCTIONS                    ---
 # --- ====================================================== ---
 
-def calculate_monthly_performance(df_forecast, df_po, df_product):
-    """Calculate performance for each month separately - HANYA SKU dengan Forecast_Qty > 0"""
+def month_row_digests(df):
+    """Digest isi baris per bulan (urutan baris dalam bulan ikut dihitung) -> {month: sha1 hex}"""
+    if df.empty:
+        return {}
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    months = df['Month'].to_numpy()
+    order = np.argsort(months, kind='stable')
+    months, row_hashes = months[order], row_hashes[order]
+    month_starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    month_ends = np.r_[month_starts[1:], len(months)]
+    return {
+        pd.Timestamp(months[start]): hashlib.sha1(row_hashes[start:end].tobytes()).hexdigest()
+        for start, end in zip(month_starts, month_ends)
+    }
+
+def sheet_month_keys(data, output_key):
+    """
+    Key isi per bulan Sales / Rofo / PO (output_key 'sales' / 'forecast' / 'po') -> {month: key}.
+    Dari fingerprint kolom loader (data['<output_key>_column_fingerprints']: kolom non-bulan + kolom bulan tsb)
+    tanpa hash ulang frame; fallback digest baris frame (month_row_digests) jika fingerprint tidak tercatat
+    """
+    fingerprints = data.get(f"{output_key}_column_fingerprints") or {}
+    month_cols = get_month_columns(fingerprints)
+    if not month_cols:
+        df = data.get(output_key)
+        return month_row_digests(df) if isinstance(df, pd.DataFrame) and 'Month' in df.columns else {}
+    
+    month_set = set(month_cols)
+    id_digest = hashlib.sha1('\x1f'.join(f"{col}={fp}" for col, fp in fingerprints.items() if col not in month_set).encode('utf-8')).hexdigest()
+    
+    # Label -> bulan seperti parse_month_labels di transform (beberapa kolom bisa jatuh ke bulan yang sama)
+    month_fingerprints = {}
+    for col in month_cols:
+        month = parse_month_label(col)
+        if month is not None:
+            month_fingerprints.setdefault(pd.Timestamp(month), []).append(fingerprints[col])
+    return {
+        month: f"{output_key}:{month:%Y-%m}:{id_digest}:{':'.join(fps)}"
+        for month, fps in month_fingerprints.items()
+    }
+
+def monthly_performance_keys(data):
+    """
+    Key cache hasil per bulan calculate_monthly_performance: isi Rofo + PO bulan itu (sheet_month_keys) + fingerprint
+    sheet Product_Master. Bulan yang sudah tutup tidak berubah saat bulan baru ditambahkan -> key sama -> hasil lama dipakai ulang.
+    {} (tanpa cache) jika fingerprint Product_Master tidak ada
+    """
+    product_fingerprint = data.get('sheet_fingerprints', {}).get('Product_Master')
+    if not product_fingerprint:
+        return {}
+    forecast_keys = sheet_month_keys(data, 'forecast')
+    po_keys = sheet_month_keys(data, 'po')
+    return {
+        month: f"performance:{key}:{po_keys[month]}:{product_fingerprint}"
+        for month, key in forecast_keys.items() if month in po_keys
+    }
+
+def financial_month_keys(data):
+    """Key cache total financial per bulan (financial_month_totals): isi Sales bulan itu + fingerprint Product_Master (harga)"""
+    product_fingerprint = data.get('sheet_fingerprints', {}).get('Product_Master')
+    if not product_fingerprint:
+        return {}
+    return {month: f"financial:{key}:{product_fingerprint}" for month, key in sheet_month_keys(data, 'sales').items()}
+
+def calculate_monthly_performance(df_forecast, df_po, df_product, month_cache=None, month_keys=None):
+    """
+    Calculate performance for each month separately - HANYA SKU dengan Forecast_Qty > 0.
+    Semua bulan sekaligus: 1x join forecast-PO pada (SKU_ID, Month), ratio / status / MAPE / status counts per bulan via groupby.
+    'data' per bulan = salinan ringkas baris bulan itu (tidak menahan hasil join seluruh bulan);
+    SKU per status disimpan sebagai posisi baris (lihat get_status_skus).
+    month_cache: store hasil per bulan (lihat get_month_results_store) -> hanya bulan baru / berubah yang dihitung ulang,
+    aktif jika month_keys (monthly_performance_keys) ada. Hasil di cache dipakai bersama -> read-only
+    """
     
     monthly_performance = {}
     
@@ -838,93 +2258,92 @@ def calculate_monthly_performance(df_forecast, df_po, df_product):
         return monthly_performance
     
     try:
-        # ADD PRODUCT INFO jika belum ada
-        df_forecast = add_product_info_to_data(df_forecast, df_product)
-        df_po = add_product_info_to_data(df_po, df_product)
-        
-        # Get unique months from both datasets
-        forecast_months = sorted(df_forecast['Month'].unique())
-        po_months = sorted(df_po['Month'].unique())
-        all_months = sorted(set(list(forecast_months) + list(po_months)))
-        
-        for month in all_months:
-            # Get data for this month - FILTER HANYA Forecast_Qty > 0
-            df_forecast_month = df_forecast[
-                (df_forecast['Month'] == month) & 
-                (df_forecast['Forecast_Qty'] > 0)
-            ].copy()
-            
-            df_po_month = df_po[df_po['Month'] == month].copy()
-            
-            if df_forecast_month.empty or df_po_month.empty:
-                continue
-            
-            # Merge forecast and PO for this month
-            df_merged = pd.merge(
-                df_forecast_month,
-                df_po_month,
-                on=['SKU_ID'],
-                how='inner',
-                suffixes=('_forecast', '_po')
-            )
-            
-            if not df_merged.empty:
-                # Add product info (jika belum ada dari merge)
-                if 'Product_Name' not in df_merged.columns or 'Brand' not in df_merged.columns:
-                    df_merged = add_product_info_to_data(df_merged, df_product)
-                
-                # Calculate ratio - Pastikan Forecast_Qty > 0
-                df_merged['PO_Rofo_Ratio'] = np.where(
-                    df_merged['Forecast_Qty'] > 0,
-                    (df_merged['PO_Qty'] / df_merged['Forecast_Qty']) * 100,
-                    0
-                )
-                
-                # Categorize
-                conditions = [
-                    df_merged['PO_Rofo_Ratio'] < 80,
-                    (df_merged['PO_Rofo_Ratio'] >= 80) & (df_merged['PO_Rofo_Ratio'] <= 120),
-                    df_merged['PO_Rofo_Ratio'] > 120
-                ]
-                choices = ['Under', 'Accurate', 'Over']
-                df_merged['Accuracy_Status'] = np.select(conditions, choices, default='Unknown')
-                
-                # Calculate metrics
-                df_merged['Absolute_Percentage_Error'] = abs(df_merged['PO_Rofo_Ratio'] - 100)
-                
-                # Hanya hitung MAPE untuk SKU dengan Forecast_Qty > 0
-                valid_skus = df_merged[df_merged['Forecast_Qty'] > 0]
-                if not valid_skus.empty:
-                    mape = valid_skus['Absolute_Percentage_Error'].mean()
-                else:
-                    mape = 0
-                    
-                monthly_accuracy = 100 - mape
-                
-                # Status counts
-                status_counts = df_merged['Accuracy_Status'].value_counts().to_dict()
-                total_records = len(df_merged)
-                status_percentages = {k: (v/total_records*100) for k, v in status_counts.items()}
-                
-                # Store results
-                monthly_performance[month] = {
-                    'accuracy': monthly_accuracy,
-                    'mape': mape,
-                    'status_counts': status_counts,
-                    'status_percentages': status_percentages,
-                    'total_records': total_records,
-                    'data': df_merged,
-                    'under_skus': df_merged[df_merged['Accuracy_Status'] == 'Under'].copy(),
-                    'over_skus': df_merged[df_merged['Accuracy_Status'] == 'Over'].copy(),
-                    'accurate_skus': df_merged[df_merged['Accuracy_Status'] == 'Accurate'].copy()
-                }
+        df_forecast = df_forecast.loc[df_forecast['Forecast_Qty'] > 0, ['SKU_ID', 'Month', 'Forecast_Qty']]
+        df_po = df_po[['SKU_ID', 'Month', 'PO_Qty']]
+        
+        # Bulan yang hasilnya sudah ada di cache tidak ikut di-join
+        cached = {}
+        if month_cache is not None and month_keys:
+            with month_cache['lock']:
+                cached = {month: month_cache['entries'][key] for month, key in month_keys.items() if key in month_cache['entries']}
+            if cached:
+                cached_months = list(cached)
+                df_forecast = df_forecast[~df_forecast['Month'].isin(cached_months)]
+                df_po = df_po[~df_po['Month'].isin(cached_months)]
+        
+        # Join forecast (Forecast_Qty > 0) dan PO untuk semua bulan (yang belum di-cache) sekaligus
+        df_merged = pd.merge(df_forecast, df_po, on=['SKU_ID', 'Month'], how='inner')
+        
+        if df_merged.empty:
+            return dict(sorted(cached.items()))
+        
+        # ADD PRODUCT INFO, urut per bulan (stable -> urutan SKU dalam bulan tetap urutan sheet Rofo)
+        df_merged = add_product_info_to_data(df_merged, df_product)
+        df_merged = df_merged.sort_values('Month', kind='stable', ignore_index=True)
         
-        return monthly_performance
+        # Calculate ratio (Forecast_Qty selalu > 0 setelah filter)
+        df_merged['PO_Rofo_Ratio'] = df_merged['PO_Qty'] / df_merged['Forecast_Qty'] * 100
+        
+        # Categorize
+        conditions = [
+            df_merged['PO_Rofo_Ratio'] < 80,
+            (df_merged['PO_Rofo_Ratio'] >= 80) & (df_merged['PO_Rofo_Ratio'] <= 120),
+            df_merged['PO_Rofo_Ratio'] > 120
+        ]
+        choices = ['Under', 'Accurate', 'Over']
+        df_merged['Accuracy_Status'] = np.select(conditions, choices, default='Unknown')
+        
+        # Calculate metrics
+        df_merged['Absolute_Percentage_Error'] = abs(df_merged['PO_Rofo_Ratio'] - 100)
+        
+        # MAPE & status counts per bulan
+        mape_by_month = df_merged.groupby('Month')['Absolute_Percentage_Error'].mean()
+        status_by_month = df_merged.groupby(['Month', 'Accuracy_Status']).size()
+        
+        # Batas baris tiap bulan di frame yang sudah urut
+        months = df_merged['Month'].to_numpy()
+        month_starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+        month_ends = np.r_[month_starts[1:], len(df_merged)]
+        status_values = df_merged['Accuracy_Status'].to_numpy()
+        
+        for start, end in zip(month_starts, month_ends):
+            month = df_merged['Month'].iat[start]
+            month_data = df_merged.iloc[start:end].copy()
+            month_data.index = pd.RangeIndex(end - start)
+            
+            mape = mape_by_month[month]
+            monthly_accuracy = 100 - mape
+            
+            # Status counts (urut terbanyak, seperti value_counts)
+            status_counts = status_by_month[month].sort_values(ascending=False, kind='stable').to_dict()
+            total_records = int(end - start)
+            status_percentages = {k: (v/total_records*100) for k, v in status_counts.items()}
+            
+            # Store results
+            monthly_performance[month] = {
+                'accuracy': monthly_accuracy,
+                'mape': mape,
+                'status_counts': status_counts,
+                'status_percentages': status_percentages,
+                'total_records': total_records,
+                'data': month_data,
+                'status_rows': {status: np.flatnonzero(status_values[start:end] == status) for status in choices}
+            }
+        
+        if month_cache is not None and month_keys:
+            store_month_results(month_cache, {month_keys[m]: result for m, result in monthly_performance.items() if m in month_keys})
+        
+        monthly_performance.update(cached)
+        return dict(sorted(monthly_performance.items()))
         
     except Exception as e:
         st.error(f"Monthly performance calculation error: {str(e)}")
         return monthly_performance
 
+def get_status_skus(month_performance, status):
+    """Baris SKU dengan Accuracy_Status tertentu ('Under' / 'Accurate' / 'Over') dari hasil satu bulan calculate_monthly_performance"""
+    return month_performance['data'].iloc[month_performance['status_rows'][status]]
+
 def get_last_3_months_performance(monthly_performance):
     """Get performance for last 3 months"""
     
@@ -944,7 +2363,95 @@ def get_last_3_months_performance(monthly_performance):
     
     return last_3_data
 
-@st.cache_data(ttl=300)
+# --- FORECAST ACCURACY (BATCH) ---
+# Semua metrik akurasi dari 1 tabel sel SKU-bulan (build_accuracy_cells), agregasi per level via groupby sum.
+# Konvensi sama dengan monthly performance: hanya sel dengan Forecast_Qty > 0, error = Actual - Rofo,
+# APE = |error| / Rofo (Accuracy = 100 - MAPE)
+ACCURACY_COMPARISONS = {
+    'PO vs Rofo': 'PO_Qty',
+    'Sales vs Rofo': 'Sales_Qty'
+}
+ACCURACY_LEVELS = {'SKU': 'SKU_ID', 'Brand': 'Brand', 'Tier': 'SKU_Tier', 'Total': None}
+ACCURACY_COMPONENTS = ['Forecast_Qty', 'Actual_Qty', 'Error', 'Absolute_Error', 'APE', 'sAPE', 'Scaled_Error']
+
+def build_accuracy_cells(cube, product_dim, actual_measure):
+    """
+    Sel SKU-bulan (urut per bulan) yang ada di Rofo (Forecast_Qty > 0) dan di sheet actual (PO / Sales) -> DataFrame
+    dengan komponen metrik per sel. Scaled_Error (MASE) = |error| / rata-rata |actual bulan t - bulan t-1| SKU tsb
+    (naive forecast, bulan berurutan yang ada data); NaN jika SKU tidak punya skala
+    """
+    forecast = cube['Forecast_Qty']
+    actual = cube[actual_measure]
+    present = cube['present'][actual_measure]
+    matched = cube['present']['Forecast_Qty'] & present & (forecast > 0)
+    
+    steps = present[:, 1:] & present[:, :-1]
+    n_steps = steps.sum(axis=1)
+    naive_error = np.where(steps, np.abs(np.diff(actual, axis=1)), 0).sum(axis=1)
+    scale = np.divide(naive_error, n_steps, out=np.full(len(cube['skus']), np.nan), where=n_steps > 0)
+    scale[scale == 0] = np.nan
+    
+    month_pos, sku_pos = np.nonzero(matched.T)
+    forecast_qty = forecast[sku_pos, month_pos]
+    actual_qty = actual[sku_pos, month_pos]
+    error = actual_qty - forecast_qty
+    absolute_error = np.abs(error)
+    
+    cells = pd.DataFrame({
+        'SKU_ID': cube['skus'].take(sku_pos),
+        'Month': cube['months'].take(month_pos),
+        'Forecast_Qty': forecast_qty,
+        'Actual_Qty': actual_qty,
+        'Error': error,
+        'Absolute_Error': absolute_error,
+        'APE': absolute_error / forecast_qty * 100,
+        'sAPE': 2 * absolute_error / (np.abs(actual_qty) + forecast_qty) * 100,
+        'Scaled_Error': absolute_error / scale.take(sku_pos)
+    })
+    return add_product_info_to_data(cells, product_dim, columns=['Product_Name', 'Brand', 'SKU_Tier'])
+
+def build_accuracy_library(cube, product_dim):
+    """Sel akurasi untuk semua perbandingan (ACCURACY_COMPARISONS) -> {comparison: DataFrame}"""
+    return {comparison: build_accuracy_cells(cube, product_dim, measure) for comparison, measure in ACCURACY_COMPARISONS.items()}
+
+def accuracy_table(accuracy_cells, level='Total', months=None, by_month=False):
+    """
+    MAPE / WAPE / sMAPE / Bias / MASE per level ('SKU' / 'Brand' / 'Tier' / 'Total'), opsional per bulan.
+    Komponen dijumlah sekali per grup (groupby sum, tanpa lambda), metrik dihitung dari jumlah tsb.
+    months: batasi ke bulan tertentu (default semua bulan)
+    """
+    cells = accuracy_cells
+    if months is not None:
+        cells = cells[cells['Month'].isin(pd.DatetimeIndex(months))]
+    
+    level_col = ACCURACY_LEVELS[level]
+    if cells.empty or (level_col is not None and level_col not in cells.columns):
+        return pd.DataFrame()
+    
+    keys = (['Month'] if by_month else []) + ([level_col] if level_col else [])
+    
+    group_keys = [cells[key] for key in keys] if keys else [np.zeros(len(cells), dtype=np.int8)]
+    grouped = cells[ACCURACY_COMPONENTS].groupby(group_keys, observed=True, sort=True)
+    sums = grouped.sum()
+    records = grouped.size()
+    scaled_records = grouped['Scaled_Error'].count()
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        table = pd.DataFrame({
+            'Records': records,
+            'Total_Forecast': sums['Forecast_Qty'],
+            'Total_Actual': sums['Actual_Qty'],
+            'Actual_vs_Forecast_Ratio': sums['Actual_Qty'] / sums['Forecast_Qty'] * 100,
+            'MAPE': sums['APE'] / records,
+            'WAPE': sums['Absolute_Error'] / sums['Forecast_Qty'] * 100,
+            'sMAPE': sums['sAPE'] / records,
+            'Bias': sums['Error'],
+            'Bias_Percentage': sums['Error'] / sums['Forecast_Qty'] * 100,
+            'MASE': (sums['Scaled_Error'] / scaled_records).where(scaled_records > 0)
+        })
+    table['Accuracy'] = 100 - table['MAPE']
+    return table.reset_index(drop=not keys)
+
 def calculate_inventory_metrics_with_3month_avg(df_stock, df_sales, df_product):
     """Calculate inventory metrics using 3-month average sales (FIXED: AGGREGATE STOCK FIRST)"""
     
@@ -956,15 +2463,16 @@ def calculate_inventory_metrics_with_3month_avg(df_stock, df_sales, df_product):
     try:
         # --- FIX UTAMA: Agregasi Stok dari Level Batch ke Level SKU ---
         # Kita jumlahkan dulu Stock_Qty berdasarkan SKU_ID agar 1 SKU = 1 Baris
-        df_stock_agg = df_stock.groupby('SKU_ID').agg({
+        df_stock_agg = df_stock.groupby('SKU_ID', observed=True).agg({
             'Stock_Qty': 'sum'
         }).reset_index()
         
         # ADD PRODUCT INFO ke data yang sudah di-agregasi
-        df_stock_agg = add_product_info_to_data(df_stock_agg, df_product)
+        product_dim = build_product_dimension(df_product)
+        df_stock_agg = add_product_info_to_data(df_stock_agg, product_dim)
         
         # Siapkan Sales Data
-        df_sales = add_product_info_to_data(df_sales, df_product)
+        df_sales = add_product_info_to_data(df_sales, product_dim)
         
         # Get last 3 months sales data
         if not df_sales.empty:
@@ -977,7 +2485,7 @@ def calculate_inventory_metrics_with_3month_avg(df_stock, df_sales, df_product):
         
         # Calculate average monthly sales per SKU
         if not df_sales.empty and not df_sales_last_3.empty:
-            avg_monthly_sales = df_sales_last_3.groupby('SKU_ID')['Sales_Qty'].mean().reset_index()
+            avg_monthly_sales = df_sales_last_3.groupby('SKU_ID', observed=True)['Sales_Qty'].mean().reset_index()
             avg_monthly_sales.columns = ['SKU_ID', 'Avg_Monthly_Sales_3M']
         else:
             avg_monthly_sales = pd.DataFrame(columns=['SKU_ID', 'Avg_Monthly_Sales_3M'])
@@ -1020,7 +2528,7 @@ def calculate_inventory_metrics_with_3month_avg(df_stock, df_sales, df_product):
         
         # Tier analysis
         if 'SKU_Tier' in df_inventory.columns:
-            tier_analysis = df_inventory.groupby('SKU_Tier').agg({
+            tier_analysis = df_inventory.groupby('SKU_Tier', observed=True).agg({
                 'SKU_ID': 'count',
                 'Stock_Qty': 'sum',
                 'Avg_Monthly_Sales_3M': 'sum',
@@ -1050,72 +2558,33 @@ def calculate_inventory_metrics_with_3month_avg(df_stock, df_sales, df_product):
         st.error(f"Inventory metrics error: {str(e)}")
         return metrics
 
-def calculate_sales_vs_forecast_po(df_sales, df_forecast, df_po, df_product):
-    """Calculate sales vs forecast and PO comparison - HANYA ACTIVE SKUS"""
+def calculate_sales_vs_forecast_po(sku_month_facts, cube, product_dim):
+    """
+    Calculate sales vs forecast and PO comparison - HANYA ACTIVE SKUS (query ke fact table SKU x Month).
+    Bulan terakhir dicari dari presence cube, lalu hanya slice bulan itu yang dibaca dari fact table
+    """
     
     results = {}
     
-    if df_sales.empty or df_forecast.empty:
+    if sku_month_facts.empty:
         return results
     
     try:
-        # ADD PRODUCT INFO jika belum ada
-        df_sales = add_product_info_to_data(df_sales, df_product)
-        df_forecast = add_product_info_to_data(df_forecast, df_product)
-        df_po = add_product_info_to_data(df_po, df_product)
-        
-        # FILTER HANYA ACTIVE SKUS
-        if 'Status' in df_product.columns:
-            active_skus = df_product[df_product['Status'].str.upper() == 'ACTIVE']['SKU_ID'].tolist()
-            
-            # Filter semua dataset untuk hanya active SKUs
-            df_sales = df_sales[df_sales['SKU_ID'].isin(active_skus)]
-            df_forecast = df_forecast[df_forecast['SKU_ID'].isin(active_skus)]
-            if not df_po.empty:
-                df_po = df_po[df_po['SKU_ID'].isin(active_skus)]
-        
-        # Get last 3 months for comparison
-        sales_months = sorted(df_sales['Month'].unique())
-        forecast_months = sorted(df_forecast['Month'].unique())
-        po_months = sorted(df_po['Month'].unique())
-        
-        # Find common months
-        common_months = sorted(set(sales_months) & set(forecast_months) & set(po_months))
+        # Find common months (bulan yang ada di sales, forecast dan PO) - HANYA ACTIVE SKUS
+        active = cube_status_mask(cube, product_dim)
+        last_month = cube_last_common_month(cube, ['Sales_Qty', 'Forecast_Qty', 'PO_Qty'], active)
         
-        if not common_months:
+        if last_month is None:
             return results
         
-        # Use last common month
-        last_month = common_months[-1]
-        
-        # Get data for last month
-        df_sales_month = df_sales[df_sales['Month'] == last_month].copy()
-        df_forecast_month = df_forecast[df_forecast['Month'] == last_month].copy()
-        df_po_month = df_po[df_po['Month'] == last_month].copy()
-        
-        # Filter hanya SKU dengan Forecast_Qty > 0
-        df_forecast_month = df_forecast_month[df_forecast_month['Forecast_Qty'] > 0]
-        
-        # Merge all data
-        df_merged = pd.merge(
-            df_sales_month[['SKU_ID', 'Sales_Qty']],
-            df_forecast_month[['SKU_ID', 'Forecast_Qty']],
-            on='SKU_ID',
-            how='inner'
-        )
-        
-        df_merged = pd.merge(
-            df_merged,
-            df_po_month[['SKU_ID', 'PO_Qty']],
-            on='SKU_ID',
-            how='left'
-        )
-        
-        # Add product info
-        df_merged = add_product_info_to_data(df_merged, df_product)
-        
-        # Filter out SKU dengan PO_Qty = 0 (tidak ada PO) jika mau
-        # df_merged = df_merged[df_merged['PO_Qty'] > 0]
+        # SKU dengan sales & Forecast_Qty > 0 di bulan terakhir (PO opsional, tanpa PO -> NaN)
+        month_rows = month_facts(sku_month_facts, last_month)
+        if 'Status' in month_rows.columns:
+            month_rows = month_rows[month_rows['Status'].str.upper() == 'ACTIVE']
+        month_rows = month_rows[month_rows['Has_Sales'] & month_rows['Has_Forecast'] & (month_rows['Forecast_Qty'] > 0)]
+        product_cols = [col for col in PRODUCT_INFO_COLUMNS if col in month_rows.columns]
+        df_merged = month_rows[['SKU_ID', 'Sales_Qty', 'Forecast_Qty', 'PO_Qty'] + product_cols].reset_index(drop=True)
+        df_merged['PO_Qty'] = df_merged['PO_Qty'].where(month_rows['Has_PO'].to_numpy())
         
         # Calculate ratios
         df_merged['Sales_vs_Forecast_Ratio'] = np.where(
@@ -1162,45 +2631,23 @@ def calculate_sales_vs_forecast_po(df_sales, df_forecast, df_po, df_product):
         st.error(f"Sales vs forecast calculation error: {str(e)}")
         return results
 
-def calculate_brand_performance(df_forecast, df_po, df_product):
-    """Calculate forecast accuracy performance by brand"""
+def calculate_brand_performance(sku_month_facts, cube):
+    """Calculate forecast accuracy performance by brand (query ke fact table SKU x Month, bulan terakhir dari cube)"""
     
-    if df_forecast.empty or df_po.empty or df_product.empty:
+    if sku_month_facts.empty or 'Brand' not in sku_month_facts.columns:
         return pd.DataFrame()
     
     try:
-        # ADD PRODUCT INFO jika belum ada
-        df_forecast = add_product_info_to_data(df_forecast, df_product)
-        df_po = add_product_info_to_data(df_po, df_product)
-        
-        # Get last month data
-        forecast_months = sorted(df_forecast['Month'].unique())
-        po_months = sorted(df_po['Month'].unique())
-        common_months = sorted(set(forecast_months) & set(po_months))
+        # Get last month data (bulan terakhir yang ada forecast & PO)
+        last_month = cube_last_common_month(cube, ['Forecast_Qty', 'PO_Qty'])
         
-        if not common_months:
+        if last_month is None:
             return pd.DataFrame()
         
-        last_month = common_months[-1]
-        
-        # Get data for last month
-        df_forecast_month = df_forecast[df_forecast['Month'] == last_month].copy()
-        df_po_month = df_po[df_po['Month'] == last_month].copy()
-        
-        # Merge forecast and PO
-        df_merged = pd.merge(
-            df_forecast_month,
-            df_po_month,
-            on=['SKU_ID'],
-            how='inner'
-        )
-        
-        # Add brand info jika belum ada
-        if 'Brand' not in df_merged.columns:
-            df_merged = add_product_info_to_data(df_merged, df_product)
-        
-        if 'Brand' not in df_merged.columns:
-            return pd.DataFrame()
+        # SKU yang ada di forecast dan PO bulan terakhir
+        month_rows = month_facts(sku_month_facts, last_month)
+        month_rows = month_rows[month_rows['Has_Forecast'] & month_rows['Has_PO']]
+        df_merged = month_rows[['SKU_ID', 'Forecast_Qty', 'PO_Qty', 'Brand']].reset_index(drop=True)
         
         # Calculate ratio and accuracy
         df_merged['PO_Rofo_Ratio'] = np.where(
@@ -1217,23 +2664,25 @@ def calculate_brand_performance(df_forecast, df_po, df_product):
         ]
         choices = ['Under', 'Accurate', 'Over']
         df_merged['Accuracy_Status'] = np.select(conditions, choices, default='Unknown')
+        df_merged['Absolute_Percentage_Error'] = abs(df_merged['PO_Rofo_Ratio'] - 100)
         
         # Calculate brand performance
-        brand_performance = df_merged.groupby('Brand').agg({
+        brand_performance = df_merged.groupby('Brand', observed=True).agg({
             'SKU_ID': 'count',
             'Forecast_Qty': 'sum',
             'PO_Qty': 'sum',
-            'PO_Rofo_Ratio': lambda x: 100 - abs(x - 100).mean()  # Accuracy
+            'Absolute_Percentage_Error': 'mean'
         }).reset_index()
         
         brand_performance.columns = ['Brand', 'SKU_Count', 'Total_Forecast', 'Total_PO', 'Accuracy']
+        brand_performance['Accuracy'] = 100 - brand_performance['Accuracy']
         
         # Calculate additional metrics
         brand_performance['PO_vs_Forecast_Ratio'] = (brand_performance['Total_PO'] / brand_performance['Total_Forecast'] * 100)
         brand_performance['Qty_Difference'] = brand_performance['Total_PO'] - brand_performance['Total_Forecast']
         
         # Get status counts
-        status_counts = df_merged.groupby(['Brand', 'Accuracy_Status']).size().unstack(fill_value=0).reset_index()
+        status_counts = df_merged.groupby(['Brand', 'Accuracy_Status'], observed=True).size().unstack(fill_value=0).reset_index()
         
         # Merge with performance data
         brand_performance = pd.merge(brand_performance, status_counts, on='Brand', how='left')
@@ -1259,7 +2708,7 @@ def identify_profitability_segments(df_financial):
         return pd.DataFrame()
     
     try:
-        sku_profitability = df_financial.groupby(['SKU_ID', 'Product_Name', 'Brand']).agg({
+        sku_profitability = df_financial.groupby(['SKU_ID', 'Product_Name', 'Brand'], observed=True).agg({
             'Revenue': 'sum',
             'Gross_Margin': 'sum',
             'Sales_Qty': 'sum'
@@ -1336,22 +2785,295 @@ def validate_data_quality(df, df_name):
     
     return checks
 
+# --- ====================================================== ---
+# ---                METRICS LAYER (CACHED)                 ---
+# --- ====================================================== ---
+
+# Versi lama otomatis terbuang setelah data berubah beberapa kali
+METRICS_CACHE_ENTRIES = 4
+
+# Hasil per bulan (monthly performance & total financial) yang disimpan lintas versi dataset (~ beberapa tahun x beberapa versi)
+MONTH_RESULTS_MAX_ENTRIES = 480
+
+@st.cache_resource
+def get_month_results_store():
+    """
+    Store hasil per bulan untuk seluruh proses: key isi bulan -> hasil; entry terlama dibuang jika penuh.
+    Hasil (termasuk 'data') dipakai bersama semua session & versi dataset -> read-only.
+    Hanya di memori proses (tidak ikut snapshot Parquet): setelah restart semua bulan dihitung ulang sekali
+    """
+    return {'lock': threading.Lock(), 'entries': {}}
+
+def store_month_results(store, results):
+    """Simpan hasil per bulan baru ke store (FIFO, maksimal MONTH_RESULTS_MAX_ENTRIES)"""
+    with store['lock']:
+        store['entries'].update(results)
+        while len(store['entries']) > MONTH_RESULTS_MAX_ENTRIES:
+            store['entries'].pop(next(iter(store['entries'])))
+
+@st.cache_resource(max_entries=METRICS_CACHE_ENTRIES)
+def get_sku_month_facts(_data, dataset_version):
+    """
+    Fact table SKU x Month (build_sku_month_facts), dibangun sekali per versi dataset.
+    cache_resource: satu objek dipakai bersama semua session & rerun tanpa salinan -> jangan di-mutate,
+    query (filter / month_facts / sku_evaluation_data) selalu menghasilkan frame baru
+    """
+    sku_month_cube = _data.get('sku_month_cube') or build_sku_month_cube(_data)
+    return build_sku_month_facts(_data, sku_month_cube)
+
+# Sheet yang dibaca tiap kelompok metrics -> key cache kelompok tsb (lihat sheets_version)
+METRICS_SHEETS = {
+    'financial': ['Sales', 'Product_Master'],
+    'inventory': ['Stock_Onhand', 'Sales', 'Product_Master'],
+    'forecast': ['Rofo', 'PO', 'Product_Master'],
+    'sales_vs_forecast': ['Sales', 'Rofo', 'PO', 'Product_Master'],
+    # Sales vs Rofo + skala MASE (bulan berurutan di cube) ikut membaca Sales
+    'accuracy': ['Sales', 'Rofo', 'PO', 'Product_Master']
+}
+
+def sheets_version(data, sheet_names):
+    """
+    Key cache untuk hasil yang hanya membaca sheet tertentu: fingerprint sheet-sheet tsb dari loader
+    (data['sheet_fingerprints']). Edit sheet lain (mis. Stock_Onhand saja) tidak mengubah key -> hasil lama dipakai.
+    Fallback dataset_version jika ada fingerprint yang tidak tercatat (sheet gagal di-load)
+    """
+    fingerprints = data.get('sheet_fingerprints', {})
+    if all(fingerprints.get(name) for name in sheet_names):
+        return tuple(fingerprints[name] for name in sheet_names)
+    return (data.get('dataset_version'),)
+
+@st.cache_resource(max_entries=METRICS_CACHE_ENTRIES)
+def get_accuracy_library(_data, sheets_key):
+    """
+    Sel akurasi PO vs Rofo & Sales vs Rofo (build_accuracy_library), key = fingerprint METRICS_SHEETS['accuracy'].
+    Shared tanpa salinan seperti get_sku_month_facts -> tab cukup query lewat accuracy_table
+    """
+    sku_month_cube = _data.get('sku_month_cube') or build_sku_month_cube(_data)
+    return build_accuracy_library(sku_month_cube, _data.get('product_dim', pd.DataFrame()))
+
+def sku_search_version(data):
+    """
+    Key index pencarian: fingerprint Product_Master + digest daftar SKU cube (index hanya membaca SKU_ID & nama)
+    -> bulan baru / edit qty Sales, Rofo, PO tidak membangun ulang index. Fallback dataset_version
+    """
+    product_fingerprint = data.get('sheet_fingerprints', {}).get('Product_Master')
+    sku_month_cube = data.get('sku_month_cube')
+    if not product_fingerprint or sku_month_cube is None:
+        return (data.get('dataset_version'),)
+    sku_digest = hashlib.sha1(pd.util.hash_pandas_object(pd.Series(sku_month_cube['skus'], dtype=object), index=False).to_numpy().tobytes()).hexdigest()
+    return (product_fingerprint, sku_digest)
+
+@st.cache_resource(max_entries=METRICS_CACHE_ENTRIES)
+def get_sku_search_index(_data, search_key):
+    """Index pencarian SKU (build_sku_search_index), key = sku_search_version, dipakai bersama semua session"""
+    sku_month_cube = _data.get('sku_month_cube') or build_sku_month_cube(_data)
+    return build_sku_search_index(sku_month_cube['skus'], _data.get('product_dim', pd.DataFrame()))
+
+@st.cache_resource(max_entries=METRICS_CACHE_ENTRIES)
+def get_financial_metrics(_data, sheets_key):
+    """Financial per baris sales, seasonality & profitability segments (Sales + Product_Master)"""
+    df_financial = calculate_financial_metrics_all(_data.get('sales', pd.DataFrame()), _data.get('product', pd.DataFrame()))
+    return {
+        'financial': df_financial,
+        'seasonal_pattern': calculate_seasonality(df_financial, get_month_results_store(), financial_month_keys(_data)) if not df_financial.empty else pd.DataFrame(),
+        'profitability_segments': identify_profitability_segments(df_financial) if not df_financial.empty else pd.DataFrame()
+    }
+
+@st.cache_resource(max_entries=METRICS_CACHE_ENTRIES)
+def get_inventory_metrics(_data, sheets_key):
+    """Cover stock (avg sales 3 bulan) & nilai inventory (Stock_Onhand + Sales + Product_Master)"""
+    df_product = _data.get('product', pd.DataFrame())
+    df_stock = _data.get('stock', pd.DataFrame())
+    return {
+        'inventory_metrics': calculate_inventory_metrics_with_3month_avg(df_stock, _data.get('sales', pd.DataFrame()), df_product),
+        'inventory_financial': calculate_inventory_financial(df_stock, df_product)
+    }
+
+@st.cache_resource(max_entries=METRICS_CACHE_ENTRIES)
+def get_forecast_metrics(_data, sheets_key):
+    """Monthly performance, brand performance, bias & tracking signal (Rofo + PO + Product_Master)"""
+    sku_month_cube = _data.get('sku_month_cube') or build_sku_month_cube(_data)
+    monthly_performance = calculate_monthly_performance(
+        _data.get('forecast', pd.DataFrame()), _data.get('po', pd.DataFrame()), _data.get('product', pd.DataFrame()),
+        get_month_results_store(), monthly_performance_keys(_data)
+    )
+    return {
+        'monthly_performance': monthly_performance,
+        'last_3_months_performance': get_last_3_months_performance(monthly_performance),
+        'brand_performance': calculate_brand_performance(get_sku_month_facts(_data, _data.get('dataset_version')), sku_month_cube),
+        'forecast_bias': calculate_forecast_bias(sku_month_cube),
+        'bias_tracking': calculate_bias_tracking(sku_month_cube, _data.get('product_dim', pd.DataFrame()))
+    }
+
+@st.cache_resource(max_entries=METRICS_CACHE_ENTRIES)
+def get_sales_vs_forecast(_data, sheets_key):
+    """Sales vs Rofo vs PO bulan terakhir (Sales + Rofo + PO + Product_Master)"""
+    sku_month_cube = _data.get('sku_month_cube') or build_sku_month_cube(_data)
+    sku_month_facts = get_sku_month_facts(_data, _data.get('dataset_version'))
+    return {'sales_vs_forecast': calculate_sales_vs_forecast_po(sku_month_facts, sku_month_cube, _data.get('product_dim', pd.DataFrame()))}
+
+METRICS_GROUPS = {
+    'financial': get_financial_metrics,
+    'inventory': get_inventory_metrics,
+    'forecast': get_forecast_metrics,
+    'sales_vs_forecast': get_sales_vs_forecast
+}
+
+def calculate_dashboard_metrics(data):
+    """
+    Semua metrics turunan. Tiap kelompok (METRICS_GROUPS) di-cache sendiri dengan key fingerprint sheet yang dibacanya
+    -> edit satu sheet hanya menghitung ulang kelompok yang membaca sheet tsb, sisanya lookup O(1) tiap rerun.
+    cache_resource: hasil dipakai bersama semua session seperti get_sku_month_facts -> read-only, copy dulu sebelum di-mutate
+    """
+    metrics = {}
+    for group, getter in METRICS_GROUPS.items():
+        metrics.update(getter(data, sheets_version(data, METRICS_SHEETS[group])))
+    return metrics
+
+# --- DISPLAY FORMAT (COLUMN CONFIG) ---
+# Kolom angka tetap numeric (sorting di grid benar, tanpa f-string per sel);
+# format Rupiah / % / qty dipasang saat render lewat st.column_config
+NUMBER_FORMATS = {
+    'rupiah': "Rp %,.0f",
+    'qty': "%,.0f",
+    'qty_signed': "%+,.0f",
+    'integer': "%.0f",
+    'decimal': "%.1f",
+    'percent': "%.1f%%",
+    'percent_2': "%.2f%%"
+}
+
+def format_columns(formats, columns=None):
+    """{kolom: jenis di NUMBER_FORMATS} -> column_config untuk st.dataframe; columns: hanya kolom yang ada"""
+    return {
+        col: st.column_config.NumberColumn(format=NUMBER_FORMATS[kind])
+        for col, kind in formats.items() if columns is None or col in columns
+    }
+
+def style_formats(styler, formats):
+    """Tabel ber-Styler: display value Styler menimpa column_config, jadi format yang sama dipasang via Styler.format"""
+    return styler.format({
+        col: re.sub(r'%([+,.\d]*[df])', r'{:\1}', NUMBER_FORMATS[kind]).replace('%%', '%')
+        for col, kind in formats.items() if col in styler.data.columns
+    }, na_rep='')
+
+def cover_months_display(cover_months):
+    """Cover 999 (SKU tanpa sales) -> NaN supaya tampil kosong, kolom tetap numeric"""
+    return cover_months.where(cover_months < 999)
+
+# --- TABLE STYLING (CSS MATRIX) ---
+# CSS seluruh tabel dihitung sekali dari array nilai (np.select / map kolom kunci),
+# lalu dipasang dengan satu Styler.apply(axis=None) -> tanpa fungsi Python per sel / per baris
+STOCK_HEATMAP_LIMITS = [100, 1000, 5000, 10000]
+STOCK_HEATMAP_STYLES = [
+    'background-color: #F5F5F5; color: #999',                       # = 0
+    'background-color: #E8F5E9; color: #000',                       # < 100
+    'background-color: #C8E6C9; color: #000',                       # < 1,000
+    'background-color: #A5D6A7; color: #000',                       # < 5,000
+    'background-color: #81C784; color: #000',                       # < 10,000
+    'background-color: #4CAF50; color: white; font-weight: bold'    # >= 10,000
+]
+TOTAL_ROW_CSS = 'background-color: #E3F2FD; font-weight: bold'
+
+EXPIRY_ROW_CSS = {
+    '❌ EXPIRED': 'background-color: #FFEBEE; color: #C62828',
+    '🚨 Critical (<30 days)': 'background-color: #FFF3E0; color: #EF6C00',
+    '⚠️ NED (1-3 months)': 'background-color: #FFF8E1; color: #FF8F00'
+}
+STATUS_ROW_CSS = {
+    'Active': '',
+    'Inactive': 'background-color: #F5F5F5; color: #757575'
+}
+STATUS_OTHER_CSS = 'background-color: #ECEFF1; color: #546E7A'
+
+@st.cache_data(show_spinner=False)
+def stock_heatmap_css(pivot):
+    """Pivot stok -> matrix CSS heatmap (np.select sekali untuk semua sel); baris TOTAL di-highlight"""
+    values = pivot.to_numpy(dtype=float)
+    conditions = [values == 0] + [values < limit for limit in STOCK_HEATMAP_LIMITS]
+    css = pd.DataFrame(
+        np.select(conditions, STOCK_HEATMAP_STYLES[:-1], STOCK_HEATMAP_STYLES[-1]),
+        index=pivot.index, columns=pivot.columns
+    )
+    if 'TOTAL' in css.index:
+        css.loc['TOTAL'] = css.loc['TOTAL'] + '; ' + TOTAL_ROW_CSS
+    return css
+
+def row_css(frame, rules):
+    """
+    rules: [(kolom, {nilai: css}, css default)] -> matrix CSS seukuran frame.
+    Warna baris mengikuti nilai kolom kunci (map vectorized); beberapa rule digabung berurutan
+    """
+    row_styles = pd.Series('', index=frame.index)
+    for column, css_map, default in rules:
+        if column in frame.columns:
+            styles = frame[column].astype(object).map(css_map).fillna(default)
+            row_styles = (row_styles + '; ' + styles).str.strip('; ')
+    return pd.DataFrame(
+        np.repeat(row_styles.to_numpy()[:, None], frame.shape[1], axis=1),
+        index=frame.index, columns=frame.columns
+    )
+
+# --- DOWNLOAD PAYLOADS ---
+# File export dibuat saat tombol diklik (data=callable), bukan tiap rerun;
+# hasil serialisasi di-cache per (dataset, versi data, format)
+DOWNLOAD_FORMATS = {
+    'CSV': {'ext': 'csv', 'mime': 'text/csv'},
+    'CSV (gzip)': {'ext': 'csv.gz', 'mime': 'application/gzip'},
+    'Parquet': {'ext': 'parquet', 'mime': 'application/vnd.apache.parquet'}
+}
+DOWNLOAD_CACHE_ENTRIES = 16
+
+@st.cache_data(show_spinner=False, max_entries=DOWNLOAD_CACHE_ENTRIES)
+def download_payload(_df, dataset_key, version, file_format):
+    """DataFrame -> bytes file export; key cache hanya (dataset_key, version, file_format)"""
+    if file_format == 'Parquet':
+        buffer = io.BytesIO()
+        try:
+            _df.to_parquet(buffer, index=False)
+        except Exception:
+            # Kolom object dengan tipe campuran (int + str) tidak bisa ke Arrow -> simpan sebagai string
+            buffer = io.BytesIO()
+            mixed_cols = _df.select_dtypes(include='object').columns
+            _df.astype({col: 'string' for col in mixed_cols}).to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    
+    csv_bytes = _df.to_csv(index=False).encode('utf-8')
+    return gzip.compress(csv_bytes) if file_format == 'CSV (gzip)' else csv_bytes
+
+def download_data_button(label, df, dataset_key, version, file_stem, key, **button_kwargs):
+    """Pilihan format + st.download_button; payload baru dibuat (atau diambil dari cache) saat diklik"""
+    file_format = st.radio("Format", list(DOWNLOAD_FORMATS), horizontal=True, key=f"{key}_format")
+    spec = DOWNLOAD_FORMATS[file_format]
+    return st.download_button(
+        label=label,
+        data=lambda: download_payload(df, dataset_key, version, file_format),
+        file_name=f"{file_stem}.{spec['ext']}",
+        mime=spec['mime'],
+        key=key,
+        **button_kwargs
+    )
+
 # --- ====================================================== ---
 # ---                DASHBOARD INITIALIZATION               ---
 # --- ====================================================== ---
 
-# Initialize connection
-client = init_gsheet_connection()
+# Initialize data source (Google Sheets / folder file lokal)
+data_source = get_data_source()
 
-if client is None:
+if data_source is None:
     st.error("❌ Tidak dapat terhubung ke Google Sheets")
     st.stop()
 
 # Load and process data
 with st.spinner('🔄 Loading and processing data from Google Sheets...'):
-    all_data = load_and_process_data(client)
+    all_data = get_dashboard_data(data_source)
+    
+    for level, message in all_data.get('load_messages', []):
+        getattr(st, level)(message)
     
     df_product = all_data.get('product', pd.DataFrame())
+    product_dim = all_data.get('product_dim', pd.DataFrame())
     df_product_active = all_data.get('product_active', pd.DataFrame())
     df_sales = all_data.get('sales', pd.DataFrame())
     df_forecast = all_data.get('forecast', pd.DataFrame())
@@ -1371,19 +3093,30 @@ with st.spinner('🔄 Loading and processing data from Google Sheets...'):
     # Untuk backward compatibility (jika ada script yang masih pakai nama lama)
     df_rofo_onwards = df_ecomm_forecast  # Alias untuk Tab 7
     rofo_onwards_month_cols = ecomm_forecast_month_cols  # Alias untuk Tab 7
+    
+    # SKU x Month cube (dibangun sekali per dataset di data store)
+    sku_month_cube = all_data.get('sku_month_cube') or build_sku_month_cube(all_data)
 
-# Calculate metrics
-monthly_performance = calculate_monthly_performance(df_forecast, df_po, df_product)
-last_3_months_performance = get_last_3_months_performance(monthly_performance)
-inventory_metrics = calculate_inventory_metrics_with_3month_avg(df_stock, df_sales, df_product)
-sales_vs_forecast = calculate_sales_vs_forecast_po(df_sales, df_forecast, df_po, df_product)
+# Fact table SKU x Month (per versi dataset), sel akurasi & index SKU (per fingerprint sheet yang dibaca) untuk semua tab
+dataset_version = all_data.get('dataset_version')
+sku_month_facts = get_sku_month_facts(all_data, dataset_version)
+accuracy_library = get_accuracy_library(all_data, sheets_version(all_data, METRICS_SHEETS['accuracy']))
+sku_search_index = get_sku_search_index(all_data, sku_search_version(all_data))
 
-# Calculate financial metrics
-df_financial = calculate_financial_metrics_all(df_sales, df_product)
-df_inventory_financial = calculate_inventory_financial(df_stock, df_product)
-seasonal_pattern = calculate_seasonality(df_financial) if not df_financial.empty else pd.DataFrame()
-forecast_bias = calculate_forecast_bias(df_forecast, df_po)
-profitability_segments = identify_profitability_segments(df_financial) if not df_financial.empty else pd.DataFrame()
+# Calculate metrics (cached per kelompok & fingerprint sheet, lihat calculate_dashboard_metrics)
+dashboard_metrics = calculate_dashboard_metrics(all_data)
+monthly_performance = dashboard_metrics['monthly_performance']
+last_3_months_performance = dashboard_metrics['last_3_months_performance']
+inventory_metrics = dashboard_metrics['inventory_metrics']
+sales_vs_forecast = dashboard_metrics['sales_vs_forecast']
+
+# Financial metrics
+df_financial = dashboard_metrics['financial']
+df_inventory_financial = dashboard_metrics['inventory_financial']
+seasonal_pattern = dashboard_metrics['seasonal_pattern']
+forecast_bias = dashboard_metrics['forecast_bias']
+bias_tracking = dashboard_metrics['bias_tracking']
+profitability_segments = dashboard_metrics['profitability_segments']
 
 # --- SIDEBAR ---
 with st.sidebar:
@@ -1392,13 +3125,28 @@ with st.sidebar:
     col_sb1, col_sb2 = st.columns(2)
     with col_sb1:
         if st.button("🔄 Refresh Data", use_container_width=True, type="primary"):
-            st.cache_data.clear()
+            # Hanya sheet yang berubah yang di-parse ulang; cache calculate_* untuk input yang sama tetap dipakai
+            with st.spinner(f"🔄 Refreshing data from {data_source['label']}..."):
+                refresh_dashboard_data(data_source)
             st.rerun()
     
     with col_sb2:
         if st.button("📊 Show Data Stats", use_container_width=True):
             st.session_state.show_stats = True
-            
+
+    # Umur data & status background refresh
+    data_status = get_data_status(data_source)
+    source_label = {'gsheet': 'Google Sheets', 'local': 'Local files', 'snapshot': 'Snapshot (disk)'}.get(data_status['source'], '-')
+    if data_status['revalidating']:
+        refresh_label = "🔄 Refreshing in background..."
+    elif data_status['last_error']:
+        refresh_label = f"⚠️ Last refresh failed: {data_status['last_error']}"
+    elif data_status['age_seconds'] is not None and data_status['age_seconds'] >= DATA_TTL_SECONDS:
+        refresh_label = "⏳ Refresh scheduled"
+    else:
+        refresh_label = "✅ Up to date"
+    st.caption(f"🕒 Data age: {format_data_age(data_status['age_seconds'])} · Source: {source_label}  \n{refresh_label}")
+
     # --- TAMBAHAN: TOMBOL CETAK PDF ---
     st.markdown("---")
     import streamlit.components.v1 as components
@@ -1490,6 +3238,22 @@ if 'show_stats' in st.session_state and st.session_state.show_stats:
             with st.sidebar.expander(f"{df_name} Data"):
                 for check_name, check_result in checks.items():
                     st.write(f"{check_name}: {check_result}")
+    
+    # Memory per dataset sebelum / sesudah compaction (categorical + downcast)
+    memory_report = all_data.get('memory_report', [])
+    if memory_report:
+        df_memory = pd.DataFrame(memory_report)
+        df_memory['Before_MB'] = df_memory['Before_Bytes'] / 1024 ** 2
+        df_memory['After_MB'] = df_memory['After_Bytes'] / 1024 ** 2
+        df_memory['Saved_%'] = (1 - df_memory['After_Bytes'] / df_memory['Before_Bytes'].where(df_memory['Before_Bytes'] > 0)) * 100
+        with st.sidebar.expander("💾 Memory Usage"):
+            st.dataframe(
+                df_memory[['Dataset', 'Rows', 'Before_MB', 'After_MB', 'Saved_%']].style.format({
+                    'Rows': '{:,.0f}', 'Before_MB': '{:.2f}', 'After_MB': '{:.2f}', 'Saved_%': '{:.0f}%'
+                }, na_rep='-'),
+                use_container_width=True, hide_index=True
+            )
+            st.caption(f"Total: {df_memory['Before_Bytes'].sum() / 1024 ** 2:.1f} MB → {df_memory['After_Bytes'].sum() / 1024 ** 2:.1f} MB")
 
 # --- MAIN DASHBOARD ---
 
@@ -1795,52 +3559,12 @@ if monthly_performance:
         eval_tab1, eval_tab2 = st.tabs([f"📉 UNDER Forecast ({last_month_name})", f"📈 OVER Forecast ({last_month_name})"])
         
         with eval_tab1:
-            under_skus_df = last_month_data['under_skus']
+            under_skus_df = get_status_skus(last_month_data, 'Under')
             if not under_skus_df.empty:
-                # Add inventory data
-                if 'inventory_df' in inventory_metrics:
-                    inventory_data = inventory_metrics['inventory_df'][['SKU_ID', 'Stock_Qty', 'Avg_Monthly_Sales_3M', 'Cover_Months']]
-                    under_skus_df = pd.merge(under_skus_df, inventory_data, on='SKU_ID', how='left')
-                
-                # TAMBAH: Get last 3 months sales data
-                sales_cols_last_3 = []
-                if not df_sales.empty:
-                    # Get last 3 months from sales data
-                    sales_months = sorted(df_sales['Month'].unique())
-                    if len(sales_months) >= 3:
-                        last_3_sales_months = sales_months[-3:]
-                        
-                        # Create pivot for last 3 months sales
-                        try:
-                            sales_pivot = df_sales[df_sales['Month'].isin(last_3_sales_months)].pivot_table(
-                                index='SKU_ID',
-                                columns='Month',
-                                values='Sales_Qty',
-                                aggfunc='sum',
-                                fill_value=0
-                            ).reset_index()
-                            
-                            # Rename columns to month names
-                            month_rename = {}
-                            for col in sales_pivot.columns:
-                                if isinstance(col, datetime):
-                                    month_rename[col] = col.strftime('%b-%Y')
-                            sales_pivot = sales_pivot.rename(columns=month_rename)
-                            
-                            # Merge with under_skus_df
-                            under_skus_df = pd.merge(
-                                under_skus_df,
-                                sales_pivot,
-                                on='SKU_ID',
-                                how='left'
-                            )
-                            
-                            # Get the sales column names
-                            sales_cols_last_3 = [col for col in sales_pivot.columns if isinstance(col, str) and '-' in col]
-                            sales_cols_last_3 = sorted(sales_cols_last_3[-3:])  # Get last 3 months
-                            
-                        except Exception as e:
-                            st.warning(f"Tidak bisa menambahkan data sales 3 bulan terakhir: {str(e)}")
+                # Add inventory data & sales 3 bulan terakhir (fact table, 1x merge)
+                evaluation_data, sales_cols_last_3 = sku_evaluation_data(sku_month_facts, sku_month_cube, last_month)
+                under_skus_df = pd.merge(under_skus_df, evaluation_data, on='SKU_ID', how='left')
+                sales_cols_last_3 = sorted(sales_cols_last_3)
                 
                 # Prepare display columns - TAMBAH sales columns
                 display_cols = ['SKU_ID', 'Product_Name', 'Brand', 'SKU_Tier', 'Accuracy_Status',
@@ -1860,20 +3584,14 @@ if monthly_performance:
                 # Format the dataframe
                 display_df = under_skus_df[available_cols].copy()
                 
-                # Add formatted columns
-                if 'PO_Rofo_Ratio' in display_df.columns:
-                    display_df['PO_Rofo_Ratio'] = display_df['PO_Rofo_Ratio'].apply(lambda x: f"{x:.1f}%")
-                
+                # Kolom tetap numeric, format di column_config saat render
                 if 'Cover_Months' in display_df.columns:
-                    display_df['Cover_Months'] = display_df['Cover_Months'].apply(lambda x: f"{x:.1f}" if x < 999 else "N/A")
-                
-                if 'Avg_Monthly_Sales_3M' in display_df.columns:
-                    display_df['Avg_Monthly_Sales_3M'] = display_df['Avg_Monthly_Sales_3M'].apply(lambda x: f"{x:.0f}")
+                    display_df['Cover_Months'] = cover_months_display(display_df['Cover_Months'])
                 
-                # Format sales columns
+                # Sales columns: SKU tanpa sales -> 0
                 for col in sales_cols_last_3:
                     if col in display_df.columns:
-                        display_df[col] = display_df[col].apply(lambda x: f"{x:.0f}" if pd.notnull(x) else "0")
+                        display_df[col] = display_df[col].fillna(0)
                 
                 # Rename columns for display
                 column_names = {
@@ -1898,6 +3616,10 @@ if monthly_performance:
                 
                 st.dataframe(
                     display_df,
+                    column_config=format_columns(
+                        {'PO/Rofo %': 'percent', 'Cover (Months)': 'decimal', 'Avg Sales (3M)': 'integer', **{col: 'integer' for col in sales_cols_last_3}},
+                        display_df.columns
+                    ),
                     use_container_width=True,
                     height=500
                 )
@@ -1963,52 +3685,12 @@ if monthly_performance:
                 st.success(f"✅ No SKUs with UNDER forecast in {last_month_name}")
         
         with eval_tab2:
-            over_skus_df = last_month_data['over_skus']
+            over_skus_df = get_status_skus(last_month_data, 'Over')
             if not over_skus_df.empty:
-                # Add inventory data
-                if 'inventory_df' in inventory_metrics:
-                    inventory_data = inventory_metrics['inventory_df'][['SKU_ID', 'Stock_Qty', 'Avg_Monthly_Sales_3M', 'Cover_Months']]
-                    over_skus_df = pd.merge(over_skus_df, inventory_data, on='SKU_ID', how='left')
-                
-                # TAMBAH: Get last 3 months sales data
-                sales_cols_last_3 = []
-                if not df_sales.empty:
-                    # Get last 3 months from sales data
-                    sales_months = sorted(df_sales['Month'].unique())
-                    if len(sales_months) >= 3:
-                        last_3_sales_months = sales_months[-3:]
-                        
-                        # Create pivot for last 3 months sales
-                        try:
-                            sales_pivot = df_sales[df_sales['Month'].isin(last_3_sales_months)].pivot_table(
-                                index='SKU_ID',
-                                columns='Month',
-                                values='Sales_Qty',
-                                aggfunc='sum',
-                                fill_value=0
-                            ).reset_index()
-                            
-                            # Rename columns to month names
-                            month_rename = {}
-                            for col in sales_pivot.columns:
-                                if isinstance(col, datetime):
-                                    month_rename[col] = col.strftime('%b-%Y')
-                            sales_pivot = sales_pivot.rename(columns=month_rename)
-                            
-                            # Merge with over_skus_df
-                            over_skus_df = pd.merge(
-                                over_skus_df,
-                                sales_pivot,
-                                on='SKU_ID',
-                                how='left'
-                            )
-                            
-                            # Get the sales column names
-                            sales_cols_last_3 = [col for col in sales_pivot.columns if isinstance(col, str) and '-' in col]
-                            sales_cols_last_3 = sorted(sales_cols_last_3[-3:])  # Get last 3 months
-                            
-                        except Exception as e:
-                            st.warning(f"Tidak bisa menambahkan data sales 3 bulan terakhir: {str(e)}")
+                # Add inventory data & sales 3 bulan terakhir (fact table, 1x merge)
+                evaluation_data, sales_cols_last_3 = sku_evaluation_data(sku_month_facts, sku_month_cube, last_month)
+                over_skus_df = pd.merge(over_skus_df, evaluation_data, on='SKU_ID', how='left')
+                sales_cols_last_3 = sorted(sales_cols_last_3)
                 
                 # Prepare display columns - TAMBAH sales columns
                 display_cols = ['SKU_ID', 'Product_Name', 'Brand', 'SKU_Tier', 'Accuracy_Status',
@@ -2028,20 +3710,14 @@ if monthly_performance:
                 # Format the dataframe
                 display_df = over_skus_df[available_cols].copy()
                 
-                # Add formatted columns
-                if 'PO_Rofo_Ratio' in display_df.columns:
-                    display_df['PO_Rofo_Ratio'] = display_df['PO_Rofo_Ratio'].apply(lambda x: f"{x:.1f}%")
-                
+                # Kolom tetap numeric, format di column_config saat render
                 if 'Cover_Months' in display_df.columns:
-                    display_df['Cover_Months'] = display_df['Cover_Months'].apply(lambda x: f"{x:.1f}" if x < 999 else "N/A")
+                    display_df['Cover_Months'] = cover_months_display(display_df['Cover_Months'])
                 
-                if 'Avg_Monthly_Sales_3M' in display_df.columns:
-                    display_df['Avg_Monthly_Sales_3M'] = display_df['Avg_Monthly_Sales_3M'].apply(lambda x: f"{x:.0f}")
-                
-                # Format sales columns
+                # Sales columns: SKU tanpa sales -> 0
                 for col in sales_cols_last_3:
                     if col in display_df.columns:
-                        display_df[col] = display_df[col].apply(lambda x: f"{x:.0f}" if pd.notnull(x) else "0")
+                        display_df[col] = display_df[col].fillna(0)
                 
                 # Rename columns for display
                 column_names = {
@@ -2066,6 +3742,10 @@ if monthly_performance:
                 
                 st.dataframe(
                     display_df,
+                    column_config=format_columns(
+                        {'PO/Rofo %': 'percent', 'Cover (Months)': 'decimal', 'Avg Sales (3M)': 'integer', **{col: 'integer' for col in sales_cols_last_3}},
+                        display_df.columns
+                    ),
                     use_container_width=True,
                     height=500
                 )
@@ -2132,22 +3812,43 @@ if monthly_performance:
 
 st.divider()
 
-# --- MAIN TABS ---
-tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10 = st.tabs([
-    "📈 Monthly Performance Details",
-    "🏷️ Forecast Performance by Brand & Tier Analysis",
-    "📦 Inventory Analysis",
-    "🔍 SKU Evaluation",
-    "📈 Sales & Forecast Analysis",
-    "📋 Data Explorer",
-    "🛒 Ecommerce Forecast",  
-    "💰 Profitability Analysis",
-    "🤝 Reseller Forecast",
-    "🚚 Fulfillment Cost Analysis" # <-- TAB BARU
-])
+# --- MAIN SECTIONS (LAZY: HANYA SECTION AKTIF YANG DIJALANKAN) ---
+# Pengganti st.tabs (yang menjalankan isi kesepuluh tab tiap rerun): pilihan section disimpan di session state,
+# data bersama tetap dari cache -> interaksi widget hanya menghitung 1 section
+DASHBOARD_SECTIONS = {
+    'monthly': "📈 Monthly Performance Details",
+    'brand_tier': "🏷️ Forecast Performance by Brand & Tier Analysis",
+    'inventory': "📦 Inventory Analysis",
+    'sku_evaluation': "🔍 SKU Evaluation",
+    'sales_forecast': "📈 Sales & Forecast Analysis",
+    'data_explorer': "📋 Data Explorer",
+    'ecomm': "🛒 Ecommerce Forecast",
+    'profitability': "💰 Profitability Analysis",
+    'reseller': "🤝 Reseller Forecast",
+    'fulfillment': "🚚 Fulfillment Cost Analysis"
+}
+# Mode print / PDF: semua section dirender berurutan (1 section per halaman)
+ALL_SECTIONS = "🖨️ All Sections (Print)"
+
+active_section = st.radio(
+    "Section",
+    options=list(DASHBOARD_SECTIONS) + [ALL_SECTIONS],
+    format_func=lambda key: DASHBOARD_SECTIONS.get(key, key),
+    horizontal=True,
+    key="active_section",
+    label_visibility="collapsed"
+)
+
+def render_section(key):
+    """True jika section `key` perlu dijalankan: section aktif, atau semua section di mode print"""
+    if active_section == ALL_SECTIONS:
+        st.markdown('<div class="print-section-break"></div>', unsafe_allow_html=True)
+        st.header(DASHBOARD_SECTIONS[key])
+        return True
+    return active_section == key
 
 # --- TAB 1: MONTHLY PERFORMANCE DETAILS ---
-with tab1:
+if render_section('monthly'):
     st.subheader("📅 Monthly Performance Details")
     
     if monthly_performance:
@@ -2205,13 +3906,48 @@ with tab1:
             )
             
             st.plotly_chart(fig_bias, use_container_width=True)
+        
+        # Tracking signal: bias kumulatif / MAD per brand & SKU
+        if not bias_tracking['sku'].empty:
+            st.divider()
+            st.subheader("🎯 Forecast Drift (Tracking Signal)")
+            st.caption(f"Tracking Signal = Cumulative Bias (PO - Rofo) / MAD. |TS| > {TRACKING_SIGNAL_LIMIT} = forecast drifting")
+            
+            tracking_config = {
+                "Cumulative_Bias": st.column_config.NumberColumn("Cumulative Bias", format="%.0f"),
+                "Avg_Bias": st.column_config.NumberColumn("Avg Bias", format="%.1f"),
+                "MAD": st.column_config.NumberColumn("MAD", format="%.1f"),
+                "Tracking_Signal": st.column_config.NumberColumn("Tracking Signal", format="%.2f")
+            }
+            
+            if not bias_tracking['brand'].empty:
+                st.markdown("**By Brand**")
+                st.dataframe(
+                    bias_tracking['brand'].sort_values('Tracking_Signal', key=abs, ascending=False),
+                    column_config=tracking_config,
+                    use_container_width=True,
+                    hide_index=True
+                )
+            
+            drifting_skus = bias_tracking['sku'][bias_tracking['sku']['Drift'] != 'In Control']
+            st.markdown(f"**Drifting SKUs ({len(drifting_skus)} of {len(bias_tracking['sku'])})**")
+            if not drifting_skus.empty:
+                st.dataframe(
+                    drifting_skus.sort_values('Tracking_Signal', key=abs, ascending=False),
+                    column_config=tracking_config,
+                    use_container_width=True,
+                    hide_index=True,
+                    height=400
+                )
+            else:
+                st.success("✅ Tidak ada SKU dengan tracking signal di luar batas")
 
 # --- TAB 2: FORECAST PERFORMANCE BY BRAND & TIER ANALYSIS ---
-with tab2:
+if render_section('brand_tier'):
     # Brand Performance Analysis
     st.subheader("🏷️ Forecast Performance by Brand")
     
-    brand_performance = calculate_brand_performance(df_forecast, df_po, df_product)
+    brand_performance = dashboard_metrics['brand_performance']
     
     if not brand_performance.empty:
         # ================ KPI CARDS SECTION ================
@@ -2272,7 +4008,7 @@ with tab2:
         st.subheader("💰 Brand Financial Performance")
         
         if not df_financial.empty:
-            brand_financial = df_financial.groupby('Brand').agg({
+            brand_financial = df_financial.groupby('Brand', observed=True).agg({
                 'Revenue': 'sum',
                 'Gross_Margin': 'sum',
                 'Sales_Qty': 'sum'
@@ -2289,15 +4025,13 @@ with tab2:
             col1, col2 = st.columns(2)
             
             with col1:
-                # --- UPDATE: Format angka jadi String biar ada komanya (Rp 1,000,000) ---
-                brand_disp = brand_financial.head(10).copy()
-                brand_disp['Revenue'] = brand_disp['Revenue'].apply(lambda x: f"Rp {x:,.0f}")
-                brand_disp['Gross_Margin'] = brand_disp['Gross_Margin'].apply(lambda x: f"Rp {x:,.0f}")
+                # Revenue & Gross Margin tetap numeric, tampil Rp 1,000,000 via column_config
+                brand_disp = brand_financial.head(10)
                 
                 st.dataframe(
                     brand_disp,
                     column_config={
-                        # Revenue & Gross Margin gak perlu config lagi karena sudah jadi Text di atas
+                        **format_columns({'Revenue': 'rupiah', 'Gross_Margin': 'rupiah'}),
                         "Margin_Percentage": st.column_config.ProgressColumn("Margin %", format="%.1f%%", min_value=0, max_value=100)
                     },
                     use_container_width=True
@@ -2320,13 +4054,6 @@ with tab2:
         # Format the display
         display_brand_df = brand_performance.copy()
         
-        # Format columns
-        display_brand_df['Accuracy'] = display_brand_df['Accuracy'].apply(lambda x: f"{x:.1f}%")
-        display_brand_df['PO_vs_Forecast_Ratio'] = display_brand_df['PO_vs_Forecast_Ratio'].apply(lambda x: f"{x:.1f}%")
-        display_brand_df['Total_Forecast'] = display_brand_df['Total_Forecast'].apply(lambda x: f"{x:,.0f}")
-        display_brand_df['Total_PO'] = display_brand_df['Total_PO'].apply(lambda x: f"{x:,.0f}")
-        display_brand_df['Qty_Difference'] = display_brand_df['Qty_Difference'].apply(lambda x: f"{x:+,.0f}")
-        
         # Rename columns
         column_names = {
             'Brand': 'Brand',
@@ -2346,6 +4073,10 @@ with tab2:
         # Display table
         st.dataframe(
             display_brand_df,
+            column_config=format_columns({
+                'Total Rofo': 'qty', 'Total PO': 'qty', 'Accuracy %': 'percent',
+                'PO/Rofo %': 'percent', 'Qty Diff': 'qty_signed'
+            }),
             use_container_width=True,
             height=400
         )
@@ -2370,42 +4101,19 @@ with tab2:
         if last_month:
             st.caption(f"📅 Data untuk bulan: {last_month.strftime('%b %Y')}")
             
-            # Get data untuk bulan terakhir
-            df_forecast_last = df_forecast[df_forecast['Month'] == last_month]
-            df_po_last = df_po[df_po['Month'] == last_month]
-            df_sales_last = df_sales[df_sales['Month'] == last_month]
+            # Get data untuk bulan terakhir (fact table)
+            month_rows = month_facts(sku_month_facts, last_month)
             
             # Debug info
-            st.caption(f"Forecast SKUs: {len(df_forecast_last)} | PO SKUs: {len(df_po_last)} | Sales SKUs: {len(df_sales_last)}")
-            
-            # Add product info
-            df_forecast_last = add_product_info_to_data(df_forecast_last, df_product)
-            df_po_last = add_product_info_to_data(df_po_last, df_product)
-            df_sales_last = add_product_info_to_data(df_sales_last, df_product)
-            
-            if 'Brand' in df_forecast_last.columns:
-                # Get UNIQUE BRANDS dari semua dataset
-                forecast_brands = set(df_forecast_last['Brand'].dropna().unique())
-                po_brands = set(df_po_last['Brand'].dropna().unique()) if 'Brand' in df_po_last.columns else set()
-                sales_brands = set(df_sales_last['Brand'].dropna().unique()) if 'Brand' in df_sales_last.columns else set()
-                
-                # Gabungkan semua brand
-                all_brands = forecast_brands.union(po_brands).union(sales_brands)
+            st.caption(f"Forecast SKUs: {int(month_rows['Has_Forecast'].sum())} | PO SKUs: {int(month_rows['Has_PO'].sum())} | Sales SKUs: {int(month_rows['Has_Sales'].sum())}")
+            
+            if 'Brand' in month_rows.columns:
+                # Total per brand untuk semua brand yang ada di salah satu dataset
+                brand_totals = month_rows.groupby('Brand', observed=True)[['Forecast_Qty', 'PO_Qty', 'Sales_Qty']].sum()
                 
                 brand_comparison = []
                 
-                for brand in sorted(all_brands):
-                    # Forecast
-                    rofo_qty = df_forecast_last[df_forecast_last['Brand'] == brand]['Forecast_Qty'].sum()
-                    
-                    # PO
-                    po_qty = df_po_last[df_po_last['Brand'] == brand]['PO_Qty'].sum() if 'Brand' in df_po_last.columns else 0
-                    
-                    # Sales
-                    sales_qty = 0
-                    if not df_sales_last.empty and 'Brand' in df_sales_last.columns:
-                        sales_qty = df_sales_last[df_sales_last['Brand'] == brand]['Sales_Qty'].sum()
-                    
+                for brand, rofo_qty, po_qty, sales_qty in brand_totals.itertuples(name=None):
                     brand_comparison.append({
                         'Brand': brand,
                         'Rofo': rofo_qty,
@@ -2714,6 +4422,66 @@ with tab2:
     
     st.divider()
     
+    # ================ ACCURACY METRICS SECTION ================
+    st.subheader("📐 Forecast Accuracy Metrics")
+    
+    col_acc1, col_acc2, col_acc3 = st.columns(3)
+    with col_acc1:
+        accuracy_comparison = st.selectbox("Comparison", list(ACCURACY_COMPARISONS), key="accuracy_comparison")
+    with col_acc2:
+        accuracy_level = st.selectbox("Level", list(ACCURACY_LEVELS), index=1, key="accuracy_level")
+    with col_acc3:
+        accuracy_period = st.selectbox("Period", ["Last Month", "Last 3 Months", "All Months"], key="accuracy_period")
+    
+    accuracy_cells = accuracy_library[accuracy_comparison]
+    if not accuracy_cells.empty:
+        accuracy_months = accuracy_cells['Month'].drop_duplicates().sort_values()
+        period_months = {'Last Month': 1, 'Last 3 Months': 3}.get(accuracy_period)
+        if period_months:
+            accuracy_months = accuracy_months.iloc[-period_months:]
+        
+        accuracy_summary = accuracy_table(accuracy_cells, accuracy_level, months=accuracy_months)
+        st.caption(
+            f"{accuracy_months.iloc[0].strftime('%b %Y')} - {accuracy_months.iloc[-1].strftime('%b %Y')} | "
+            "MAPE/sMAPE = rata-rata per SKU-bulan, WAPE = Σ|Actual - Rofo| / ΣRofo, Bias = Σ(Actual - Rofo), "
+            "MASE = error / naive error (bulan sebelumnya) per SKU"
+        )
+        
+        if not accuracy_summary.empty:
+            accuracy_format = {col: st.column_config.NumberColumn(col, format="%.1f") for col in ['MAPE', 'WAPE', 'sMAPE', 'Bias_Percentage', 'Accuracy', 'Actual_vs_Forecast_Ratio']}
+            accuracy_format['MASE'] = st.column_config.NumberColumn('MASE', format="%.2f")
+            st.dataframe(
+                accuracy_summary.sort_values('WAPE', ascending=False) if accuracy_level != 'Total' else accuracy_summary,
+                column_config=accuracy_format,
+                use_container_width=True,
+                hide_index=True,
+                height=400 if accuracy_level != 'Total' else 'auto'
+            )
+        
+        # Trend total per bulan
+        accuracy_trend = accuracy_table(accuracy_cells, 'Total', by_month=True)
+        fig_accuracy = go.Figure()
+        for metric, color in [('MAPE', '#667eea'), ('WAPE', '#FF9800'), ('sMAPE', '#4CAF50')]:
+            fig_accuracy.add_trace(go.Scatter(
+                x=accuracy_trend['Month'].dt.strftime('%b-%Y'),
+                y=accuracy_trend[metric],
+                mode='lines+markers',
+                name=metric,
+                line=dict(color=color, width=2)
+            ))
+        fig_accuracy.update_layout(
+            height=350,
+            title=f'{accuracy_comparison}: Error Trend per Month (%)',
+            xaxis_title='Month',
+            yaxis_title='Error %',
+            hovermode='x unified'
+        )
+        st.plotly_chart(fig_accuracy, use_container_width=True)
+    else:
+        st.info(f"📊 No {accuracy_comparison} data available")
+    
+    st.divider()
+    
     # ================ TIER ANALYSIS SECTION ================
     st.subheader("🏷️ SKU Tier Analysis")
     
@@ -2724,7 +4492,7 @@ with tab2:
         
         # Tier analysis
         if 'SKU_Tier' in last_month_data.columns:
-            tier_summary = last_month_data.groupby('SKU_Tier').agg({
+            tier_summary = last_month_data.groupby('SKU_Tier', observed=True).agg({
                 'SKU_ID': 'count',
                 'PO_Rofo_Ratio': 'mean',
                 'Forecast_Qty': 'sum',
@@ -2732,13 +4500,13 @@ with tab2:
             }).reset_index()
             
             tier_summary.columns = ['Tier', 'SKU Count', 'Avg PO/Rofo %', 'Total Forecast', 'Total PO']
-            tier_summary['Avg PO/Rofo %'] = tier_summary['Avg PO/Rofo %'].apply(lambda x: f"{x:.1f}%")
             
             col_t1, col_t2 = st.columns(2)
             
             with col_t1:
                 st.dataframe(
                     tier_summary,
+                    column_config=format_columns({'Avg PO/Rofo %': 'percent'}),
                     use_container_width=True,
                     height=300
                 )
@@ -2765,21 +4533,12 @@ with tab2:
             # Tier Performance Comparison
             st.subheader("📈 Tier Performance Comparison")
             
-            # Prepare data for radar chart
-            tiers = tier_summary['Tier'].tolist()
-            accuracy_values = []
-            po_rofo_values = []
-            
-            for tier in tiers:
-                tier_data = last_month_data[last_month_data['SKU_Tier'] == tier]
-                if not tier_data.empty:
-                    # Calculate accuracy
-                    accuracy = 100 - abs(tier_data['PO_Rofo_Ratio'] - 100).mean()
-                    accuracy_values.append(accuracy)
-                    
-                    # Calculate PO/Rofo ratio
-                    po_rofo = (tier_data['PO_Qty'].sum() / tier_data['Forecast_Qty'].sum() * 100) if tier_data['Forecast_Qty'].sum() > 0 else 0
-                    po_rofo_values.append(po_rofo)
+            # Prepare data for radar chart (accuracy library, bulan terakhir)
+            tier_accuracy = accuracy_table(accuracy_library['PO vs Rofo'], 'Tier', months=[last_month]).set_index('SKU_Tier')
+            tier_accuracy = tier_accuracy.reindex(tier_summary['Tier'].astype(object)).dropna(subset=['Accuracy'])
+            tiers = tier_accuracy.index.tolist()
+            accuracy_values = tier_accuracy['Accuracy'].tolist()
+            po_rofo_values = tier_accuracy['Actual_vs_Forecast_Ratio'].fillna(0).tolist()
             
             # Radar chart
             fig_radar = go.Figure()
@@ -2869,7 +4628,7 @@ with tab2:
                     st.metric("Average Cover All Tiers", f"{avg_cover:.1f} months")
 
 # --- TAB 3: INVENTORY ANALYSIS (FIXED VERSION) ---
-with tab3:
+if render_section('inventory'):
     st.subheader("📦 Inventory Health & Aging Analysis")
     st.markdown("#### **Professional Stock Management Dashboard**")
     
@@ -3055,18 +4814,6 @@ with tab3:
         st.markdown("### 📅 Inventory Coverage Analysis (Months Cover)")
         st.caption("**Analyzing Regular SKUs Only** | Thresholds: <0.8 months = Need Replenishment | 0.8-1.5 months = Ideal | >1.5 months = Over Stock")
         
-        # ======================== TAMBAH DI SINI: WAREHOUSE SETTINGS ========================
-        st.sidebar.markdown("---")
-        st.sidebar.markdown("### 🏢 Warehouse Settings")
-        WH_CAPACITY = st.sidebar.number_input(
-            "Warehouse Capacity (pcs)",
-            min_value=1000,
-            max_value=1000000,
-            value=250000,
-            step=10000,
-            help="Total warehouse capacity in pieces"
-        )
-        
         # Identifikasi Regular vs Non-Regular SKUs
         def identify_regular_skus(df_stock, df_sales, df_forecast, df_product):
             """Identify Regular SKUs based on sales, forecast, and active status"""
@@ -3118,7 +4865,7 @@ with tab3:
                     df_sales_last_3 = df_sales[df_sales['Month'].isin(last_3_months)].copy()
                     
                     # Calculate average monthly sales per SKU
-                    avg_monthly_sales = df_sales_last_3.groupby('SKU_ID')['Sales_Qty'].mean().reset_index()
+                    avg_monthly_sales = df_sales_last_3.groupby('SKU_ID', observed=True)['Sales_Qty'].mean().reset_index()
                     avg_monthly_sales.columns = ['SKU_ID', 'Avg_Monthly_Sales_3M']
                     
                     # Merge dengan stock data
@@ -3156,297 +4903,314 @@ with tab3:
             
             # Add product info (jika belum ada)
             if 'Product_Name' not in df_coverage.columns:
-                df_coverage = add_product_info_to_data(df_coverage, df_product)
+                df_coverage = add_product_info_to_data(df_coverage, product_dim)
             
             # ======================== TAMBAH DI SINI: HITUNG METRICS PENTING ========================
             # Hitung metrics untuk speedometer
             valid_coverage = df_coverage[df_coverage['Cover_Months'] < 999]
             avg_cover = valid_coverage['Cover_Months'].mean() if not valid_coverage.empty else 0
             
-            # Warehouse occupancy calculation
-            current_occupancy = df_regular['Stock_Qty'].sum() if not df_regular.empty else 0
-            occupancy_percentage = (current_occupancy / WH_CAPACITY * 100) if WH_CAPACITY > 0 else 0
-            
             # SKU health score
             healthy_skus = len(df_coverage[df_coverage['Coverage_Status'] == 'Ideal/Healthy'])
             total_regular_skus = len(df_coverage)
             health_score = (healthy_skus / total_regular_skus * 100) if total_regular_skus > 0 else 0
             
-        # ============================================
-        # COVERAGE ANALYSIS VISUALIZATION - COMPACT VERSION (2 SPEEDOMETERS)
-        # ============================================
+        # Warehouse capacity + semua visual yang bergantung padanya = 1 fragment:
+        # ubah kapasitas -> hanya fragment ini yang rerun, bukan seluruh script
+        @st.fragment
+        def render_inventory_health(df_regular, df_coverage, valid_coverage, avg_cover):
+            """Speedometer coverage & WH occupancy, analisa space gudang dan proyeksi space"""
+            # ============================================
+            # COVERAGE ANALYSIS VISUALIZATION - COMPACT VERSION (2 SPEEDOMETERS)
+            # ============================================
         
-        # Row 2: Two Speedometers in One Row
-        st.markdown("---")
-        st.markdown("#### ⚡ Inventory Health Dashboard")
+            # Row 2: Two Speedometers in One Row
+            st.markdown("---")
+            st.markdown("#### ⚡ Inventory Health Dashboard")
+            
+            WH_CAPACITY = st.number_input(
+                "🏢 Warehouse Capacity (pcs)",
+                min_value=1000,
+                max_value=1000000,
+                value=250000,
+                step=10000,
+                help="Total warehouse capacity in pieces",
+                key="wh_capacity"
+            )
+            
+            # Warehouse occupancy calculation
+            current_occupancy = df_regular['Stock_Qty'].sum() if not df_regular.empty else 0
+            occupancy_percentage = (current_occupancy / WH_CAPACITY * 100) if WH_CAPACITY > 0 else 0
+            need_replenish = df_coverage[df_coverage['Coverage_Status'] == 'Need Replenishment']
         
-        speed_col1, speed_col2 = st.columns(2)  # UBAH: dari 3 jadi 2 kolom
+            speed_col1, speed_col2 = st.columns(2)  # UBAH: dari 3 jadi 2 kolom
         
-        with speed_col1:
-            # Speedometer 1: Average Coverage
-            coverage_status = ""
-            if avg_cover < 0.8:
-                coverage_status = "🔴 Need Replenishment"
-            elif avg_cover <= 1.5:
-                coverage_status = "🟢 Ideal"
-            else:
-                coverage_status = "🟡 High Stock"
-            
-            fig_coverage = go.Figure(go.Indicator(
-                mode="gauge+number",
-                value=avg_cover,
-                domain={'x': [0, 1], 'y': [0, 1]},
-                title={
-                    'text': "Avg Coverage<br><span style='font-size:12px;color:gray'>Target: 0.8-1.5 months</span>",
-                    'font': {'size': 16}
-                },
-                number={
-                    'suffix': " months",
-                    'font': {'size': 24}
-                },
-                gauge={
-                    'axis': {'range': [0, 3], 'tickwidth': 1, 'tickfont': {'size': 12}},
-                    'bar': {'color': "#667eea"},
-                    'steps': [
-                        {'range': [0, 0.8], 'color': "#FF5252"},
-                        {'range': [0.8, 1.5], 'color': "#4CAF50"},
-                        {'range': [1.5, 3], 'color': "#FF9800"}
-                    ],
-                    'threshold': {
-                        'line': {'color': "black", 'width': 3},
-                        'thickness': 0.80,
-                        'value': 1.5
+            with speed_col1:
+                # Speedometer 1: Average Coverage
+                coverage_status = ""
+                if avg_cover < 0.8:
+                    coverage_status = "🔴 Need Replenishment"
+                elif avg_cover <= 1.5:
+                    coverage_status = "🟢 Ideal"
+                else:
+                    coverage_status = "🟡 High Stock"
+            
+                fig_coverage = go.Figure(go.Indicator(
+                    mode="gauge+number",
+                    value=avg_cover,
+                    domain={'x': [0, 1], 'y': [0, 1]},
+                    title={
+                        'text': "Avg Coverage<br><span style='font-size:12px;color:gray'>Target: 0.8-1.5 months</span>",
+                        'font': {'size': 16}
+                    },
+                    number={
+                        'suffix': " months",
+                        'font': {'size': 24}
+                    },
+                    gauge={
+                        'axis': {'range': [0, 3], 'tickwidth': 1, 'tickfont': {'size': 12}},
+                        'bar': {'color': "#667eea"},
+                        'steps': [
+                            {'range': [0, 0.8], 'color': "#FF5252"},
+                            {'range': [0.8, 1.5], 'color': "#4CAF50"},
+                            {'range': [1.5, 3], 'color': "#FF9800"}
+                        ],
+                        'threshold': {
+                            'line': {'color': "black", 'width': 3},
+                            'thickness': 0.80,
+                            'value': 1.5
+                        }
                     }
-                }
-            ))
+                ))
             
-            fig_coverage.update_layout(
-                height=250,
-                margin=dict(t=40, b=30, l=20, r=20),
-                font={'size': 12}
-            )
+                fig_coverage.update_layout(
+                    height=250,
+                    margin=dict(t=40, b=30, l=20, r=20),
+                    font={'size': 12}
+                )
             
-            st.plotly_chart(fig_coverage, use_container_width=True)
-            st.caption(f"**{coverage_status}** | Based on {len(valid_coverage)} SKUs")
+                st.plotly_chart(fig_coverage, use_container_width=True)
+                st.caption(f"**{coverage_status}** | Based on {len(valid_coverage)} SKUs")
         
-        with speed_col2:
-            # Speedometer 2: Warehouse Occupancy
-            wh_status = ""
-            if occupancy_percentage < 60:
-                wh_status = "🟢 Optimal"
-            elif occupancy_percentage < 80:
-                wh_status = "🟡 Moderate"
-            else:
-                wh_status = "🔴 Critical"
-            
-            fig_wh = go.Figure(go.Indicator(
-                mode="gauge+number",
-                value=occupancy_percentage,
-                domain={'x': [0, 1], 'y': [0, 1]},
-                title={
-                    'text': "WH Occupancy<br><span style='font-size:12px;color:gray'>250K capacity</span>",
-                    'font': {'size': 11}
-                },
-                number={
-                    'suffix': "%",
-                    'font': {'size': 24}
-                },
-                gauge={
-                    'axis': {'range': [0, 100], 'tickwidth': 1, 'tickfont': {'size': 10}},
-                    'bar': {'color': "#9C27B0"},
-                    'steps': [
-                        {'range': [0, 60], 'color': '#4CAF50'},
-                        {'range': [60, 80], 'color': '#FF9800'},
-                        {'range': [80, 100], 'color': '#F44336'}
-                    ],
-                    'threshold': {
-                        'line': {'color': "red", 'width': 4},
-                        'thickness': 0.80,
-                        'value': 80
+            with speed_col2:
+                # Speedometer 2: Warehouse Occupancy
+                wh_status = ""
+                if occupancy_percentage < 60:
+                    wh_status = "🟢 Optimal"
+                elif occupancy_percentage < 80:
+                    wh_status = "🟡 Moderate"
+                else:
+                    wh_status = "🔴 Critical"
+            
+                fig_wh = go.Figure(go.Indicator(
+                    mode="gauge+number",
+                    value=occupancy_percentage,
+                    domain={'x': [0, 1], 'y': [0, 1]},
+                    title={
+                        'text': f"WH Occupancy<br><span style='font-size:12px;color:gray'>{WH_CAPACITY / 1000:,.0f}K capacity</span>",
+                        'font': {'size': 11}
+                    },
+                    number={
+                        'suffix': "%",
+                        'font': {'size': 24}
+                    },
+                    gauge={
+                        'axis': {'range': [0, 100], 'tickwidth': 1, 'tickfont': {'size': 10}},
+                        'bar': {'color': "#9C27B0"},
+                        'steps': [
+                            {'range': [0, 60], 'color': '#4CAF50'},
+                            {'range': [60, 80], 'color': '#FF9800'},
+                            {'range': [80, 100], 'color': '#F44336'}
+                        ],
+                        'threshold': {
+                            'line': {'color': "red", 'width': 4},
+                            'thickness': 0.80,
+                            'value': 80
+                        }
                     }
-                }
-            ))
+                ))
             
-            fig_wh.update_layout(
-                height=250,
-                margin=dict(t=40, b=30, l=20, r=20),
-                font={'size': 12}
-            )
+                fig_wh.update_layout(
+                    height=250,
+                    margin=dict(t=40, b=30, l=20, r=20),
+                    font={'size': 12}
+                )
             
-            st.plotly_chart(fig_wh, use_container_width=True)
-            st.caption(f"**{wh_status}** | Available: {WH_CAPACITY - current_occupancy:,.0f} pcs")
+                st.plotly_chart(fig_wh, use_container_width=True)
+                st.caption(f"**{wh_status}** | Available: {WH_CAPACITY - current_occupancy:,.0f} pcs")
 
             
-            # Row 3: Warehouse Utilization Insights
-            st.markdown("---")
-            with st.expander("📦 **Warehouse Space Analysis**", expanded=False):
+                # Row 3: Warehouse Utilization Insights
+                st.markdown("---")
+                with st.expander("📦 **Warehouse Space Analysis**", expanded=False):
                 
-                # Utilization by category
-                category_utilization = df_regular.groupby('Stock_Category').agg({
-                    'Stock_Qty': 'sum',
-                    'SKU_ID': 'count'
-                }).reset_index()
+                    # Utilization by category
+                    category_utilization = df_regular.groupby('Stock_Category', observed=True).agg({
+                        'Stock_Qty': 'sum',
+                        'SKU_ID': 'count'
+                    }).reset_index()
                 
-                category_utilization['Utilization_Pct'] = (category_utilization['Stock_Qty'] / current_occupancy * 100)
-                category_utilization = category_utilization.sort_values('Stock_Qty', ascending=False)
+                    category_utilization['Utilization_Pct'] = (category_utilization['Stock_Qty'] / current_occupancy * 100)
+                    category_utilization = category_utilization.sort_values('Stock_Qty', ascending=False)
                 
-                col_util1, col_util2 = st.columns(2)
+                    col_util1, col_util2 = st.columns(2)
                 
-                with col_util1:
-                    # Top categories bar chart
-                    fig_top_cat = px.bar(
-                        category_utilization.head(10),
-                        x='Stock_Category',
-                        y='Stock_Qty',
-                        title="Top 10 Categories by Space Usage",
-                        labels={'Stock_Qty': 'Quantity (pcs)', 'Stock_Category': 'Category'},
-                        color='Stock_Qty',
-                        color_continuous_scale='Viridis'
-                    )
+                    with col_util1:
+                        # Top categories bar chart
+                        fig_top_cat = px.bar(
+                            category_utilization.head(10),
+                            x='Stock_Category',
+                            y='Stock_Qty',
+                            title="Top 10 Categories by Space Usage",
+                            labels={'Stock_Qty': 'Quantity (pcs)', 'Stock_Category': 'Category'},
+                            color='Stock_Qty',
+                            color_continuous_scale='Viridis'
+                        )
                     
-                    fig_top_cat.update_layout(height=300)
-                    st.plotly_chart(fig_top_cat, use_container_width=True)
+                        fig_top_cat.update_layout(height=300)
+                        st.plotly_chart(fig_top_cat, use_container_width=True)
                 
-                with col_util2:
-                    # Space allocation pie chart
-                    fig_pie_space = px.pie(
-                        category_utilization,
-                        values='Stock_Qty',
-                        names='Stock_Category',
-                        title="Warehouse Space Allocation",
-                        hole=0.4
-                    )
+                    with col_util2:
+                        # Space allocation pie chart
+                        fig_pie_space = px.pie(
+                            category_utilization,
+                            values='Stock_Qty',
+                            names='Stock_Category',
+                            title="Warehouse Space Allocation",
+                            hole=0.4
+                        )
                     
-                    fig_pie_space.update_layout(height=300)
-                    st.plotly_chart(fig_pie_space, use_container_width=True)
+                        fig_pie_space.update_layout(height=300)
+                        st.plotly_chart(fig_pie_space, use_container_width=True)
                 
-                # Space optimization tips
-                st.markdown("#### 💡 Space Optimization Tips")
+                    # Space optimization tips
+                    st.markdown("#### 💡 Space Optimization Tips")
                 
-                tips = []
+                    tips = []
                 
-                if occupancy_percentage > 80:
-                    tips.append("🚨 **Urgent Action Required:** Warehouse >80% full. Consider clearance sales for slow-moving items.")
-                elif occupancy_percentage > 60:
-                    tips.append("⚠️ **Monitor Closely:** Warehouse 60-80% full. Optimize storage layout.")
+                    if occupancy_percentage > 80:
+                        tips.append("🚨 **Urgent Action Required:** Warehouse >80% full. Consider clearance sales for slow-moving items.")
+                    elif occupancy_percentage > 60:
+                        tips.append("⚠️ **Monitor Closely:** Warehouse 60-80% full. Optimize storage layout.")
                 
-                if not category_utilization.empty:
-                    top_cat = category_utilization.iloc[0]
-                    if top_cat['Utilization_Pct'] > 30:
-                        tips.append(f"📦 **Category Focus:** '{top_cat['Stock_Category']}' uses {top_cat['Utilization_Pct']:.1f}% of space. Consider storage optimization.")
+                    if not category_utilization.empty:
+                        top_cat = category_utilization.iloc[0]
+                        if top_cat['Utilization_Pct'] > 30:
+                            tips.append(f"📦 **Category Focus:** '{top_cat['Stock_Category']}' uses {top_cat['Utilization_Pct']:.1f}% of space. Consider storage optimization.")
                 
-                high_stock_count = len(df_coverage[df_coverage['Coverage_Status'] == 'High Stock'])
-                if high_stock_count > 0:
-                    tips.append(f"📉 **Stock Reduction:** {high_stock_count} SKUs have >1.5 months coverage. Reduce to free up space.")
+                    high_stock_count = len(df_coverage[df_coverage['Coverage_Status'] == 'High Stock'])
+                    if high_stock_count > 0:
+                        tips.append(f"📉 **Stock Reduction:** {high_stock_count} SKUs have >1.5 months coverage. Reduce to free up space.")
                 
-                for tip in tips:
-                    st.info(tip)
+                    for tip in tips:
+                        st.info(tip)
             
-            # Row 4: Detailed Coverage Table
-            st.markdown("---")
+                # Row 4: Detailed Coverage Table
+                st.markdown("---")
                     
                   
-            # ============================================
-            # NEW: WAREHOUSE UTILIZATION INSIGHTS
-            # ============================================
-            st.markdown("---")
-            with st.expander("🏢 **Warehouse Utilization Analysis**", expanded=False):
-                
-                # Hitung utilization per kategori
-                if not df_regular.empty:
-                    # Utilization by category
-                    category_utilization = df_regular.groupby('Stock_Category').agg({
-                        'Stock_Qty': 'sum',
-                        'SKU_ID': 'count'
-                    }).reset_index()
+                # ============================================
+                # NEW: WAREHOUSE UTILIZATION INSIGHTS
+                # ============================================
+                st.markdown("---")
+                with st.expander("🏢 **Warehouse Utilization Analysis**", expanded=False):
+                
+                    # Hitung utilization per kategori
+                    if not df_regular.empty:
+                        # Utilization by category
+                        category_utilization = df_regular.groupby('Stock_Category', observed=True).agg({
+                            'Stock_Qty': 'sum',
+                            'SKU_ID': 'count'
+                        }).reset_index()
                     
-                    category_utilization['Utilization_Pct'] = (category_utilization['Stock_Qty'] / current_occupancy * 100)
-                    category_utilization = category_utilization.sort_values('Stock_Qty', ascending=False)
+                        category_utilization['Utilization_Pct'] = (category_utilization['Stock_Qty'] / current_occupancy * 100)
+                        category_utilization = category_utilization.sort_values('Stock_Qty', ascending=False)
                     
-                    col_wh1, col_wh2 = st.columns(2)
+                        col_wh1, col_wh2 = st.columns(2)
                     
-                    with col_wh1:
-                        st.markdown("#### 📦 Top Categories by Space")
+                        with col_wh1:
+                            st.markdown("#### 📦 Top Categories by Space")
                         
-                        # Bar chart top categories
-                        fig_cat = px.bar(
-                            category_utilization.head(10),
-                            x='Stock_Category',
-                            y='Stock_Qty',
-                            title=f"Top 10 Categories ({category_utilization['Stock_Qty'].head(10).sum():,.0f} pcs)",
-                            labels={'Stock_Qty': 'Quantity (pcs)', 'Stock_Category': 'Category'},
-                            color='Stock_Qty',
-                            color_continuous_scale='Viridis'
-                        )
+                            # Bar chart top categories
+                            fig_cat = px.bar(
+                                category_utilization.head(10),
+                                x='Stock_Category',
+                                y='Stock_Qty',
+                                title=f"Top 10 Categories ({category_utilization['Stock_Qty'].head(10).sum():,.0f} pcs)",
+                                labels={'Stock_Qty': 'Quantity (pcs)', 'Stock_Category': 'Category'},
+                                color='Stock_Qty',
+                                color_continuous_scale='Viridis'
+                            )
                         
-                        fig_cat.update_layout(height=300)
-                        st.plotly_chart(fig_cat, use_container_width=True)
+                            fig_cat.update_layout(height=300)
+                            st.plotly_chart(fig_cat, use_container_width=True)
                     
-                    with col_wh2:
-                        st.markdown("#### 📊 Space Distribution")
+                        with col_wh2:
+                            st.markdown("#### 📊 Space Distribution")
                         
-                        # Pie chart space distribution
-                        fig_pie_wh = px.pie(
-                            category_utilization,
-                            values='Stock_Qty',
-                            names='Stock_Category',
-                            title=f"Warehouse Space Allocation",
-                            hole=0.4,
-                            color_discrete_sequence=px.colors.qualitative.Set3
-                        )
+                            # Pie chart space distribution
+                            fig_pie_wh = px.pie(
+                                category_utilization,
+                                values='Stock_Qty',
+                                names='Stock_Category',
+                                title=f"Warehouse Space Allocation",
+                                hole=0.4,
+                                color_discrete_sequence=px.colors.qualitative.Set3
+                            )
                         
-                        fig_pie_wh.update_layout(height=300)
-                        st.plotly_chart(fig_pie_wh, use_container_width=True)
+                            fig_pie_wh.update_layout(height=300)
+                            st.plotly_chart(fig_pie_wh, use_container_width=True)
                     
-                    # Warehouse recommendations
-                    st.markdown("#### 💡 Warehouse Optimization Suggestions")
+                        # Warehouse recommendations
+                        st.markdown("#### 💡 Warehouse Optimization Suggestions")
                     
-                    recommendations = []
+                        recommendations = []
                     
-                    # Space optimization
-                    if occupancy_percentage > 80:
-                        recommendations.append("🚨 **Critical Space:** Warehouse occupancy >80%. Consider urgent stock reduction.")
-                    elif occupancy_percentage > 60:
-                        recommendations.append("⚠️ **Moderate Space:** Warehouse occupancy 60-80%. Monitor closely.")
-                    else:
-                        recommendations.append("✅ **Optimal Space:** Warehouse occupancy <60%. Good utilization.")
+                        # Space optimization
+                        if occupancy_percentage > 80:
+                            recommendations.append("🚨 **Critical Space:** Warehouse occupancy >80%. Consider urgent stock reduction.")
+                        elif occupancy_percentage > 60:
+                            recommendations.append("⚠️ **Moderate Space:** Warehouse occupancy 60-80%. Monitor closely.")
+                        else:
+                            recommendations.append("✅ **Optimal Space:** Warehouse occupancy <60%. Good utilization.")
                     
-                    # Category-specific recommendations
-                    if not category_utilization.empty:
-                        top_category = category_utilization.iloc[0]
-                        top_pct = top_category['Utilization_Pct']
-                        if top_pct > 30:
-                            recommendations.append(f"📦 **Category Concentration:** '{top_category['Stock_Category']}' uses {top_pct:.1f}% of total space. Consider diversification.")
+                        # Category-specific recommendations
+                        if not category_utilization.empty:
+                            top_category = category_utilization.iloc[0]
+                            top_pct = top_category['Utilization_Pct']
+                            if top_pct > 30:
+                                recommendations.append(f"📦 **Category Concentration:** '{top_category['Stock_Category']}' uses {top_pct:.1f}% of total space. Consider diversification.")
                     
-                    # Coverage-based recommendations
-                    if 'df_coverage' in locals():
-                        high_stock_count = len(df_coverage[df_coverage['Coverage_Status'] == 'High Stock'])
-                        if high_stock_count > 0:
-                            recommendations.append(f"📉 **Excess Stock:** {high_stock_count} SKUs with >1.5 months coverage. Reduce to free up space.")
+                        # Coverage-based recommendations
+                        if 'df_coverage' in locals():
+                            high_stock_count = len(df_coverage[df_coverage['Coverage_Status'] == 'High Stock'])
+                            if high_stock_count > 0:
+                                recommendations.append(f"📉 **Excess Stock:** {high_stock_count} SKUs with >1.5 months coverage. Reduce to free up space.")
                     
-                    for rec in recommendations:
-                        st.info(rec)
+                        for rec in recommendations:
+                            st.info(rec)
                 
-                # Space projection
-                st.markdown("#### 📈 Space Projection")
+                    # Space projection
+                    st.markdown("#### 📈 Space Projection")
                 
-                col_proj1, col_proj2, col_proj3 = st.columns(3)
+                    col_proj1, col_proj2, col_proj3 = st.columns(3)
                 
-                with col_proj1:
-                    available_space = WH_CAPACITY - current_occupancy
-                    st.metric("Available Space", f"{available_space:,.0f} pcs")
+                    with col_proj1:
+                        available_space = WH_CAPACITY - current_occupancy
+                        st.metric("Available Space", f"{available_space:,.0f} pcs")
                 
-                with col_proj2:
-                    # Project jika semua Need Replenishment diorder
-                    if 'need_replenish' in locals() and not need_replenish.empty:
-                        projected_qty = need_replenish['Avg_Monthly_Sales_3M'].sum() * 1.5  # Order untuk 1.5 bulan
-                        st.metric("Replenishment Projection", f"{projected_qty:,.0f} pcs")
+                    with col_proj2:
+                        # Project jika semua Need Replenishment diorder
+                        if 'need_replenish' in locals() and not need_replenish.empty:
+                            projected_qty = need_replenish['Avg_Monthly_Sales_3M'].sum() * 1.5  # Order untuk 1.5 bulan
+                            st.metric("Replenishment Projection", f"{projected_qty:,.0f} pcs")
                 
-                with col_proj3:
-                    projected_occupancy = current_occupancy + (need_replenish['Avg_Monthly_Sales_3M'].sum() * 1.5 if 'need_replenish' in locals() and not need_replenish.empty else 0)
-                    projected_pct = (projected_occupancy / WH_CAPACITY * 100) if WH_CAPACITY > 0 else 0
-                    st.metric("Projected Occupancy", f"{projected_pct:.1f}%")
-                    
+                    with col_proj3:
+                        projected_occupancy = current_occupancy + (need_replenish['Avg_Monthly_Sales_3M'].sum() * 1.5 if 'need_replenish' in locals() and not need_replenish.empty else 0)
+                        projected_pct = (projected_occupancy / WH_CAPACITY * 100) if WH_CAPACITY > 0 else 0
+                        st.metric("Projected Occupancy", f"{projected_pct:.1f}%")
+        
+        render_inventory_health(df_regular, df_coverage, valid_coverage, avg_cover)
         
         # ============================================
         # SECTION 2: INVENTORY MATRIX (PIVOT TABLE - FIXED VERSION)
@@ -3462,7 +5226,8 @@ with tab3:
             index='Stock_Category', 
             columns='Expiry_Category', 
             aggfunc='sum', 
-            fill_value=0
+            fill_value=0,
+            observed=True
         )
         
         # Reorder columns logically
@@ -3500,35 +5265,12 @@ with tab3:
             # Gabungkan kembali dengan TOTAL row
             pivot_sorted = pd.concat([pivot_for_sorting, pivot.loc[['TOTAL']]])
             
-            # Create styled dataframe dengan heatmap
-            def color_heatmap(val):
-                """Color coding based on value"""
-                if val == 0:
-                    return 'background-color: #F5F5F5; color: #999'
-                elif val < 100:
-                    return 'background-color: #E8F5E9; color: #000'
-                elif val < 1000:
-                    return 'background-color: #C8E6C9; color: #000'
-                elif val < 5000:
-                    return 'background-color: #A5D6A7; color: #000'
-                elif val < 10000:
-                    return 'background-color: #81C784; color: #000'
-                else:
-                    return 'background-color: #4CAF50; color: white; font-weight: bold'
-            
-            # Apply styling
-            styled_pivot = pivot_sorted.style.applymap(color_heatmap)
+            # Heatmap + highlight TOTAL: matrix CSS dihitung sekali (cache per isi pivot)
+            heatmap_css = stock_heatmap_css(pivot_sorted)
+            styled_pivot = pivot_sorted.style.apply(lambda _: heatmap_css, axis=None)
             
             # Add number formatting
-            styled_pivot = styled_pivot.format("{:,.0f}")
-            
-            # Highlight TOTAL row
-            def highlight_total(row):
-                if row.name == 'TOTAL':
-                    return ['background-color: #E3F2FD; font-weight: bold'] * len(row)
-                return [''] * len(row)
-            
-            styled_pivot = styled_pivot.apply(highlight_total, axis=1)
+            styled_pivot = style_formats(styled_pivot, {col: 'qty' for col in pivot_sorted.columns})
             
             # Display the pivot table
             st.dataframe(
@@ -3607,51 +5349,21 @@ with tab3:
             # Create styled dataframe
             drill_df = filtered_drill[available_cols].copy()
             
-            # Format columns
-            if 'Stock_Qty' in drill_df.columns:
-                drill_df['Stock_Qty'] = drill_df['Stock_Qty'].apply(lambda x: f"{x:,.0f}")
-            
-            if 'Floor_Price' in drill_df.columns:
-                drill_df['Floor_Price'] = drill_df['Floor_Price'].apply(lambda x: f"Rp {x:,.0f}")
-            
-            if 'Value' in drill_df.columns:
-                drill_df['Value'] = drill_df['Value'].apply(lambda x: f"Rp {x:,.0f}")
-            
+            # Kolom tetap numeric (format dipasang di Styler)
             if 'Cover_Months' in drill_df.columns:
-                drill_df['Cover_Months'] = drill_df['Cover_Months'].apply(lambda x: f"{x:.1f}" if x < 999 else "N/A")
-            
-            # Color code by expiry
-            def color_expiry(row):
-                colors = []
-                for col in drill_df.columns:
-                    if row['Expiry_Category'] == '❌ EXPIRED':
-                        colors.append('background-color: #FFEBEE; color: #C62828')
-                    elif row['Expiry_Category'] == '🚨 Critical (<30 days)':
-                        colors.append('background-color: #FFF3E0; color: #EF6C00')
-                    elif row['Expiry_Category'] == '⚠️ NED (1-3 months)':
-                        colors.append('background-color: #FFF8E1; color: #FF8F00')
-                    else:
-                        colors.append('')
-                return colors
-            
-            # Color code by status
-            def color_status(row):
-                colors = []
-                for col in drill_df.columns:
-                    if row['Status'] == 'Active':
-                        colors.append('')
-                    elif row['Status'] == 'Inactive':
-                        colors.append('background-color: #F5F5F5; color: #757575')
-                    else:
-                        colors.append('background-color: #ECEFF1; color: #546E7A')
-                return colors
+                drill_df['Cover_Months'] = cover_months_display(drill_df['Cover_Months'])
+            
+            # Color code by expiry lalu status (satu matrix CSS untuk semua baris)
+            drill_css = row_css(drill_df, [
+                ('Expiry_Category', EXPIRY_ROW_CSS, ''),
+                ('Status', STATUS_ROW_CSS, STATUS_OTHER_CSS)
+            ])
             
             # Apply styling
-            styled_drill_df = drill_df.style
-            if 'Expiry_Category' in drill_df.columns:
-                styled_drill_df = styled_drill_df.apply(color_expiry, axis=1)
-            if 'Status' in drill_df.columns:
-                styled_drill_df = styled_drill_df.apply(color_status, axis=1)
+            styled_drill_df = style_formats(drill_df.style, {
+                'Stock_Qty': 'qty', 'Floor_Price': 'rupiah', 'Value': 'rupiah', 'Cover_Months': 'decimal'
+            })
+            styled_drill_df = styled_drill_df.apply(lambda _: drill_css, axis=None)
             
             # Display with styling
             st.dataframe(
@@ -3679,16 +5391,13 @@ with tab3:
         action_col1, action_col2, action_col3 = st.columns(3)
         
         with action_col1:
-            if st.button("📥 Export Full Data", use_container_width=True, key="export_full"):
-                csv = df_batch.to_csv(index=False)
-                st.download_button(
-                    label="Download CSV",
-                    data=csv,
-                    file_name=f"inventory_analysis_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-                    mime="text/csv",
-                    use_container_width=True,
-                    key="download_full"
-                )
+            # Kategori expiry bergantung tanggal hari ini -> ikut jadi bagian versi
+            download_data_button(
+                "📥 Export Full Data", df_batch, 'inventory_analysis',
+                (dataset_version, date.today().isoformat()),
+                f"inventory_analysis_{datetime.now().strftime('%Y%m%d_%H%M')}",
+                key="download_full", use_container_width=True
+            )
         
         with action_col2:
             if st.button("🚨 Critical Items Report", use_container_width=True, key="critical_report"):
@@ -3734,7 +5443,7 @@ with tab3:
                     insights.append(f"📊 **Inactive SKUs:** {inactive_count} SKUs marked as Inactive. Consider discontinuing or clearance.")
             
             # Category concentration insight
-            category_dist = df_batch.groupby('Stock_Category')['Stock_Qty'].sum()
+            category_dist = df_batch.groupby('Stock_Category', observed=True)['Stock_Qty'].sum()
             top_3_categories = category_dist.nlargest(3)
             if len(top_3_categories) >= 3:
                 top_3_percent = (top_3_categories.sum() / total_stock * 100)
@@ -3762,495 +5471,400 @@ with tab3:
         st.error("Unable to process inventory data. Please check the 'Stock_Category' column.")
 
 # --- TAB 4: SKU EVALUATION ---
-with tab4:
+if render_section('sku_evaluation'):
     st.subheader("🔍 SKU Performance Evaluation")
     
     if monthly_performance and not df_sales.empty:
         # Get last month for evaluation
         last_month = sorted(monthly_performance.keys())[-1]
-        last_month_data = monthly_performance[last_month]['data'].copy()
-        
-        # Get last 3 months sales data for each SKU
-        if not df_sales.empty:
-            sales_months = sorted(df_sales['Month'].unique())
-            if len(sales_months) >= 3:
-                last_3_sales_months = sales_months[-3:]
-                df_sales_last_3 = df_sales[df_sales['Month'].isin(last_3_sales_months)].copy()
-                
-                # Pivot sales data to get last 3 months sales per SKU
-                try:
-                    sales_pivot = df_sales_last_3.pivot_table(
-                        index='SKU_ID',
-                        columns='Month',
-                        values='Sales_Qty',
-                        aggfunc='sum',
-                        fill_value=0
-                    ).reset_index()
-                    
-                    # Rename columns to month names
-                    month_rename = {}
-                    for col in sales_pivot.columns:
-                        if isinstance(col, datetime):
-                            month_rename[col] = col.strftime('%b-%Y')
-                    sales_pivot = sales_pivot.rename(columns=month_rename)
-                    
-                    # Merge with last month data
-                    last_month_data = pd.merge(
-                        last_month_data,
-                        sales_pivot,
-                        on='SKU_ID',
-                        how='left'
-                    )
-                except Exception as e:
-                    st.warning(f"Tidak bisa memproses data sales 3 bulan terakhir: {str(e)}")
-        
-        # Add inventory data
-        if 'inventory_df' in inventory_metrics:
-            inventory_data = inventory_metrics['inventory_df'][['SKU_ID', 'Stock_Qty', 'Avg_Monthly_Sales_3M', 'Cover_Months']]
-            last_month_data = pd.merge(last_month_data, inventory_data, on='SKU_ID', how='left')
-        
-        # Add financial data if available
-        if not df_financial.empty:
-            # Get financial metrics for last month
-            financial_last_month = df_financial[df_financial['Month'] == last_month]
-            if not financial_last_month.empty:
-                financial_metrics = financial_last_month[['SKU_ID', 'Revenue', 'Gross_Margin', 'Margin_Percentage']]
-                last_month_data = pd.merge(last_month_data, financial_metrics, on='SKU_ID', how='left')
-        
-        # Create comprehensive evaluation table
-        # Filter by SKU
-        sku_filter = st.text_input("🔍 Filter by SKU ID or Product Name", "")
-        
-        # Apply filter
-        if sku_filter:
-            filtered_eval_df = last_month_data[
-                last_month_data['SKU_ID'].astype(str).str.contains(sku_filter, case=False, na=False) |
-                (last_month_data['Product_Name'].astype(str).str.contains(sku_filter, case=False, na=False) if 'Product_Name' in last_month_data.columns else False)
-            ].copy()
-        else:
-            filtered_eval_df = last_month_data.copy()
-        
-        # Determine which sales columns to show
-        sales_cols = []
-        for col in filtered_eval_df.columns:
-            if isinstance(col, str) and '-' in col and len(col) in [7, 8]:  # Format like 'Sep-2024' or 'Mar-2025'
-                try:
-                    # Validate it's a proper month-year format
-                    datetime.strptime(col, '%b-%Y')
-                    sales_cols.append(col)
-                except:
-                    pass
-        
-        # Sort sales columns chronologically
-        if sales_cols:
-            sales_cols_sorted = sorted(sales_cols, key=lambda x: datetime.strptime(x, '%b-%Y'))
-            # Get last 3 months only
-            sales_cols_sorted = sales_cols_sorted[-3:] if len(sales_cols_sorted) >= 3 else sales_cols_sorted
-        else:
-            sales_cols_sorted = []
-        
-        # Define columns to display - WAJIB dengan Product_Name
-        eval_cols = ['SKU_ID', 'Product_Name', 'Brand', 'SKU_Tier', 
-                    'Forecast_Qty', 'PO_Qty', 'PO_Rofo_Ratio',
-                    'Stock_Qty', 'Avg_Monthly_Sales_3M', 'Cover_Months']
-        
-        # Add financial columns if available
-        if 'Revenue' in filtered_eval_df.columns:
-            eval_cols.extend(['Revenue', 'Gross_Margin', 'Margin_Percentage'])
-        
-        # Add sales columns
-        eval_cols.extend(sales_cols_sorted)
-        
-        # Filter hanya kolom yang ada
-        available_cols = [col for col in eval_cols if col in filtered_eval_df.columns]
-        
-        # Pastikan Product_Name selalu ada
-        if 'Product_Name' not in available_cols and 'Product_Name' in filtered_eval_df.columns:
-            available_cols.insert(1, 'Product_Name')
-        
-        eval_df = filtered_eval_df[available_cols].copy()
+        last_month_data = monthly_performance[last_month]['data']
         
-        # Format columns
-        if 'PO_Rofo_Ratio' in eval_df.columns:
-            eval_df['PO_Rofo_Ratio'] = eval_df['PO_Rofo_Ratio'].apply(lambda x: f"{x:.1f}%" if pd.notnull(x) else "0%")
+        # Sales 3 bulan terakhir, inventory & financial bulan terakhir dari fact table (1x merge)
+        evaluation_data, _ = sku_evaluation_data(sku_month_facts, sku_month_cube, last_month, financial=True)
+        last_month_data = pd.merge(last_month_data, evaluation_data, on='SKU_ID', how='left')
+        
+        # Filter SKU, tabel evaluasi & deep dive = 1 fragment: ketik filter / pilih SKU hanya me-rerun bagian ini
+        @st.fragment
+        def render_sku_evaluation(last_month, last_month_data):
+            """Tabel evaluasi SKU bulan terakhir (dengan filter) dan SKU deep dive"""
+            # Create comprehensive evaluation table
+            # Filter by SKU
+            sku_filter = st.text_input("🔍 Filter by SKU ID or Product Name", "")
+        
+            # Apply filter (lewat SKU search index, hasil urut relevansi dipakai juga oleh deep dive)
+            matched_skus = []
+            if sku_filter:
+                matched_skus, fuzzy_match = search_skus(sku_search_index, sku_filter)
+                filtered_eval_df = last_month_data[last_month_data['SKU_ID'].astype(str).isin(matched_skus)].copy()
+                if fuzzy_match and not filtered_eval_df.empty:
+                    st.caption(f"🔎 Tidak ada yang cocok persis dengan '{sku_filter}', menampilkan {len(filtered_eval_df)} SKU yang mirip")
+            else:
+                filtered_eval_df = last_month_data.copy()
         
-        if 'Cover_Months' in eval_df.columns:
-            eval_df['Cover_Months'] = eval_df['Cover_Months'].apply(lambda x: f"{x:.1f}" if pd.notnull(x) and x < 999 else "N/A")
+            # Determine which sales columns to show
+            sales_cols = []
+            for col in filtered_eval_df.columns:
+                if isinstance(col, str) and '-' in col and len(col) in [7, 8]:  # Format like 'Sep-2024' or 'Mar-2025'
+                    try:
+                        # Validate it's a proper month-year format
+                        datetime.strptime(col, '%b-%Y')
+                        sales_cols.append(col)
+                    except:
+                        pass
         
-        if 'Avg_Monthly_Sales_3M' in eval_df.columns:
-            eval_df['Avg_Monthly_Sales_3M'] = eval_df['Avg_Monthly_Sales_3M'].apply(lambda x: f"{x:.0f}" if pd.notnull(x) else "0")
+            # Sort sales columns chronologically
+            if sales_cols:
+                sales_cols_sorted = sorted(sales_cols, key=lambda x: datetime.strptime(x, '%b-%Y'))
+                # Get last 3 months only
+                sales_cols_sorted = sales_cols_sorted[-3:] if len(sales_cols_sorted) >= 3 else sales_cols_sorted
+            else:
+                sales_cols_sorted = []
         
-        # Format financial columns
-        if 'Revenue' in eval_df.columns:
-            eval_df['Revenue'] = eval_df['Revenue'].apply(lambda x: f"Rp {x:,.0f}" if pd.notnull(x) else "Rp 0")
+            # Define columns to display - WAJIB dengan Product_Name
+            eval_cols = ['SKU_ID', 'Product_Name', 'Brand', 'SKU_Tier', 
+                        'Forecast_Qty', 'PO_Qty', 'PO_Rofo_Ratio',
+                        'Stock_Qty', 'Avg_Monthly_Sales_3M', 'Cover_Months']
         
-        if 'Gross_Margin' in eval_df.columns:
-            eval_df['Gross_Margin'] = eval_df['Gross_Margin'].apply(lambda x: f"Rp {x:,.0f}" if pd.notnull(x) else "Rp 0")
+            # Add financial columns if available
+            if 'Revenue' in filtered_eval_df.columns:
+                eval_cols.extend(['Revenue', 'Gross_Margin', 'Margin_Percentage'])
         
-        if 'Margin_Percentage' in eval_df.columns:
-            eval_df['Margin_Percentage'] = eval_df['Margin_Percentage'].apply(lambda x: f"{x:.1f}%" if pd.notnull(x) else "0%")
+            # Add sales columns
+            eval_cols.extend(sales_cols_sorted)
         
-        # Format sales columns
-        for col in sales_cols_sorted:
-            if col in eval_df.columns:
-                eval_df[col] = eval_df[col].apply(lambda x: f"{x:.0f}" if pd.notnull(x) else "0")
+            # Filter hanya kolom yang ada
+            available_cols = [col for col in eval_cols if col in filtered_eval_df.columns]
         
-        # Rename columns - WAJIB dengan Product Name
-        column_names = {
-            'SKU_ID': 'SKU ID',
-            'Product_Name': 'Product Name',
-            'Brand': 'Brand',
-            'SKU_Tier': 'Tier',
-            'Forecast_Qty': 'Forecast',
-            'PO_Qty': 'PO',
-            'PO_Rofo_Ratio': 'PO/Rofo %',
-            'Stock_Qty': 'Stock',
-            'Avg_Monthly_Sales_3M': 'Avg Sales (L3M)',
-            'Cover_Months': 'Cover (Months)',
-            'Revenue': 'Revenue',
-            'Gross_Margin': 'Gross Margin',
-            'Margin_Percentage': 'Margin %'
-        }
+            # Pastikan Product_Name selalu ada
+            if 'Product_Name' not in available_cols and 'Product_Name' in filtered_eval_df.columns:
+                available_cols.insert(1, 'Product_Name')
         
-        # Add sales columns to rename dict
-        for col in sales_cols_sorted:
-            column_names[col] = col
+            eval_df = filtered_eval_df[available_cols].copy()
+        
+            # Kolom tetap numeric: kosong -> 0, Cover 999 -> kosong (format di column_config)
+            zero_fill_cols = ['PO_Rofo_Ratio', 'Avg_Monthly_Sales_3M', 'Revenue', 'Gross_Margin', 'Margin_Percentage'] + sales_cols_sorted
+            zero_fill_cols = [col for col in zero_fill_cols if col in eval_df.columns]
+            eval_df[zero_fill_cols] = eval_df[zero_fill_cols].fillna(0)
+        
+            if 'Cover_Months' in eval_df.columns:
+                eval_df['Cover_Months'] = cover_months_display(eval_df['Cover_Months'])
+        
+            # Rename columns - WAJIB dengan Product Name
+            column_names = {
+                'SKU_ID': 'SKU ID',
+                'Product_Name': 'Product Name',
+                'Brand': 'Brand',
+                'SKU_Tier': 'Tier',
+                'Forecast_Qty': 'Forecast',
+                'PO_Qty': 'PO',
+                'PO_Rofo_Ratio': 'PO/Rofo %',
+                'Stock_Qty': 'Stock',
+                'Avg_Monthly_Sales_3M': 'Avg Sales (L3M)',
+                'Cover_Months': 'Cover (Months)',
+                'Revenue': 'Revenue',
+                'Gross_Margin': 'Gross Margin',
+                'Margin_Percentage': 'Margin %'
+            }
         
-        eval_df = eval_df.rename(columns=column_names)
+            # Add sales columns to rename dict
+            for col in sales_cols_sorted:
+                column_names[col] = col
         
-        # Reorder columns
-        column_order = ['SKU ID', 'Product Name', 'Brand', 'Tier', 'Forecast', 'PO', 
-                       'PO/Rofo %', 'Stock', 'Avg Sales (L3M)', 'Cover (Months)']
+            eval_df = eval_df.rename(columns=column_names)
         
-        # Tambahkan financial columns
-        if 'Revenue' in eval_df.columns:
-            column_order.extend(['Revenue', 'Gross Margin', 'Margin %'])
+            # Reorder columns
+            column_order = ['SKU ID', 'Product Name', 'Brand', 'Tier', 'Forecast', 'PO', 
+                           'PO/Rofo %', 'Stock', 'Avg Sales (L3M)', 'Cover (Months)']
         
-        # Tambahkan sales columns ke urutan
-        for col in sales_cols_sorted:
-            if col in eval_df.columns:
-                column_order.append(col)
+            # Tambahkan financial columns
+            if 'Revenue' in eval_df.columns:
+                column_order.extend(['Revenue', 'Gross Margin', 'Margin %'])
         
-        # Ensure all columns exist before reordering
-        existing_columns = [col for col in column_order if col in eval_df.columns]
-        eval_df = eval_df[existing_columns]
+            # Tambahkan sales columns ke urutan
+            for col in sales_cols_sorted:
+                if col in eval_df.columns:
+                    column_order.append(col)
         
-        st.dataframe(
-            eval_df,
-            use_container_width=True,
-            height=400
-        )
+            # Ensure all columns exist before reordering
+            existing_columns = [col for col in column_order if col in eval_df.columns]
+            eval_df = eval_df[existing_columns]
         
-        # ================ NEW: SKU DEEP DIVE ANALYSIS ================
-        st.divider()
-        st.subheader("🔬 SKU Deep Dive Analysis")
+            st.dataframe(
+                eval_df,
+                column_config=format_columns({
+                    'PO/Rofo %': 'percent', 'Avg Sales (L3M)': 'integer', 'Cover (Months)': 'decimal',
+                    'Revenue': 'rupiah', 'Gross Margin': 'rupiah', 'Margin %': 'percent',
+                    **{col: 'integer' for col in sales_cols_sorted}
+                }, eval_df.columns),
+                use_container_width=True,
+                height=400
+            )
         
-        # Pilih SKU untuk deep dive
-        if not last_month_data.empty:
-            # Get unique SKUs for selection
-            available_skus = last_month_data['SKU_ID'].unique().tolist()
-            
-            # Jika ada filter SKU, otomatis select yang difilter
-            selected_sku = None
-            if sku_filter and len(filtered_eval_df) == 1:
-                selected_sku = filtered_eval_df.iloc[0]['SKU_ID']
-            else:
-                # Dropdown untuk pilih SKU
-                sku_options = []
-                for sku in available_skus[:50]:  # Limit to first 50 for performance
-                    product_name = last_month_data[last_month_data['SKU_ID'] == sku]['Product_Name'].iloc[0] if 'Product_Name' in last_month_data.columns else sku
-                    sku_options.append(f"{sku} - {product_name}")
-                
-                if sku_options:
-                    selected_sku_display = st.selectbox(
+            # ================ NEW: SKU DEEP DIVE ANALYSIS ================
+            st.divider()
+            st.subheader("🔬 SKU Deep Dive Analysis")
+        
+            # Pilih SKU untuk deep dive
+            if not last_month_data.empty:
+                # Semua SKU bulan terakhir (label dibangun sekali, vectorized)
+                available_skus = last_month_data.drop_duplicates(subset=['SKU_ID'])
+                sku_ids = available_skus['SKU_ID'].astype(str)
+                sku_names = available_skus['Product_Name'].astype(str) if 'Product_Name' in available_skus.columns else sku_ids
+                sku_labels = dict(zip(sku_ids, sku_ids + " - " + sku_names))
+            
+                # Jika ada filter SKU, otomatis select yang difilter
+                selected_sku = None
+                if sku_filter and len(filtered_eval_df) == 1:
+                    selected_sku = filtered_eval_df.iloc[0]['SKU_ID']
+                elif sku_labels:
+                    # Dropdown untuk pilih SKU (bisa diketik untuk mencari); jika ada filter, hanya hasil pencarian (urut relevansi)
+                    sku_options = [sku for sku in matched_skus if sku in sku_labels] or list(sku_labels)
+                    selected_sku = st.selectbox(
                         "📋 Select SKU for Deep Dive Analysis",
                         options=sku_options,
+                        format_func=sku_labels.get,
                         index=0
                     )
-                    if selected_sku_display:
-                        selected_sku = selected_sku_display.split(" - ")[0]
             
-            if selected_sku:
-                st.markdown(f"### 📊 Analysis for SKU: **{selected_sku}**")
-                
-                # Get SKU details
-                sku_details = last_month_data[last_month_data['SKU_ID'] == selected_sku].iloc[0].to_dict() if not last_month_data.empty else {}
-                product_name = sku_details.get('Product_Name', 'N/A')
-                brand = sku_details.get('Brand', 'N/A')
-                tier = sku_details.get('SKU_Tier', 'N/A')
-                
-                # Display SKU info
-                col_info1, col_info2, col_info3, col_info4 = st.columns(4)
-                with col_info1:
-                    st.metric("Product", product_name)
-                with col_info2:
-                    st.metric("Brand", brand)
-                with col_info3:
-                    st.metric("Tier", tier)
-                with col_info4:
-                    stock_qty = sku_details.get('Stock_Qty', 0)
-                    st.metric("Current Stock", f"{stock_qty:,.0f}")
-                
-                # SECTION 1: 12-MONTH PERFORMANCE TIMELINE - SIMPLE VERSION
-                st.markdown("#### 📈 12-Month Performance Timeline")
-                
-                # Prepare historical data for this SKU
-                historical_data = []
-                
-                # Get last 12 months data
-                if not df_sales.empty:
-                    sales_months = sorted(df_sales['Month'].unique())
-                    last_12_months = sales_months[-12:] if len(sales_months) >= 12 else sales_months
+                if selected_sku:
+                    st.markdown(f"### 📊 Analysis for SKU: **{selected_sku}**")
+                
+                    # Get SKU details
+                    sku_details = last_month_data[last_month_data['SKU_ID'] == selected_sku].iloc[0].to_dict() if not last_month_data.empty else {}
+                    product_name = sku_details.get('Product_Name', 'N/A')
+                    brand = sku_details.get('Brand', 'N/A')
+                    tier = sku_details.get('SKU_Tier', 'N/A')
+                
+                    # Display SKU info
+                    col_info1, col_info2, col_info3, col_info4 = st.columns(4)
+                    with col_info1:
+                        st.metric("Product", product_name)
+                    with col_info2:
+                        st.metric("Brand", brand)
+                    with col_info3:
+                        st.metric("Tier", tier)
+                    with col_info4:
+                        stock_qty = sku_details.get('Stock_Qty', 0)
+                        st.metric("Current Stock", f"{stock_qty:,.0f}")
+                
+                    # SECTION 1: 12-MONTH PERFORMANCE TIMELINE - SIMPLE VERSION
+                    st.markdown("#### 📈 12-Month Performance Timeline")
+                
+                    # Prepare historical data for this SKU
+                    historical_data = []
+                
+                    # Get last 12 months data (qty SKU per bulan dari cube)
+                    if not df_sales.empty:
+                        sales_months = cube_months(sku_month_cube, ['Sales_Qty'])
+                        last_12_months = sales_months[-12:]
+                        sku_history = cube_sku_history(sku_month_cube, selected_sku, last_12_months)
                     
-                    for month in last_12_months:
-                        month_name = month.strftime('%b-%Y')
-                        
-                        # Get data for this SKU in this month
-                        sales_qty = df_sales[(df_sales['Month'] == month) & 
-                                           (df_sales['SKU_ID'] == selected_sku)]['Sales_Qty'].sum()
-                        
-                        forecast_qty = df_forecast[(df_forecast['Month'] == month) & 
-                                                 (df_forecast['SKU_ID'] == selected_sku)]['Forecast_Qty'].sum() if not df_forecast.empty else 0
-                        
-                        po_qty = df_po[(df_po['Month'] == month) & 
-                                     (df_po['SKU_ID'] == selected_sku)]['PO_Qty'].sum() if not df_po.empty else 0
-                        
-                        historical_data.append({
-                            'Month': month,
-                            'Month_Display': month_name,
-                            'Sales': sales_qty,
-                            'Rofo': forecast_qty,
-                            'PO': po_qty
-                        })
-                
-                if historical_data:
-                    hist_df = pd.DataFrame(historical_data)
-                    hist_df = hist_df.sort_values('Month')
+                        historical_data = pd.DataFrame({
+                            'Month': sku_history['Month'],
+                            'Month_Display': sku_history['Month'].dt.strftime('%b-%Y'),
+                            'Sales': sku_history['Sales_Qty'],
+                            'Rofo': sku_history['Forecast_Qty'],
+                            'PO': sku_history['PO_Qty']
+                        }).to_dict('records')
+                
+                    if historical_data:
+                        hist_df = pd.DataFrame(historical_data)
+                        hist_df = hist_df.sort_values('Month')
                     
-                    # SIMPLE CHART - tanpa dual-axis dulu
-                    fig_timeline = go.Figure()
+                        # SIMPLE CHART - tanpa dual-axis dulu
+                        fig_timeline = go.Figure()
                     
-                    # Quantity lines
-                    fig_timeline.add_trace(go.Scatter(
-                        x=hist_df['Month_Display'],
-                        y=hist_df['Rofo'],
-                        name='Rofo',
-                        mode='lines+markers',
-                        line=dict(color='#667eea', width=3),
-                        marker=dict(size=8, color='#667eea')
-                    ))
+                        # Quantity lines
+                        fig_timeline.add_trace(go.Scatter(
+                            x=hist_df['Month_Display'],
+                            y=hist_df['Rofo'],
+                            name='Rofo',
+                            mode='lines+markers',
+                            line=dict(color='#667eea', width=3),
+                            marker=dict(size=8, color='#667eea')
+                        ))
                     
-                    fig_timeline.add_trace(go.Scatter(
-                        x=hist_df['Month_Display'],
-                        y=hist_df['PO'],
-                        name='PO',
-                        mode='lines+markers',
-                        line=dict(color='#FF9800', width=3),
-                        marker=dict(size=8, color='#FF9800')
-                    ))
+                        fig_timeline.add_trace(go.Scatter(
+                            x=hist_df['Month_Display'],
+                            y=hist_df['PO'],
+                            name='PO',
+                            mode='lines+markers',
+                            line=dict(color='#FF9800', width=3),
+                            marker=dict(size=8, color='#FF9800')
+                        ))
                     
-                    fig_timeline.add_trace(go.Scatter(
-                        x=hist_df['Month_Display'],
-                        y=hist_df['Sales'],
-                        name='Sales',
-                        mode='lines+markers',
-                        line=dict(color='#4CAF50', width=3),
-                        marker=dict(size=8, color='#4CAF50')
-                    ))
+                        fig_timeline.add_trace(go.Scatter(
+                            x=hist_df['Month_Display'],
+                            y=hist_df['Sales'],
+                            name='Sales',
+                            mode='lines+markers',
+                            line=dict(color='#4CAF50', width=3),
+                            marker=dict(size=8, color='#4CAF50')
+                        ))
                     
-                    # SIMPLE LAYOUT
-                    fig_timeline.update_layout(
-                        height=400,
-                        title=f'SKU Performance: {selected_sku}',
-                        xaxis_title='Month',
-                        yaxis_title='Quantity',
-                        plot_bgcolor='white'
-                    )
+                        # SIMPLE LAYOUT
+                        fig_timeline.update_layout(
+                            height=400,
+                            title=f'SKU Performance: {selected_sku}',
+                            xaxis_title='Month',
+                            yaxis_title='Quantity',
+                            plot_bgcolor='white'
+                        )
                     
-                    st.plotly_chart(fig_timeline, use_container_width=True)
+                        st.plotly_chart(fig_timeline, use_container_width=True)
                     
-                    # Tambahkan accuracy chart terpisah
-                    if not df_forecast.empty and not df_po.empty:
-                        # Calculate accuracy per month
-                        accuracy_data = []
-                        for month in last_12_months:
-                            month_name = month.strftime('%b-%Y')
-                            forecast_qty = df_forecast[(df_forecast['Month'] == month) & 
-                                                     (df_forecast['SKU_ID'] == selected_sku)]['Forecast_Qty'].sum()
-                            po_qty = df_po[(df_po['Month'] == month) & 
-                                         (df_po['SKU_ID'] == selected_sku)]['PO_Qty'].sum()
-                            
-                            if forecast_qty > 0 and po_qty > 0:
-                                accuracy = 100 - abs((po_qty / forecast_qty * 100) - 100)
-                                accuracy_data.append({
-                                    'Month': month_name,
-                                    'Accuracy': accuracy
-                                })
-                        
-                        if accuracy_data:
-                            acc_df = pd.DataFrame(accuracy_data)
+                        # Accuracy per bulan (hanya bulan dengan Rofo & PO > 0), dipakai chart & metrics di bawah
+                        sku_accuracy = sku_history[(sku_history['Forecast_Qty'] > 0) & (sku_history['PO_Qty'] > 0)]
+                        sku_accuracy = sku_accuracy.assign(Accuracy=100 - abs(sku_accuracy['PO_Qty'] / sku_accuracy['Forecast_Qty'] * 100 - 100))
+                    
+                        # Tambahkan accuracy chart terpisah
+                        if not df_forecast.empty and not df_po.empty:
+                            if not sku_accuracy.empty:
+                                acc_df = sku_accuracy
                             
-                            fig_acc = go.Figure()
-                            fig_acc.add_trace(go.Scatter(
-                                x=acc_df['Month'],
-                                y=acc_df['Accuracy'],
-                                mode='lines+markers',
-                                name='Accuracy %',
-                                line=dict(color='#FF5252', width=3),
-                                marker=dict(size=8, color='#FF5252')
-                            ))
+                                fig_acc = go.Figure()
+                                fig_acc.add_trace(go.Scatter(
+                                    x=acc_df['Month'].dt.strftime('%b-%Y'),
+                                    y=acc_df['Accuracy'],
+                                    mode='lines+markers',
+                                    name='Accuracy %',
+                                    line=dict(color='#FF5252', width=3),
+                                    marker=dict(size=8, color='#FF5252')
+                                ))
                             
-                            fig_acc.update_layout(
-                                height=300,
-                                title='Forecast Accuracy Trend',
-                                xaxis_title='Month',
-                                yaxis_title='Accuracy %',
-                                yaxis_range=[0, 110]
-                            )
+                                fig_acc.update_layout(
+                                    height=300,
+                                    title='Forecast Accuracy Trend',
+                                    xaxis_title='Month',
+                                    yaxis_title='Accuracy %',
+                                    yaxis_range=[0, 110]
+                                )
                             
-                            st.plotly_chart(fig_acc, use_container_width=True)
+                                st.plotly_chart(fig_acc, use_container_width=True)
                     
-                    # SECTION 2: INVENTORY HEALTH
-                    st.markdown("#### 📦 Inventory Health Analysis")
+                        # SECTION 2: INVENTORY HEALTH
+                        st.markdown("#### 📦 Inventory Health Analysis")
                     
-                    col_inv1, col_inv2, col_inv3, col_inv4 = st.columns(4)
+                        col_inv1, col_inv2, col_inv3, col_inv4 = st.columns(4)
                     
-                    with col_inv1:
-                        # Current stock
-                        current_stock = sku_details.get('Stock_Qty', 0)
-                        st.metric("Current Stock", f"{current_stock:,.0f}")
+                        with col_inv1:
+                            # Current stock
+                            current_stock = sku_details.get('Stock_Qty', 0)
+                            st.metric("Current Stock", f"{current_stock:,.0f}")
                     
-                    with col_inv2:
-                        # Avg monthly sales (3-month average)
-                        avg_sales_3m = sku_details.get('Avg_Monthly_Sales_3M', 0)
-                        st.metric("Avg Monthly Sales (3M)", f"{avg_sales_3m:,.0f}")
+                        with col_inv2:
+                            # Avg monthly sales (3-month average)
+                            avg_sales_3m = sku_details.get('Avg_Monthly_Sales_3M', 0)
+                            st.metric("Avg Monthly Sales (3M)", f"{avg_sales_3m:,.0f}")
                     
-                    with col_inv3:
-                        # Cover months
-                        cover_months = sku_details.get('Cover_Months', 0)
-                        cover_status = "High Stock" if cover_months > 1.5 else "Ideal" if cover_months >= 0.8 else "Low Stock"
-                        st.metric("Cover (Months)", f"{cover_months:.1f}", delta=cover_status)
+                        with col_inv3:
+                            # Cover months
+                            cover_months = sku_details.get('Cover_Months', 0)
+                            cover_status = "High Stock" if cover_months > 1.5 else "Ideal" if cover_months >= 0.8 else "Low Stock"
+                            st.metric("Cover (Months)", f"{cover_months:.1f}", delta=cover_status)
                     
-                    with col_inv4:
-                        # Sales trend (last 3 months vs previous 3 months)
-                        if len(hist_df) >= 6:
-                            recent_sales = hist_df.tail(3)['Sales'].sum()
-                            previous_sales = hist_df.head(3)['Sales'].sum() if len(hist_df) >= 6 else recent_sales
-                            sales_growth = ((recent_sales - previous_sales) / previous_sales * 100) if previous_sales > 0 else 0
-                            st.metric("Sales Growth (3M)", f"{sales_growth:+.1f}%")
+                        with col_inv4:
+                            # Sales trend (last 3 months vs previous 3 months)
+                            if len(hist_df) >= 6:
+                                recent_sales = hist_df.tail(3)['Sales'].sum()
+                                previous_sales = hist_df.head(3)['Sales'].sum() if len(hist_df) >= 6 else recent_sales
+                                sales_growth = ((recent_sales - previous_sales) / previous_sales * 100) if previous_sales > 0 else 0
+                                st.metric("Sales Growth (3M)", f"{sales_growth:+.1f}%")
                     
-                    # SECTION 3: FORECAST PERFORMANCE METRICS
-                    st.markdown("#### 🎯 Forecast Performance Metrics")
+                        # SECTION 3: FORECAST PERFORMANCE METRICS
+                        st.markdown("#### 🎯 Forecast Performance Metrics")
                     
-                    # Calculate forecast accuracy metrics
-                    if not df_forecast.empty and not df_po.empty:
-                        # Get accuracy data separately
-                        accuracy_data = []
-                        for month in last_12_months:
-                            forecast_qty = df_forecast[(df_forecast['Month'] == month) & 
-                                                     (df_forecast['SKU_ID'] == selected_sku)]['Forecast_Qty'].sum()
-                            po_qty = df_po[(df_po['Month'] == month) & 
-                                         (df_po['SKU_ID'] == selected_sku)]['PO_Qty'].sum()
-                            
-                            if forecast_qty > 0 and po_qty > 0:
-                                accuracy = 100 - abs((po_qty / forecast_qty * 100) - 100)
-                                accuracy_data.append({
-                                    'Month': month,
-                                    'Forecast_Qty': forecast_qty,
-                                    'PO_Qty': po_qty,
-                                    'Accuracy': accuracy
-                                })
-                        
-                        if accuracy_data:
-                            acc_df = pd.DataFrame(accuracy_data)
+                        # Calculate forecast accuracy metrics
+                        if not df_forecast.empty and not df_po.empty:
+                            if not sku_accuracy.empty:
+                                acc_df = sku_accuracy
                             
-                            col_met1, col_met2, col_met3, col_met4 = st.columns(4)
+                                col_met1, col_met2, col_met3, col_met4 = st.columns(4)
                             
-                            with col_met1:
-                                # Average accuracy
-                                avg_accuracy = acc_df['Accuracy'].mean()
-                                accuracy_status = "Good" if avg_accuracy >= 80 else "Needs Improvement"
-                                st.metric("Avg Forecast Accuracy", f"{avg_accuracy:.1f}%", delta=accuracy_status)
+                                with col_met1:
+                                    # Average accuracy
+                                    avg_accuracy = acc_df['Accuracy'].mean()
+                                    accuracy_status = "Good" if avg_accuracy >= 80 else "Needs Improvement"
+                                    st.metric("Avg Forecast Accuracy", f"{avg_accuracy:.1f}%", delta=accuracy_status)
                             
-                            with col_met2:
-                                # Forecast vs Sales ratio
-                                total_forecast = acc_df['Forecast_Qty'].sum()
-                                # Get total sales for same months
-                                total_sales = 0
-                                for month in acc_df['Month']:
-                                    sales_qty = df_sales[(df_sales['Month'] == month) & 
-                                                       (df_sales['SKU_ID'] == selected_sku)]['Sales_Qty'].sum()
-                                    total_sales += sales_qty
+                                with col_met2:
+                                    # Forecast vs Sales ratio
+                                    total_forecast = acc_df['Forecast_Qty'].sum()
+                                    # Get total sales for same months
+                                    total_sales = sku_history.loc[sku_history['Month'].isin(acc_df['Month']), 'Sales_Qty'].sum()
                                 
-                                forecast_vs_sales = (total_forecast / total_sales * 100) if total_sales > 0 else 0
-                                st.metric("Forecast/Sales %", f"{forecast_vs_sales:.1f}%")
+                                    forecast_vs_sales = (total_forecast / total_sales * 100) if total_sales > 0 else 0
+                                    st.metric("Forecast/Sales %", f"{forecast_vs_sales:.1f}%")
                             
-                            with col_met3:
-                                # PO vs Forecast ratio
-                                total_po = acc_df['PO_Qty'].sum()
-                                po_vs_forecast = (total_po / total_forecast * 100) if total_forecast > 0 else 0
-                                st.metric("PO/Forecast %", f"{po_vs_forecast:.1f}%")
+                                with col_met3:
+                                    # PO vs Forecast ratio
+                                    total_po = acc_df['PO_Qty'].sum()
+                                    po_vs_forecast = (total_po / total_forecast * 100) if total_forecast > 0 else 0
+                                    st.metric("PO/Forecast %", f"{po_vs_forecast:.1f}%")
                             
-                            with col_met4:
-                                # Consistency score (std dev of accuracy)
-                                accuracy_std = acc_df['Accuracy'].std()
-                                consistency_score = max(0, 100 - accuracy_std)
-                                st.metric("Consistency Score", f"{consistency_score:.1f}")
+                                with col_met4:
+                                    # Consistency score (std dev of accuracy)
+                                    accuracy_std = acc_df['Accuracy'].std()
+                                    consistency_score = max(0, 100 - accuracy_std)
+                                    st.metric("Consistency Score", f"{consistency_score:.1f}")
                             
-                            # SECTION 4: RECOMMENDATIONS
-                            st.markdown("#### 💡 Recommendations")
+                                # SECTION 4: RECOMMENDATIONS
+                                st.markdown("#### 💡 Recommendations")
                             
-                            recommendations = []
+                                recommendations = []
                             
-                            # Stock recommendations
-                            cover_months = sku_details.get('Cover_Months', 0)
-                            if cover_months < 0.8:
-                                recommendations.append("🔄 **Need Replenishment**: Stock cover is below 0.8 months")
-                            elif cover_months > 1.5:
-                                recommendations.append("📉 **Reduce Stock**: High stock coverage (>1.5 months)")
+                                # Stock recommendations
+                                cover_months = sku_details.get('Cover_Months', 0)
+                                if cover_months < 0.8:
+                                    recommendations.append("🔄 **Need Replenishment**: Stock cover is below 0.8 months")
+                                elif cover_months > 1.5:
+                                    recommendations.append("📉 **Reduce Stock**: High stock coverage (>1.5 months)")
                             
-                            # Forecast accuracy recommendations
-                            if avg_accuracy < 80:
-                                recommendations.append("🎯 **Improve Forecasting**: Accuracy below 80% target")
+                                # Forecast accuracy recommendations
+                                if avg_accuracy < 80:
+                                    recommendations.append("🎯 **Improve Forecasting**: Accuracy below 80% target")
                             
-                            # Sales trend recommendations
-                            sales_growth = 0  # Calculate sales growth
-                            if len(hist_df) >= 6:
-                                recent_sales = hist_df.tail(3)['Sales'].sum()
-                                previous_sales = hist_df.head(3)['Sales'].sum()
-                                sales_growth = ((recent_sales - previous_sales) / previous_sales * 100) if previous_sales > 0 else 0
+                                # Sales trend recommendations
+                                sales_growth = 0  # Calculate sales growth
+                                if len(hist_df) >= 6:
+                                    recent_sales = hist_df.tail(3)['Sales'].sum()
+                                    previous_sales = hist_df.head(3)['Sales'].sum()
+                                    sales_growth = ((recent_sales - previous_sales) / previous_sales * 100) if previous_sales > 0 else 0
                             
-                            if sales_growth < -10:
-                                recommendations.append("📊 **Review Demand**: Sales declining significantly")
-                            elif sales_growth > 50:
-                                recommendations.append("🚀 **Opportunity**: Strong sales growth detected")
+                                if sales_growth < -10:
+                                    recommendations.append("📊 **Review Demand**: Sales declining significantly")
+                                elif sales_growth > 50:
+                                    recommendations.append("🚀 **Opportunity**: Strong sales growth detected")
                             
-                            # PO compliance recommendations
-                            if po_vs_forecast < 80:
-                                recommendations.append("📝 **Increase PO Compliance**: PO significantly below forecast")
-                            elif po_vs_forecast > 120:
-                                recommendations.append("⚠️ **Reduce Over-PO**: PO significantly above forecast")
+                                # PO compliance recommendations
+                                if po_vs_forecast < 80:
+                                    recommendations.append("📝 **Increase PO Compliance**: PO significantly below forecast")
+                                elif po_vs_forecast > 120:
+                                    recommendations.append("⚠️ **Reduce Over-PO**: PO significantly above forecast")
                             
-                            # Financial recommendations (if financial data available)
-                            if 'Margin_Percentage' in sku_details:
-                                margin = sku_details.get('Margin_Percentage', 0)
-                                if margin < 20:
-                                    recommendations.append("💰 **Low Margin Alert**: Margin below 20%")
-                                elif margin > 40:
-                                    recommendations.append("💰 **High Margin Opportunity**: Excellent margin performance")
+                                # Financial recommendations (if financial data available)
+                                if 'Margin_Percentage' in sku_details:
+                                    margin = sku_details.get('Margin_Percentage', 0)
+                                    if margin < 20:
+                                        recommendations.append("💰 **Low Margin Alert**: Margin below 20%")
+                                    elif margin > 40:
+                                        recommendations.append("💰 **High Margin Opportunity**: Excellent margin performance")
                             
-                            if recommendations:
-                                for rec in recommendations:
-                                    st.write(f"- {rec}")
+                                if recommendations:
+                                    for rec in recommendations:
+                                        st.write(f"- {rec}")
+                                else:
+                                    st.success("✅ **Excellent**: This SKU is performing well across all metrics!")
                             else:
-                                st.success("✅ **Excellent**: This SKU is performing well across all metrics!")
-                        else:
-                            st.info("No forecast accuracy data available for this SKU")
+                                st.info("No forecast accuracy data available for this SKU")
+
+        render_sku_evaluation(last_month, last_month_data)
+
     else:
         st.info("📊 Insufficient data for SKU evaluation")
 
 # --- TAB 5: SALES & FORECAST ANALYSIS ---
-with tab5:
+if render_section('sales_forecast'):
     st.subheader("📈 Sales & Forecast Analysis")
     
     if sales_vs_forecast:
@@ -4263,30 +5877,16 @@ with tab5:
         # Get ALL available months, not just last 6
         monthly_trend = []
         
-        # Get unique months from ALL datasets
-        all_months = set()
-        if not df_sales.empty:
-            all_months.update(df_sales['Month'].unique())
-        if not df_forecast.empty:
-            all_months.update(df_forecast['Month'].unique())
-        if not df_po.empty:
-            all_months.update(df_po['Month'].unique())
-        
-        if all_months:
-            sorted_months = sorted(all_months)
-            
-            for month in sorted_months:  # PAKAI SEMUA BULAN, bukan cuma 6 terakhir
-                month_name = month.strftime('%b-%Y')
-                sales_qty = df_sales[df_sales['Month'] == month]['Sales_Qty'].sum() if not df_sales.empty else 0
-                forecast_qty = df_forecast[df_forecast['Month'] == month]['Forecast_Qty'].sum() if not df_forecast.empty else 0
-                po_qty = df_po[df_po['Month'] == month]['PO_Qty'].sum() if not df_po.empty else 0
-                
-                monthly_trend.append({
-                    'Month': month_name,
-                    'Rofo': forecast_qty,
-                    'PO': po_qty,
-                    'Sales': sales_qty
-                })
+        # Get unique months from ALL datasets (total per bulan langsung dari cube)
+        sorted_months = cube_months(sku_month_cube)
+        
+        if len(sorted_months):
+            monthly_trend = pd.DataFrame({
+                'Month': sorted_months.strftime('%b-%Y'),  # PAKAI SEMUA BULAN, bukan cuma 6 terakhir
+                'Rofo': cube_month_totals(sku_month_cube, 'Forecast_Qty', sorted_months).values,
+                'PO': cube_month_totals(sku_month_cube, 'PO_Qty', sorted_months).values,
+                'Sales': cube_month_totals(sku_month_cube, 'Sales_Qty', sorted_months).values
+            }).to_dict('records')
         
         if monthly_trend:
             trend_df = pd.DataFrame(monthly_trend)
@@ -4332,10 +5932,10 @@ with tab5:
             if not df_forecast.empty and not df_po.empty:
                 accuracy_trend = []
                 
-                for month in sorted_months:  # PAKAI SEMUA BULAN
-                    month_name = month.strftime('%b-%Y')
-                    forecast_qty = df_forecast[df_forecast['Month'] == month]['Forecast_Qty'].sum()
-                    po_qty = df_po[df_po['Month'] == month]['PO_Qty'].sum()
+                for row in monthly_trend:  # PAKAI SEMUA BULAN
+                    month_name = row['Month']
+                    forecast_qty = row['Rofo']
+                    po_qty = row['PO']
                     
                     if forecast_qty > 0:
                         accuracy = 100 - abs((po_qty / forecast_qty * 100) - 100)
@@ -4373,25 +5973,17 @@ with tab5:
         st.markdown("### 🏷️ Brand Performance")
         
         if not df_forecast.empty and not df_po.empty and not df_sales.empty:
-            # Get last month brand data
-            forecast_last = df_forecast[df_forecast['Month'] == last_month].copy()
-            po_last = df_po[df_po['Month'] == last_month].copy()
-            sales_last = df_sales[df_sales['Month'] == last_month].copy()
-            
-            # Add product info
-            forecast_last = add_product_info_to_data(forecast_last, df_product)
-            po_last = add_product_info_to_data(po_last, df_product)
-            sales_last = add_product_info_to_data(sales_last, df_product)
-            
-            if 'Brand' in forecast_last.columns:
-                # Aggregate by brand
+            # Get last month brand data (fact table)
+            month_rows = month_facts(sku_month_facts, last_month)
+            
+            if 'Brand' in month_rows.columns:
+                # Aggregate by brand (brand yang ada di forecast bulan terakhir)
                 brand_data = []
-                brands = forecast_last['Brand'].unique()
+                brands = month_rows.loc[month_rows['Has_Forecast'], 'Brand'].dropna().unique().tolist()
+                brand_totals = month_rows.groupby('Brand', observed=True)[['Forecast_Qty', 'PO_Qty', 'Sales_Qty']].sum()
                 
                 for brand in brands:
-                    rofo = forecast_last[forecast_last['Brand'] == brand]['Forecast_Qty'].sum()
-                    po = po_last[po_last['Brand'] == brand]['PO_Qty'].sum()
-                    sales = sales_last[sales_last['Brand'] == brand]['Sales_Qty'].sum()
+                    rofo, po, sales = brand_totals.loc[brand]
                     
                     brand_data.append({
                         'Brand': brand,
@@ -4488,14 +6080,12 @@ with tab5:
             
             display_df = display_df[available_cols].head(20)
             
-            # Format
-            if 'Sales_vs_Forecast_Ratio' in display_df.columns:
-                display_df['Sales_vs_Forecast_Ratio'] = display_df['Sales_vs_Forecast_Ratio'].apply(lambda x: f"{x:.1f}%")
-            
-            if 'Sales_vs_PO_Ratio' in display_df.columns:
-                display_df['Sales_vs_PO_Ratio'] = display_df['Sales_vs_PO_Ratio'].apply(lambda x: f"{x:.1f}%")
-            
-            st.dataframe(display_df, use_container_width=True, height=400)
+            st.dataframe(
+                display_df,
+                column_config=format_columns({'Sales_vs_Forecast_Ratio': 'percent', 'Sales_vs_PO_Ratio': 'percent'}, display_df.columns),
+                use_container_width=True,
+                height=400
+            )
         else:
             st.success(f"✅ No high deviation SKUs in {last_month_name}")
     
@@ -4503,65 +6093,68 @@ with tab5:
         st.info("📊 Need sales, forecast, and PO data for analysis")
 
 # --- TAB 6: DATA EXPLORER ---
-with tab6:
+if render_section('data_explorer'):
     st.subheader("📋 Raw Data Explorer")
     
-    dataset_options = {
-        "Product Master": df_product,
-        "Active Products": df_product_active,
-        "Sales Data": df_sales,
-        "Forecast Data": df_forecast,
-        "PO Data": df_po,
-        "Stock Data": df_stock,
-        "Financial Data": df_financial,
-        "Inventory Financial": df_inventory_financial
-    }
+    # Pilihan dataset / kolom hanya me-rerun explorer ini (fragment)
+    @st.fragment
+    def render_data_explorer():
+        """Preview + download dataset mentah yang dipilih"""
+        dataset_options = {
+            "Product Master": df_product,
+            "Active Products": df_product_active,
+            "Sales Data": df_sales,
+            "Forecast Data": df_forecast,
+            "PO Data": df_po,
+            "Stock Data": df_stock,
+            "Financial Data": df_financial,
+            "Inventory Financial": df_inventory_financial
+        }
     
-    selected_dataset = st.selectbox("Select Dataset", list(dataset_options.keys()))
-    df_selected = dataset_options[selected_dataset]
-    
-    if not df_selected.empty:
-        # Ensure Product_Name is shown alongside SKU_ID if available
-        if 'SKU_ID' in df_selected.columns and 'Product_Name' in df_selected.columns:
-            # Reorder columns to show SKU_ID and Product_Name first
-            cols = list(df_selected.columns)
-            if 'Product_Name' in cols:
-                cols.remove('Product_Name')
-                cols.insert(1, 'Product_Name')
-            df_selected = df_selected[cols]
-        
-        # Data info
-        st.write(f"**Rows:** {df_selected.shape[0]:,} | **Columns:** {df_selected.shape[1]}")
-        
-        # Column selector
-        if st.checkbox("Select Columns", False):
-            all_columns = df_selected.columns.tolist()
-            selected_columns = st.multiselect("Choose columns:", all_columns, default=all_columns[:10])
-            df_display = df_selected[selected_columns]
-        else:
-            df_display = df_selected
+        selected_dataset = st.selectbox("Select Dataset", list(dataset_options.keys()))
+        df_selected = dataset_options[selected_dataset]
+    
+        if not df_selected.empty:
+            # Ensure Product_Name is shown alongside SKU_ID if available
+            if 'SKU_ID' in df_selected.columns and 'Product_Name' in df_selected.columns:
+                # Reorder columns to show SKU_ID and Product_Name first
+                cols = list(df_selected.columns)
+                if 'Product_Name' in cols:
+                    cols.remove('Product_Name')
+                    cols.insert(1, 'Product_Name')
+                df_selected = df_selected[cols]
+        
+            # Data info
+            st.write(f"**Rows:** {df_selected.shape[0]:,} | **Columns:** {df_selected.shape[1]}")
+        
+            # Column selector
+            if st.checkbox("Select Columns", False):
+                all_columns = df_selected.columns.tolist()
+                selected_columns = st.multiselect("Choose columns:", all_columns, default=all_columns[:10])
+                df_display = df_selected[selected_columns]
+            else:
+                df_display = df_selected
         
-        # Data preview
-        st.dataframe(
-            df_display,
-            use_container_width=True,
-            height=500
-        )
+            # Data preview
+            st.dataframe(
+                df_display,
+                use_container_width=True,
+                height=500
+            )
         
-        # Download option
-        csv = df_selected.to_csv(index=False)
-        st.download_button(
-            label="📥 Download CSV",
-            data=csv,
-            file_name=f"{selected_dataset.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
-    else:
-        st.warning("No data available for selected dataset")
+            # Download option
+            download_data_button(
+                "📥 Download Data", df_selected, selected_dataset, dataset_version,
+                f"{selected_dataset.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}",
+                key="download_explorer", use_container_width=True
+            )
+        else:
+            st.warning("No data available for selected dataset")
+
+    render_data_explorer()
 
 # --- TAB 7: FORECAST ECOMMERCE ANALYSIS ---
-with tab7:
+if render_section('ecomm'):
     st.subheader("🛒 Ecommerce Forecast Analysis 2026")
     st.markdown("**Analyze Ecommerce forecast data from Forecast_2026_Ecomm sheet**")
     
@@ -4581,7 +6174,8 @@ with tab7:
                     columns='Month',
                     values='Forecast_Qty',
                     aggfunc='sum',
-                    fill_value=0
+                    fill_value=0,
+                    observed=True
                 ).reset_index()
                 
                 # Rename columns to month format
@@ -4620,26 +6214,13 @@ with tab7:
             else: return f"{value:.0f}"
         except: return str(value)
     
-    def parse_month_str(month_str):
-        """Parse bulan dari string format"""
-        try:
-            month_str = str(month_str).upper()
-            if '-' in month_str:
-                month_part, year_part = month_str.split('-')
-                month_num = datetime.strptime(month_part[:3], '%b').month
-                year = 2000 + int(year_part) if len(year_part) == 2 else int(year_part)
-                return datetime(year, month_num, 1)
-            return datetime.now()
-        except:
-            return datetime.now()
-
-    def calculate_monthly_value(df_forecast, month_cols, df_product):
+    def calculate_monthly_value(df_forecast, month_cols, product_dim):
         """Hitung value (revenue projection) untuk setiap bulan"""
         if df_forecast.empty or not month_cols:
             return pd.DataFrame()
         
         # Gabungkan dengan harga
-        df_with_price = add_product_info_to_data(df_forecast, df_product)
+        df_with_price = add_product_info_to_data(df_forecast, product_dim)
         
         # Hitung value untuk setiap bulan
         monthly_values = []
@@ -4670,7 +6251,7 @@ with tab7:
         
         # Hitung value jika ada harga
         total_value = 0
-        df_with_price = add_product_info_to_data(df_ecomm_forecast, df_product)
+        df_with_price = add_product_info_to_data(df_ecomm_forecast, product_dim)
         if 'Floor_Price' in df_with_price.columns:
             for month in ecomm_forecast_month_cols:
                 total_value += (df_with_price[month] * df_with_price['Floor_Price'].fillna(0)).sum()
@@ -4695,7 +6276,7 @@ with tab7:
             # Default select top 5
             default_brands = []
             if all_brands:
-                default_brands = df_ecomm_forecast.groupby('Brand')[ecomm_forecast_month_cols].sum().sum(axis=1).nlargest(5).index.tolist()
+                default_brands = df_ecomm_forecast.groupby('Brand', observed=True)[ecomm_forecast_month_cols].sum().sum(axis=1).nlargest(5).index.tolist()
 
             selected_brands = st.multiselect("Filter by Brand", options=all_brands, default=default_brands, key="ecomm_brand_filter")
         
@@ -4712,14 +6293,14 @@ with tab7:
         
         # Sort months
         display_month_cols = ecomm_forecast_month_cols[-display_months:] if display_months < len(ecomm_forecast_month_cols) else ecomm_forecast_month_cols
-        sorted_month_cols = sorted(display_month_cols, key=parse_month_str)
+        sorted_month_cols = sort_month_labels(display_month_cols)
 
         # Generate Line Chart
         fig = go.Figure()
 
         # Add Lines for Brands
         if 'Brand' in filtered_ecomm.columns and not filtered_ecomm.empty:
-            brand_volumes = filtered_ecomm.groupby('Brand')[sorted_month_cols].sum().sum(axis=1).sort_values(ascending=False)
+            brand_volumes = filtered_ecomm.groupby('Brand', observed=True)[sorted_month_cols].sum().sum(axis=1).sort_values(ascending=False)
             for brand in brand_volumes.index:
                 brand_monthly_qty = filtered_ecomm[filtered_ecomm['Brand'] == brand][sorted_month_cols].sum()
                 fig.add_trace(go.Scatter(
@@ -4737,9 +6318,9 @@ with tab7:
         
         # Add Total Value Line
         if show_value:
-            monthly_value_df = calculate_monthly_value(filtered_ecomm, sorted_month_cols, df_product)
+            monthly_value_df = calculate_monthly_value(filtered_ecomm, sorted_month_cols, product_dim)
             if not monthly_value_df.empty:
-                monthly_value_df['Month_Date'] = monthly_value_df['Month'].apply(parse_month_str)
+                monthly_value_df['Month_Date'] = parse_month_labels(monthly_value_df['Month'])
                 monthly_value_df = monthly_value_df.set_index('Month').reindex(sorted_month_cols).reset_index()
                 fig.add_trace(go.Scatter(
                     x=monthly_value_df['Month'], y=monthly_value_df['Value'], name='Total Value (Rp)',
@@ -4771,19 +6352,15 @@ with tab7:
         st.subheader("📅 Quarterly Brand Analysis (Qty & Value)")
         
         # 1. Prepare Quarter Logic
-        q_map = {'Q1': ['jan', 'feb', 'mar'], 'Q2': ['apr', 'may', 'jun'], 
-                 'Q3': ['jul', 'aug', 'sep'], 'Q4': ['oct', 'nov', 'dec']}
-        
         quarter_cols_map = {'Q1': [], 'Q2': [], 'Q3': [], 'Q4': []}
-        
+
         # Sort cols first
-        all_cols_sorted = sorted(ecomm_forecast_month_cols, key=parse_month_str)
-        
+        all_cols_sorted = sort_month_labels(ecomm_forecast_month_cols)
+
         for col in all_cols_sorted:
-            m_str = col.split('-')[0].lower()[:3]
-            for q, months in q_map.items():
-                if m_str in months:
-                    quarter_cols_map[q].append(col)
+            month_date = parse_month_label(col)
+            if month_date is not None:
+                quarter_cols_map[f"Q{(month_date.month - 1) // 3 + 1}"].append(col)
         
         # Identify available quarters (those that have data)
         active_quarters = [q for q, cols in quarter_cols_map.items() if len(cols) > 0]
@@ -4812,12 +6389,6 @@ with tab7:
                 
                 df_q_qty = pd.DataFrame(q_brand_qty).sort_values('Total', ascending=False)
                 
-                # Format for display
-                df_q_qty_disp = df_q_qty.copy()
-                for col in df_q_qty_disp.columns:
-                    if col != 'Brand':
-                        df_q_qty_disp[col] = df_q_qty_disp[col].apply(format_number)
-                
                 # Visual Heatmap
                 fig_heat_qty = go.Figure(data=go.Heatmap(
                     z=df_q_qty[active_quarters].head(10).values,
@@ -4831,12 +6402,16 @@ with tab7:
                 st.plotly_chart(fig_heat_qty, use_container_width=True)
                 
                 st.markdown("#### 📋 Quarterly Quantity Table")
-                st.dataframe(df_q_qty_disp, use_container_width=True)
+                st.dataframe(
+                    df_q_qty,
+                    column_config=format_columns({col: 'qty' for col in df_q_qty.columns if col != 'Brand'}),
+                    use_container_width=True
+                )
 
             # --- Tab Value ---
             with q_tab2:
                 # Check price
-                df_for_val = add_product_info_to_data(df_ecomm_forecast, df_product)
+                df_for_val = add_product_info_to_data(df_ecomm_forecast, product_dim)
                 if 'Floor_Price' in df_for_val.columns:
                     # Pre-calculate totals per row to optimize
                     df_for_val['Temp_Price'] = df_for_val['Floor_Price'].fillna(0)
@@ -4862,12 +6437,6 @@ with tab7:
                     
                     df_q_val = pd.DataFrame(q_brand_val).sort_values('Total', ascending=False)
                     
-                    # Format
-                    df_q_val_disp = df_q_val.copy()
-                    for col in df_q_val_disp.columns:
-                        if col != 'Brand':
-                            df_q_val_disp[col] = df_q_val_disp[col].apply(lambda x: f"Rp {format_number(x)}")
-                    
                     # Visual Heatmap (FULL NUMBER FORMAT)
                     fig_heat_val = go.Figure(data=go.Heatmap(
                         z=df_q_val[active_quarters].head(10).values,
@@ -4882,7 +6451,11 @@ with tab7:
                     st.plotly_chart(fig_heat_val, use_container_width=True)
                     
                     st.markdown("#### 📋 Quarterly Value Table")
-                    st.dataframe(df_q_val_disp, use_container_width=True)
+                    st.dataframe(
+                        df_q_val,
+                        column_config=format_columns({col: 'rupiah' for col in df_q_val.columns if col != 'Brand'}),
+                        use_container_width=True
+                    )
                 else:
                     st.warning("⚠️ Cannot calculate value: 'Floor_Price' missing in Product Master")
 
@@ -4905,13 +6478,20 @@ with tab7:
         available_cols = [col for col in display_cols if col in table_data.columns]
         
         table_disp = table_data[available_cols].head(50).copy()
-        for col in table_month_cols:
-            if col in table_disp.columns: table_disp[col] = table_disp[col].apply(format_number)
+        table_qty_cols = [col for col in table_month_cols if col in table_disp.columns]
+        table_disp[table_qty_cols] = table_disp[table_qty_cols].fillna(0)
             
-        st.dataframe(table_disp, use_container_width=True, height=400)
+        st.dataframe(
+            table_disp,
+            column_config=format_columns({col: 'qty' for col in table_qty_cols}),
+            use_container_width=True,
+            height=400
+        )
         
-        csv = table_data.to_csv(index=False)
-        st.download_button("📥 Download Forecast CSV", data=csv, file_name=f"ecomm_forecast_{datetime.now().strftime('%Y%m%d')}.csv", mime="text/csv")
+        download_data_button(
+            "📥 Download Forecast", table_data, ('ecomm_forecast', tuple(explorer_brands)), dataset_version,
+            f"ecomm_forecast_{datetime.now().strftime('%Y%m%d')}", key="download_ecomm_forecast"
+        )
 
         # --- SECTION 5: INSIGHTS ---
         st.divider()
@@ -4927,8 +6507,8 @@ with tab7:
         if 'Brand' in df_ecomm_forecast.columns:
              # Gunakan total volume dari loop brand section sebelumnya
              if total_qty > 0:
-                 top_brand_name = df_ecomm_forecast.groupby('Brand')[ecomm_forecast_month_cols].sum().sum(axis=1).idxmax()
-                 top_brand_qty = df_ecomm_forecast.groupby('Brand')[ecomm_forecast_month_cols].sum().sum(axis=1).max()
+                 top_brand_name = df_ecomm_forecast.groupby('Brand', observed=True)[ecomm_forecast_month_cols].sum().sum(axis=1).idxmax()
+                 top_brand_qty = df_ecomm_forecast.groupby('Brand', observed=True)[ecomm_forecast_month_cols].sum().sum(axis=1).max()
                  share = (top_brand_qty/total_qty*100)
                  insights.append(f"**🏆 Top Brand:** {top_brand_name} ({format_number(top_brand_qty)} units, {share:.1f}%)")
 
@@ -4938,7 +6518,7 @@ with tab7:
         st.error("❌ No Ecommerce forecast data available")
 
 # --- TAB 8: PROFITABILITY ANALYSIS ---
-with tab8:
+if render_section('profitability'):
     st.subheader("💰 Combined Profitability & Financial Projection (2026)")
     st.markdown("**Comprehensive Financial Outlook: Ecommerce + Reseller Channels**")
 
@@ -4990,16 +6570,9 @@ with tab8:
                 df_fin_combined['Qty'] = pd.to_numeric(df_fin_combined['Qty'], errors='coerce').fillna(0)
                 df_fin_combined = df_fin_combined[df_fin_combined['Qty'] > 0] # Ambil yang ada isinya saja
                 
-                # Standardize Month
-                def parse_fin_month(m):
-                    try:
-                        m = str(m).strip()
-                        if '-' in m:
-                            parts = m.split('-')
-                            return datetime.strptime(f"{parts[0][:3]}-20{parts[1][-2:]}", "%b-%Y")
-                    except: return None
-                
-                df_fin_combined['Month_Date'] = df_fin_combined['Month_Label'].apply(parse_fin_month)
+                # Standardize Month (Ecomm "Jan-26" & Reseller "Jan_26" -> label yang sama)
+                df_fin_combined['Month_Date'] = parse_month_labels(df_fin_combined['Month_Label'], strict=True)
+                df_fin_combined['Month_Label'] = df_fin_combined['Month_Date'].dt.strftime('%b-%y').where(df_fin_combined['Month_Date'].notna(), df_fin_combined['Month_Label'])
                 df_fin_combined = df_fin_combined.sort_values('Month_Date')
                 
                 # Add Product Info (Brand, Tier, Prices)
@@ -5043,7 +6616,7 @@ with tab8:
         avg_margin_pct = (total_margin / total_rev * 100) if total_rev > 0 else 0
         
         # Channel Mix
-        rev_by_channel = df_fin_combined.groupby('Channel')['Revenue'].sum()
+        rev_by_channel = df_fin_combined.groupby('Channel', observed=True)['Revenue'].sum()
         ecomm_rev = rev_by_channel.get('Ecommerce', 0)
         res_rev = rev_by_channel.get('Reseller', 0)
         ecomm_share = (ecomm_rev / total_rev * 100) if total_rev > 0 else 0
@@ -5072,7 +6645,7 @@ with tab8:
         
         with c1:
             # Monthly Revenue Stacked Bar
-            monthly_ch_rev = df_fin_combined.groupby(['Month_Label', 'Month_Date', 'Channel'])['Revenue'].sum().reset_index()
+            monthly_ch_rev = df_fin_combined.groupby(['Month_Label', 'Month_Date', 'Channel'], observed=True)['Revenue'].sum().reset_index()
             monthly_ch_rev = monthly_ch_rev.sort_values('Month_Date')
             
             fig_stack = px.bar(monthly_ch_rev, x='Month_Label', y='Revenue', color='Channel',
@@ -5084,7 +6657,7 @@ with tab8:
             
         with c2:
             # Profitability Summary Table per Channel
-            ch_summary = df_fin_combined.groupby('Channel').agg({
+            ch_summary = df_fin_combined.groupby('Channel', observed=True).agg({
                 'Revenue': 'sum',
                 'Gross_Margin': 'sum',
                 'Qty': 'sum'
@@ -5099,12 +6672,11 @@ with tab8:
             st.plotly_chart(fig_donut, use_container_width=True)
 
         # Show mini table for Channel
-        ch_disp = ch_summary.copy()
-        ch_disp['Revenue'] = ch_disp['Revenue'].apply(lambda x: f"Rp {x:,.0f}")
-        ch_disp['Gross_Margin'] = ch_disp['Gross_Margin'].apply(lambda x: f"Rp {x:,.0f}")
-        ch_disp['Margin %'] = ch_disp['Margin %'].apply(lambda x: f"{x:.1f}%")
-        ch_disp['Qty'] = ch_disp['Qty'].apply(lambda x: f"{x:,.0f}")
-        st.dataframe(ch_disp, use_container_width=True)
+        st.dataframe(
+            ch_summary,
+            column_config=format_columns({'Revenue': 'rupiah', 'Gross_Margin': 'rupiah', 'Margin %': 'percent', 'Qty': 'qty'}, ch_summary.columns),
+            use_container_width=True
+        )
 
         # --- C. BRAND PROFITABILITY MATRIX ---
         st.divider()
@@ -5112,7 +6684,7 @@ with tab8:
         st.caption("Analisis posisi Brand berdasarkan kontribusi Revenue dan tingkat Profitabilitas (Margin %)")
         
         if 'Brand' in df_fin_combined.columns:
-            brand_fin = df_fin_combined.groupby('Brand').agg({
+            brand_fin = df_fin_combined.groupby('Brand', observed=True).agg({
                 'Revenue': 'sum',
                 'Gross_Margin': 'sum',
                 'Qty': 'sum'
@@ -5141,7 +6713,7 @@ with tab8:
             # --- TIER PROFITABILITY STACKED BAR ---
             if 'SKU_Tier' in df_fin_combined.columns:
                 st.markdown("#### 📦 Profitability by Tier")
-                tier_fin = df_fin_combined.groupby(['SKU_Tier', 'Channel'])['Gross_Margin'].sum().reset_index()
+                tier_fin = df_fin_combined.groupby(['SKU_Tier', 'Channel'], observed=True)['Gross_Margin'].sum().reset_index()
                 
                 fig_tier = px.bar(tier_fin, x='SKU_Tier', y='Gross_Margin', color='Channel',
                                 title="Gross Margin Contribution by Tier & Channel",
@@ -5157,45 +6729,38 @@ with tab8:
         rank_col1, rank_col2 = st.columns(2)
         
         # Aggregasi per SKU
-        sku_fin = df_fin_combined.groupby(['SKU_ID', 'Product_Name', 'Brand']).agg({
+        sku_fin = df_fin_combined.groupby(['SKU_ID', 'Product_Name', 'Brand'], observed=True).agg({
             'Revenue': 'sum', 'Gross_Margin': 'sum', 'Qty': 'sum'
         }).reset_index()
         sku_fin['Margin %'] = (sku_fin['Gross_Margin'] / sku_fin['Revenue'] * 100)
         
         with rank_col1:
             st.markdown("**Top 10 SKUs by Revenue (Omzet)**")
-            top_rev = sku_fin.sort_values('Revenue', ascending=False).head(10).copy()
+            top_rev = sku_fin.sort_values('Revenue', ascending=False).head(10)
             
-            # Format
-            top_rev['Revenue'] = top_rev['Revenue'].apply(lambda x: f"Rp {x:,.0f}")
-            top_rev['Gross_Margin'] = top_rev['Gross_Margin'].apply(lambda x: f"Rp {x:,.0f}")
-            top_rev['Margin %'] = top_rev['Margin %'].apply(lambda x: f"{x:.1f}%")
-            
-            st.dataframe(top_rev[['SKU_ID', 'Product_Name', 'Revenue', 'Margin %']], use_container_width=True)
+            st.dataframe(
+                top_rev[['SKU_ID', 'Product_Name', 'Revenue', 'Margin %']],
+                column_config=format_columns({'Revenue': 'rupiah', 'Margin %': 'percent'}),
+                use_container_width=True
+            )
             
         with rank_col2:
             st.markdown("**Top 10 SKUs by Gross Margin (Cuan)**")
-            top_cuan = sku_fin.sort_values('Gross_Margin', ascending=False).head(10).copy()
-            
-            # Format
-            top_cuan['Revenue'] = top_cuan['Revenue'].apply(lambda x: f"Rp {x:,.0f}")
-            top_cuan['Gross_Margin'] = top_cuan['Gross_Margin'].apply(lambda x: f"Rp {x:,.0f}")
-            top_cuan['Margin %'] = top_cuan['Margin %'].apply(lambda x: f"{x:.1f}%")
+            top_cuan = sku_fin.sort_values('Gross_Margin', ascending=False).head(10)
             
-            st.dataframe(top_cuan[['SKU_ID', 'Product_Name', 'Gross_Margin', 'Margin %']], use_container_width=True)
+            st.dataframe(
+                top_cuan[['SKU_ID', 'Product_Name', 'Gross_Margin', 'Margin %']],
+                column_config=format_columns({'Gross_Margin': 'rupiah', 'Margin %': 'percent'}),
+                use_container_width=True
+            )
 
         # --- E. DOWNLOAD DATA ---
         st.divider()
         st.subheader("📥 Download Combined Financial Data")
         
-        dl_df = df_fin_combined.copy()
-        # Clean up for export
-        dl_csv = dl_df.to_csv(index=False)
-        st.download_button(
-            label="Download Combined Forecast 2026 (CSV)",
-            data=dl_csv,
-            file_name=f"Combined_Financial_Forecast_2026_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv"
+        download_data_button(
+            "Download Combined Forecast 2026", df_fin_combined, 'financial_combined', dataset_version,
+            f"Combined_Financial_Forecast_2026_{datetime.now().strftime('%Y%m%d')}", key="download_financial"
         )
         
     else:
@@ -5203,64 +6768,14 @@ with tab8:
 
 
 # --- TAB 9: RESELLER FORECAST ANALYSIS ---
-with tab9:
+if render_section('reseller'):
     st.subheader("🤝 Reseller Forecast Analysis 2026")
     st.markdown("**Analyze Reseller forecast data (2026 Projection with 2025 History)**")
     
-    # ================ 0. ROBUST DATE PARSER (FIXED FOR UNDERSCORE) ================
+    # ================ 0. DATE PARSER ================
+    # Kolom "Jan 25" / "Jan-25" / "Jan_25" (EN/ID) -> datetime via month label registry
     def get_date_object(col_name):
-        """
-        Mengubah string kolom (Jan 25 / Jan-25 / Jan_25) menjadi datetime object.
-        Support pemisah SPASI, STRIP, dan UNDERSCORE.
-        """
-        try:
-            col_name = str(col_name).strip().lower()
-            
-            # --- FIX: Normalisasi pemisah menjadi spasi semua ---
-            # Ini mengatasi masalah karena loader mengubah spasi jadi underscore
-            col_name_clean = col_name.replace('_', ' ').replace('-', ' ')
-            
-            parts = col_name_clean.split(' ')
-            
-            # Validasi panjang hasil split (harus ada bulan dan tahun)
-            if len(parts) < 2: return None
-            
-            # Filter elemen kosong jika ada double space
-            parts = [p for p in parts if p]
-            if len(parts) < 2: return None
-
-            m_str = parts[0][:3] # Ambil 3 huruf pertama (jan, feb...)
-            y_str = parts[1]     # Ambil tahun (25, 2025...)
-            
-            # Mapping bulan manual (Support EN/ID)
-            month_map = {
-                'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 
-                'may': 5, 'mei': 5, 
-                'jun': 6, 'jul': 7, 
-                'aug': 8, 'agu': 8, 
-                'sep': 9, 'sept': 9, 
-                'oct': 10, 'okt': 10, 
-                'nov': 11, 'dec': 12, 'des': 12
-            }
-            
-            if m_str not in month_map: return None
-            
-            month_int = month_map[m_str]
-            
-            # Handle tahun 2 digit (25 -> 2025) atau 4 digit (2025)
-            # Bersihkan y_str dari karakter aneh non-digit
-            y_str = ''.join(filter(str.isdigit, y_str))
-            
-            if len(y_str) == 2:
-                year_int = int('20' + y_str)
-            elif len(y_str) == 4:
-                year_int = int(y_str)
-            else:
-                return None
-            
-            return datetime(year_int, month_int, 1)
-        except:
-            return None
+        return parse_month_label(col_name, strict=True)
 
     # ================ 1. DATA PREPARATION ================
     if not df_reseller_forecast.empty:
@@ -5302,7 +6817,7 @@ with tab9:
         # Helper untuk harga
         df_work = df_reseller_forecast.copy()
         if price_col not in df_work.columns:
-            df_work = add_product_info_to_data(df_work, df_product)
+            df_work = add_product_info_to_data(df_work, product_dim)
             target_price_col = 'Floor_Price' 
         else:
             target_price_col = price_col
@@ -5348,7 +6863,7 @@ with tab9:
             all_brands = df_work[brand_col].unique().tolist() if brand_col in df_work.columns else []
             default_brands = []
             if all_brands and fcst_cols:
-                default_brands = df_work.groupby(brand_col)[fcst_cols].sum().sum(axis=1).nlargest(5).index.tolist()
+                default_brands = df_work.groupby(brand_col, observed=True)[fcst_cols].sum().sum(axis=1).nlargest(5).index.tolist()
             
             sel_brands = st.multiselect("Filter by Brand", options=all_brands, default=default_brands, key="res_trend_brand")
             
@@ -5369,7 +6884,7 @@ with tab9:
             
             # 1. Line per Brand (Quantity)
             if brand_col in df_filtered.columns:
-                brand_trend = df_filtered.groupby(brand_col)[sorted_month_cols].sum()
+                brand_trend = df_filtered.groupby(brand_col, observed=True)[sorted_month_cols].sum()
                 brand_trend['Total'] = brand_trend.sum(axis=1)
                 brand_trend = brand_trend.sort_values('Total', ascending=False).drop('Total', axis=1)
                 
@@ -5505,10 +7020,11 @@ with tab9:
                     st.plotly_chart(fig_h_v, use_container_width=True)
                 
                 with st.expander(f"View Detailed Table ({title_suffix})"):
-                    disp_df = df_qq.copy()
-                    for c in disp_df.columns:
-                        if c != group_col: disp_df[c] = disp_df[c].apply(lambda x: f"{x:,.0f}")
-                    st.dataframe(disp_df, use_container_width=True)
+                    st.dataframe(
+                        df_qq,
+                        column_config=format_columns({c: 'qty' for c in df_qq.columns if c != group_col}),
+                        use_container_width=True
+                    )
 
             with qt_tab1: render_heatmap_section(brand_col, df_work, "Brand")
             with qt_tab2: 
@@ -5540,14 +7056,18 @@ with tab9:
         df_exp = df_reseller_forecast.copy()
         if exp_brands: df_exp = df_exp[df_exp[brand_col].isin(exp_brands)]
         
-        df_disp_exp = df_exp[final_cols].head(100).copy()
-        for c in period_cols: 
-            if c in df_disp_exp.columns: df_disp_exp[c] = df_disp_exp[c].apply(lambda x: f"{x:,.0f}")
+        df_disp_exp = df_exp[final_cols].head(100)
             
-        st.dataframe(df_disp_exp, use_container_width=True)
+        st.dataframe(
+            df_disp_exp,
+            column_config=format_columns({c: 'qty' for c in period_cols}, df_disp_exp.columns),
+            use_container_width=True
+        )
         
-        csv_res = df_exp.to_csv(index=False)
-        st.download_button("📥 Download Reseller CSV", csv_res, "reseller_forecast_data.csv", "text/csv")
+        download_data_button(
+            "📥 Download Reseller Data", df_exp, ('reseller_forecast', tuple(exp_brands)), dataset_version,
+            "reseller_forecast_data", key="download_reseller"
+        )
 
         # ================ SECTION 5: INSIGHTS ================
         st.divider()
@@ -5557,7 +7077,7 @@ with tab9:
         insights.append(f"**📊 Total Forecast 2026:** {total_qty_2026:,.0f} units (Rp {total_val_2026:,.0f})")
         
         if brand_col in df_work.columns:
-            brand_sums = df_work.groupby(brand_col)[fcst_cols].sum().sum(axis=1)
+            brand_sums = df_work.groupby(brand_col, observed=True)[fcst_cols].sum().sum(axis=1)
             if not brand_sums.empty:
                 top_b = brand_sums.idxmax()
                 top_b_qty = brand_sums.max()
@@ -5575,7 +7095,7 @@ with tab9:
         st.error("❌ No Reseller forecast data available")
 
 # --- TAB 10: FULFILLMENT COST ANALYSIS (REVISI: GMV CONTRIBUTION) ---
-with tab10:
+if render_section('fulfillment'):
     st.subheader("🚚 Fulfillment Cost Analysis (BS)")
     st.markdown("**Analisis Kontribusi BS terhadap Total Marketplace & Efisiensi Biaya**")
     
@@ -5745,7 +7265,7 @@ with tab10:
         st.caption("Bar: Komposisi GMV (Label dalam Milyar) | Line: Rata-rata Nilai Order")
         
         # Hitung GMV Non-BS
-        df_bs['GMV Non-BS'] = df_bs['GMV Total (MP)'] - df_bs['GMV (Fullfil By BS)']
+        df_bs = df_bs.assign(**{'GMV Non-BS': df_bs['GMV Total (MP)'] - df_bs['GMV (Fullfil By BS)']})
         
         fig_gmv = go.Figure()
         
@@ -5810,19 +7330,17 @@ with tab10:
         
         # --- 4. RAW DATA TABLE ---
         with st.expander("📋 View Detail Data"):
-            df_disp = df_bs.copy()
-            # Format
-            for c in df_disp.columns:
-                if c in ['Total Order(BS)', 'GMV (Fullfil By BS)', 'GMV Total (MP)', 'Total Cost', 'BSA']:
-                    df_disp[c] = df_disp[c].apply(lambda x: f"{x:,.0f}")
-                elif '%Cost' in c:
-                    df_disp[c] = df_disp[c].apply(lambda x: f"{x:.2f}%")
-            
             # Remove technical cols
             cols_hide = ['Month_Date', 'GMV Non-BS']
-            df_disp = df_disp.drop(columns=[c for c in cols_hide if c in df_disp.columns])
+            df_disp = df_bs.drop(columns=[c for c in cols_hide if c in df_bs.columns])
             
-            st.dataframe(df_disp, use_container_width=True)
+            bs_formats = {c: 'qty' for c in ['Total Order(BS)', 'GMV (Fullfil By BS)', 'GMV Total (MP)', 'Total Cost', 'BSA']}
+            bs_formats.update({c: 'percent_2' for c in df_disp.columns if '%Cost' in c})
+            st.dataframe(
+                df_disp,
+                column_config=format_columns(bs_formats, df_disp.columns),
+                use_container_width=True
+            )
 
     else:
         st.warning("⚠️ Data 'BS_Fullfilment_Cost' belum tersedia.")
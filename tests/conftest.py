@@ -0,0 +1,38 @@
+"""
+Fixture bersama: workbook fixture ditulis ke folder sementara, app di-load terhadap folder tsb
+lewat backend file lokal (DASHBOARD_DATA_DIR) dengan snapshot di folder sementara juga
+"""
+import importlib
+import os
+import sys
+
+import pytest
+
+from fixtures import build_workbook, write_workbook
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, 'app.py')
+
+@pytest.fixture(scope='session')
+def workbook_dir(tmp_path_factory):
+    return write_workbook(build_workbook(), str(tmp_path_factory.mktemp('workbook')))
+
+@pytest.fixture(scope='session')
+def dashboard_env(workbook_dir, tmp_path_factory):
+    """Env backend lokal + snapshot dir sementara (dibaca app.py saat di-load / di-run AppTest)"""
+    env = {'DASHBOARD_DATA_DIR': workbook_dir, 'DASHBOARD_SNAPSHOT_DIR': str(tmp_path_factory.mktemp('snapshots'))}
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    yield env
+    for key, value in saved.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+
+@pytest.fixture(scope='session')
+def app(dashboard_env):
+    """Modul app.py (script dijalankan sekali di bare mode Streamlit) -> akses fungsi loader / metrics"""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    return importlib.import_module('app')
@@ -0,0 +1,126 @@
+"""
+Workbook fixture (bentuk sama dengan Google Sheet produksi) untuk test & benchmark offline lewat backend file lokal.
+
+Setiap kolom bulan dibangkitkan dari seed (seed, bulan) sendiri -> workbook n_months + 1 = workbook n_months
+ditambah satu kolom bulan baru (skenario refresh inkremental).
+
+Benchmark:
+    python tests/fixtures.py /tmp/workbook --skus 3000 --months 60
+    DASHBOARD_DATA_DIR=/tmp/workbook streamlit run app.py
+"""
+import argparse
+import csv
+import os
+
+import numpy as np
+
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+BRANDS = ['Alpha', 'Beta', 'Gamma', 'Delta', 'Omega', 'Sigma']
+TIERS = ['Tier 1', 'Tier 2', 'Tier 3', 'New Launch']
+STOCK_CATEGORIES = ['Regular', 'Promo', 'Bundle', 'Sample', 'Damaged']
+
+def fmt_qty(value):
+    """Angka dengan pemisah ribuan seperti tampilan Sheets ('' = sel kosong)"""
+    return f"{int(value):,}"
+
+def month_labels(n_months, start_year):
+    return [f"{MONTH_NAMES[i % 12]}-{str(start_year + i // 12)[2:]}" for i in range(n_months)]
+
+def month_quantities(base, month_index, seed):
+    """Sales / Rofo / PO satu bulan + mask sel kosong, deterministik per (seed, bulan)"""
+    rng = np.random.default_rng([seed, month_index])
+    n_skus = len(base)
+    sales = np.maximum(0, base * rng.uniform(0.5, 1.5, n_skus)).round()
+    rofo = np.maximum(0, sales * rng.uniform(0.6, 1.5, n_skus)).round()
+    po = np.maximum(0, rofo * rng.uniform(0.5, 1.6, n_skus)).round()
+    rofo[rng.random(n_skus) < 0.05] = 0
+    blanks = {name: rng.random(n_skus) < 0.02 for name in ('Sales', 'Rofo', 'PO')}
+    return {'Sales': sales, 'Rofo': rofo, 'PO': po}, blanks
+
+def build_workbook(n_skus=300, n_months=24, start_year=2024, seed=7):
+    """Return {sheet_name: raw grid (list of rows, baris pertama header)} untuk semua sheet dashboard"""
+    rng = np.random.default_rng(seed)
+    skus = [f"SKU{i:04d}" for i in range(n_skus)]
+    names = [f"Product {i} {BRANDS[i % 6]} Serum {['Mini', 'Regular', 'Jumbo'][i % 3]}" for i in range(n_skus)]
+    brands = [BRANDS[i % 6] for i in range(n_skus)]
+    tiers = [TIERS[(i * 7) % 4] for i in range(n_skus)]
+    status = ['Active' if i % 9 else 'Inactive' for i in range(n_skus)]
+    floor_price = rng.integers(20, 400, n_skus) * 1000
+    net_price = (floor_price * rng.uniform(0.4, 0.8, n_skus)).astype(int)
+    base = rng.gamma(2.0, 150, n_skus)
+
+    grids = {
+        'Product_Master': [['SKU_ID', 'Product_Name', 'Brand', 'SKU_Tier', 'Status', 'Floor Price', 'Net Order Price']] + [
+            [skus[i], names[i], brands[i], tiers[i], status[i], fmt_qty(floor_price[i]), fmt_qty(net_price[i])]
+            for i in range(n_skus)
+        ]
+    }
+
+    labels = month_labels(n_months, start_year)
+    columns = {'Sales': [], 'Rofo': [], 'PO': []}
+    for month_index in range(n_months):
+        quantities, blanks = month_quantities(base, month_index, seed)
+        for name, values in quantities.items():
+            columns[name].append(['' if blank else fmt_qty(v) for v, blank in zip(values, blanks[name])])
+
+    id_columns = {
+        'Sales': (['SKU_ID', 'Product_Name', 'Brand', 'SKU_Tier'], lambda i: [skus[i], names[i], brands[i], tiers[i]]),
+        'Rofo': (['SKU_ID', 'Product_Name', 'Brand'], lambda i: [skus[i], names[i], brands[i]]),
+        'PO': (['SKU_ID'], lambda i: [skus[i]])
+    }
+    for name, (header, ids) in id_columns.items():
+        grids[name] = [header + labels] + [ids(i) + [month[i] for month in columns[name]] for i in range(n_skus)]
+
+    stock = [['SKU_ID', 'Product_Code', 'Product_Name', 'Stock_Category', 'Qty_Available', 'Expiry_Date', '']]
+    for i in range(n_skus):
+        for batch in range(1 + i % 3):
+            day, month, year = rng.integers(1, 28), rng.integers(1, 13), rng.choice([2025, 2026, 2027, 2028])
+            expiry = f"{day:02d}/{month:02d}/{year}" if rng.random() > 0.05 else '-'
+            stock.append([skus[i], f"AN{i:05d}", names[i], STOCK_CATEGORIES[(i + batch) % 5], fmt_qty(rng.integers(0, 900)), expiry, ''])
+    grids['Stock_Onhand'] = stock
+
+    ecomm_months = [f"{m}-26" for m in MONTH_NAMES]
+    grids['Forecast_2026_Ecomm'] = [['SKU_ID', 'Product Name', 'Brand', 'SKU Tier'] + ecomm_months] + [
+        [skus[i], names[i], brands[i], tiers[i]] + [fmt_qty(v) for v in (base[i] * rng.uniform(0.7, 1.4, 12)).round()]
+        for i in range(n_skus) if status[i] == 'Active'
+    ]
+
+    reseller_months = [f"{m} {y}" for y in (25, 26) for m in MONTH_NAMES]
+    grids['Forecast_2026_Reseller'] = [['SKU_ID', 'Product Name', 'Brand', 'SKU Tier', 'SKU Focus Notes'] + reseller_months] + [
+        [skus[i], names[i], brands[i], tiers[i], 'focus' if i % 5 == 0 else ''] + [fmt_qty(v) for v in (base[i] * 0.3 * rng.uniform(0.7, 1.4, 24)).round()]
+        for i in range(0, n_skus, 2)
+    ]
+
+    fulfillment = [['Month', 'Total Order(BS)', 'GMV (Fullfil By BS)', 'GMV Total (MP)', 'Total Cost', 'BSA', '%Cost']]
+    for month in ['Apr-25', 'May-25', 'Jun-25', 'Jul-25', 'Aug-25', 'Sep-25', 'Oct-25']:
+        orders = int(rng.integers(20000, 40000))
+        gmv = orders * int(rng.integers(150000, 250000))
+        total_gmv = int(gmv * rng.uniform(2.2, 3.5))
+        cost = int(gmv * rng.uniform(0.02, 0.04))
+        fulfillment.append([month, fmt_qty(orders), fmt_qty(gmv), fmt_qty(total_gmv), fmt_qty(cost), fmt_qty(gmv // orders), f"{cost / gmv * 100:.2f}%"])
+    grids['BS_Fullfilment_Cost'] = fulfillment
+
+    # Sheets API membuang sel kosong di akhir baris
+    for grid in grids.values():
+        for row in grid:
+            while row and row[-1] == '':
+                row.pop()
+    return grids
+
+def write_workbook(grids, data_dir):
+    """Tulis grid sebagai <data_dir>/<Sheet_Name>.csv (format folder backend lokal)"""
+    os.makedirs(data_dir, exist_ok=True)
+    for name, grid in grids.items():
+        with open(os.path.join(data_dir, f"{name}.csv"), 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows(grid)
+    return data_dir
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Tulis workbook fixture ke folder (backend DASHBOARD_DATA_DIR)")
+    parser.add_argument('data_dir')
+    parser.add_argument('--skus', type=int, default=300)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--start-year', type=int, default=2024)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    write_workbook(build_workbook(args.skus, args.months, args.start_year, args.seed), args.data_dir)